@@ -0,0 +1,328 @@
+"""Columnar snapshot of the order history for the analytics panels.
+
+``python manage.py export-analytics`` (from cron, or the refresh button on
+the superadmin dashboard) copies orders, order lines and restaurants into
+Parquet files under snapshot_path(), orders and lines partitioned by month:
+
+    orders/month=2026-10/part.parquet
+    order_items/month=2026-10/part.parquet
+    restaurants.parquet
+    manifest.json
+
+Every run is incremental.  The manifest keeps the highest order, order line
+and status-history ids exported; the next run reads the orders past those
+ids plus every order with a newer status change, and rewrites only the month
+partitions they fall in (rows are replaced by id, so a rerun is harmless).
+Archived orders are read from the archive, so the snapshot has the whole
+history.  One read transaction covers the export; manifest.json is written
+last and its as_of is the moment that transaction saw.
+
+With FOODTIGER_ANALYTICS=1 and a snapshot on disk, the dashboard, sales,
+bestsellers and earnings aggregates scan these files with pyarrow instead of
+querying SQLite, so they never compete with checkout for the database.  They
+are as old as the last export, and the panels say so.  pyarrow is optional:
+without it everything stays on the SQLite rollups.  It is only imported once
+analytics mode is on and a snapshot exists, never at app start.
+"""
+import collections
+import datetime
+import json
+import os
+import threading
+import time
+
+import archive
+import db
+
+pyarrow = pc = ds = pq = None  # set by available()
+_arrow = None  # whether pyarrow imports; None until the first available()
+
+enabled = os.environ.get('FOODTIGER_ANALYTICS') == '1'
+CHUNK = 200000
+LEASE_SECONDS = 600
+# the panels warn once the snapshot is older than this
+STALE_SECONDS = 3600
+CACHE_SIZE = 1000
+
+ORDER_COLUMNS = 'id, customer_id, restaurant_id, delivery_id, total, status, created_at'
+ITEM_COLUMNS = 'i.id, i.order_id, i.restaurant_id, i.menu_item_id, i.name, i.qty, i.price'
+RESTAURANT_COLUMNS = 'id, owner_id, name, rating, is_approved, city'
+
+Earnings = collections.namedtuple('Earnings', 'deliveries earnings')
+Bucket = collections.namedtuple('Bucket', 'bucket orders revenue')
+
+_manifest = (None, None)  # ((path, mtime), dict)
+_cache = {'as_of': None, 'values': {}}
+_cache_lock = threading.Lock()
+
+
+def snapshot_path():
+    return os.environ.get('FOODTIGER_SNAPSHOT') or os.path.splitext(db.DB_PATH)[0] + '-snapshot'
+
+
+def manifest():
+    """The last export's manifest, or None when there is no snapshot yet."""
+    global _manifest
+    path = os.path.join(snapshot_path(), 'manifest.json')
+    try:
+        stamp = (path, os.stat(path).st_mtime_ns)
+    except FileNotFoundError:
+        return None
+    if _manifest[0] != stamp:
+        with open(path) as f:
+            _manifest = (stamp, json.load(f))
+    return _manifest[1]
+
+
+def available():
+    """Whether pyarrow is installed; the first call imports it (with pandas and numpy)."""
+    global _arrow, pyarrow, pc, ds, pq
+    if _arrow is None:
+        try:
+            import pyarrow
+            import pyarrow.compute as pc
+            import pyarrow.dataset as ds
+            import pyarrow.parquet as pq
+            _arrow = True
+        except ImportError:
+            _arrow = False
+    return _arrow
+
+
+def active():
+    """Whether the analytics panels read the snapshot instead of SQLite."""
+    return enabled and manifest() is not None and available()
+
+
+def lag_seconds():
+    """How far the snapshot is behind the database, or None without one."""
+    found = manifest()
+    return None if found is None else max(0.0, time.time() - found['as_of'])
+
+
+def _schemas():
+    return {
+        'orders': pyarrow.schema([
+            ('id', pyarrow.int64()), ('customer_id', pyarrow.int64()), ('restaurant_id', pyarrow.int64()),
+            ('delivery_id', pyarrow.int64()), ('total', pyarrow.float64()), ('status', pyarrow.string()),
+            ('created_at', pyarrow.string()),
+        ]),
+        'order_items': pyarrow.schema([
+            ('id', pyarrow.int64()), ('order_id', pyarrow.int64()), ('restaurant_id', pyarrow.int64()),
+            ('menu_item_id', pyarrow.int64()), ('name', pyarrow.string()), ('qty', pyarrow.int64()),
+            ('price', pyarrow.float64()),
+        ]),
+        'restaurants': pyarrow.schema([
+            ('id', pyarrow.int64()), ('owner_id', pyarrow.int64()), ('name', pyarrow.string()),
+            ('rating', pyarrow.float64()), ('is_approved', pyarrow.int64()), ('city', pyarrow.string()),
+        ]),
+    }
+
+
+# --- export -----------------------------------------------------------------
+
+def refresh(progress=None):
+    """Bring the snapshot up to date; returns the number of orders written.
+
+    Returns None without doing anything while another export holds the lease.
+    """
+    if not available():
+        raise RuntimeError("the analytics snapshot needs pyarrow")
+    now = int(time.time())
+    if not db.execute(
+        "INSERT INTO job_state (name, value) VALUES ('analytics_lease', ?) "
+        "ON CONFLICT (name) DO UPDATE SET value=excluded.value WHERE value < ?",
+        (now + LEASE_SECONDS, now)
+    ):
+        return None
+    try:
+        return _export(progress)
+    finally:
+        db.execute("UPDATE job_state SET value=0 WHERE name='analytics_lease'")
+
+
+def _export(progress):
+    done = manifest() or {'order_id': 0, 'item_id': 0, 'history_id': 0, 'restaurants': None}
+    schemas = ('main', 'archive') if archive.max_id() else ('main',)
+    root = snapshot_path()
+    written = 0
+    with archive.attached() if len(schemas) > 1 else db.reader() as conn:
+        conn.execute("BEGIN")
+        try:
+            as_of = time.time()
+            top = {name: max(conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {schema}.{table}").fetchone()[0]
+                             for schema in schemas)
+                   for name, table in (('order_id', 'orders'), ('item_id', 'order_items'),
+                                       ('history_id', 'order_status_history'))}
+            # orders exported before whose status moved since
+            moved = _read(
+                f"SELECT {ORDER_COLUMNS} FROM {{schema}}.orders WHERE id <= ? AND id IN "
+                f"(SELECT order_id FROM {{schema}}.order_status_history WHERE id > ? AND id <= ?)",
+                (done['order_id'], done['history_id'], top['history_id']), schemas
+            )
+            written += _write(root, 'orders', moved)
+            for low in range(done['order_id'], top['order_id'], CHUNK):
+                fresh = _read(f"SELECT {ORDER_COLUMNS} FROM {{schema}}.orders WHERE id > ? AND id <= ?",
+                              (low, min(low + CHUNK, top['order_id'])), schemas)
+                written += _write(root, 'orders', fresh)
+                if progress:
+                    progress(written)
+            for low in range(done['item_id'], top['item_id'], CHUNK):
+                lines = _read(
+                    f"SELECT {ITEM_COLUMNS}, o.created_at FROM {{schema}}.order_items i "
+                    f"JOIN {{schema}}.orders o ON o.id = i.order_id WHERE i.id > ? AND i.id <= ?",
+                    (low, min(low + CHUNK, top['item_id'])), schemas
+                )
+                _write(root, 'order_items', lines)
+            restaurants = conn.execute("SELECT version FROM table_versions WHERE name='restaurants'").fetchone()
+            restaurants = restaurants[0] if restaurants else 0
+            if restaurants != done['restaurants'] or not os.path.exists(os.path.join(root, 'restaurants.parquet')):
+                table = pyarrow.Table.from_pandas(db.read_df(f"SELECT {RESTAURANT_COLUMNS} FROM restaurants"),
+                                                  schema=_schemas()['restaurants'], preserve_index=False)
+                _replace(os.path.join(root, 'restaurants.parquet'), table)
+        finally:
+            conn.execute("COMMIT")
+    _save_manifest(root, {'as_of': as_of, **top, 'restaurants': restaurants})
+    return written
+
+
+def _read(sql, params, schemas):
+    # live rows first: an interrupted archive run can leave a batch in both files
+    import pandas as pd
+    frames = [db.read_df(sql.format(schema=schema), params) for schema in schemas]
+    frame = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    return frame.drop_duplicates('id')
+
+
+def _write(root, name, frame):
+    """Replace frame's rows (by id) in the month partitions they belong to."""
+    import pandas as pd
+    if frame.empty:
+        return 0
+    schema = _schemas()[name]
+    months = frame['created_at'].fillna('').str.slice(0, 7).replace('', '0000-00')
+    for month, rows in frame.groupby(months):
+        rows = rows[schema.names]
+        path = os.path.join(root, name, f'month={month}', 'part.parquet')
+        if os.path.exists(path):
+            kept = pq.read_table(path).to_pandas()
+            rows = pd.concat([kept[~kept['id'].isin(rows['id'])], rows], ignore_index=True)
+        _replace(path, pyarrow.Table.from_pandas(rows.sort_values('id'), schema=schema, preserve_index=False))
+    return len(frame)
+
+
+def _replace(path, table):
+    # readers never see a half-written file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(table, path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+
+def _save_manifest(root, found):
+    path = os.path.join(root, 'manifest.json')
+    os.makedirs(root, exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(found, f)
+    os.replace(path + '.tmp', path)
+
+
+# --- panel aggregates ---------------------------------------------------------
+
+def _scan(name, columns, where=None):
+    partitioning = ds.partitioning(pyarrow.schema([('month', pyarrow.string())]), flavor='hive')
+    folder = os.path.join(snapshot_path(), name)
+    if not os.path.isdir(folder):
+        return pyarrow.table({column: pyarrow.array([], _schemas()[name].field(column).type)
+                              for column in columns})
+    return ds.dataset(folder, format='parquet', partitioning=partitioning).to_table(columns=columns, filter=where)
+
+
+def _cached(key, compute):
+    # results hold until the next export replaces the manifest
+    as_of = manifest()['as_of']
+    with _cache_lock:
+        if _cache['as_of'] != as_of:
+            _cache['as_of'], _cache['values'] = as_of, {}
+        if key in _cache['values']:
+            return _cache['values'][key]
+    value = compute()
+    with _cache_lock:
+        if _cache['as_of'] == as_of:
+            if len(_cache['values']) >= CACHE_SIZE:
+                _cache['values'].clear()
+            _cache['values'][key] = value
+    return value
+
+
+def dashboard_summary():
+    def compute():
+        # created_at is UTC, like SQLite's DATE('now')
+        today = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d')
+        month = _scan('orders', ['created_at'], ds.field('month') == today[:7])['created_at']
+        approved = pq.read_table(os.path.join(snapshot_path(), 'restaurants.parquet'), columns=['is_approved'])
+        return {
+            'today_orders': pc.sum(pc.starts_with(month, today)).as_py() or 0,
+            'month_orders': len(month),
+            'approved_restaurants': pc.sum(pc.equal(approved['is_approved'], 1)).as_py() or 0,
+            'customers': db.scalar("SELECT value FROM entity_counts WHERE name='role:customer'", default=0),
+        }
+    summary = _cached(('summary',), compute)
+    return dict(summary)
+
+
+def status_breakdown():
+    def compute():
+        counts = _scan('orders', ['status']).group_by('status').aggregate([('status', 'count')])
+        frame = counts.to_pandas().rename(columns={'status_count': 'count'})
+        frame['status'] = frame['status'].fillna('')
+        return frame[['status', 'count']]
+    return _cached(('status',), compute).copy()
+
+
+def revenue_trend():
+    def compute():
+        months = _scan('orders', ['month', 'total']).group_by('month').aggregate([('total', 'sum')])
+        frame = months.to_pandas().rename(columns={'total_sum': 'revenue'})
+        return frame[['month', 'revenue']].sort_values('month', ignore_index=True)
+    return _cached(('trend',), compute).copy()
+
+
+def sales_buckets(restaurant_id, hourly, since):
+    """[Bucket(bucket, orders, revenue)] like sales_hourly / sales_daily rows from `since` on."""
+    def compute():
+        where = (ds.field('restaurant_id') == restaurant_id) & (ds.field('created_at') >= since)
+        if since:
+            where &= ds.field('month') >= since[:7]
+        found = _scan('orders', ['created_at', 'total'], where)
+        # 'YYYY-MM-DD HH' or 'YYYY-MM-DD' prefixes, the same text the bucket tables use
+        keys = pc.utf8_slice_codeunits(found['created_at'], 0, 13 if hourly else 10)
+        if hourly:
+            keys = pc.binary_join_element_wise(keys, ':00', '')
+        grouped = pyarrow.table({'bucket': keys, 'total': pc.fill_null(found['total'], 0.0)}).group_by('bucket')
+        rows = grouped.aggregate([('total', 'count'), ('total', 'sum')]).sort_by('bucket').to_pylist()
+        return [Bucket(row['bucket'], row['total_count'], row['total_sum']) for row in rows]
+    return _cached(('sales', restaurant_id, hourly, since), compute)
+
+
+def bestsellers(restaurant_id, limit=10):
+    def compute():
+        lines = _scan('order_items', ['menu_item_id', 'name', 'qty', 'price'],
+                      ds.field('restaurant_id') == restaurant_id).to_pandas()
+        lines['revenue'] = lines['qty'] * lines['price']
+        sold = (lines.groupby('menu_item_id', dropna=False)
+                .agg(name=('name', 'max'), qty=('qty', 'sum'), revenue=('revenue', 'sum'))
+                .reset_index().sort_values('qty', ascending=False).head(limit))
+        ids = [int(i) for i in sold['menu_item_id'].dropna()]
+        names = dict(db.rows(f"SELECT id, name FROM menu_items WHERE id IN ({','.join('?' * len(ids))})",
+                             tuple(ids))) if ids else {}
+        sold['dish'] = [names.get(i, name) for i, name in zip(sold['menu_item_id'], sold['name'])]
+        return sold[['dish', 'qty', 'revenue']].reset_index(drop=True)
+    return _cached(('bestsellers', restaurant_id, limit), compute).copy()
+
+
+def courier_earnings(delivery_id):
+    def compute():
+        found = _scan('orders', ['total'],
+                      (ds.field('delivery_id') == delivery_id) & (ds.field('status') == 'delivered'))
+        return Earnings(len(found), (pc.sum(found['total']).as_py() or 0) * 0.2)
+    return _cached(('earnings', delivery_id), compute)
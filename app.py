@@ -1,843 +1,846 @@
-import streamlit as st
-import sqlite3
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import hashlib
-import random
-import time
-import base64
-import os
-from PIL import Image
-import io
-
-# Page config
-st.set_page_config(
-    page_title="Foodees - Food Delivery",
-    page_icon="F",
-    layout="wide",
-    initial_sidebar_state="collapsed"
-)
-
-# Custom CSS
-st.markdown("""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&family=Noto+Sans+Devanagari:wght@400;500;700&display=swap');
-
-    * {
-        font-family: 'Poppins', sans-serif;
-    }
-    .hindi-text {
-        font-family: 'Noto Sans Devanagari', sans-serif;
-    }
-
-    /* Hide default Streamlit header & footer & sidebar */
-    header[data-testid="stHeader"] { display: none; }
-    #MainMenu { visibility: hidden; }
-    footer { visibility: hidden; }
-    [data-testid="stSidebar"][aria-expanded="true"],
-    [data-testid="stSidebar"][aria-expanded="false"] { display: none; }
-    [data-testid="collapsedControl"] { display: none; }
-
-    .main .block-container {
-        padding-top: 4rem;
-        padding-bottom: 1.2rem;
-    }
-
-    /* Dark single background */
-    .stApp {
-        background-color: #020617;
-    }
-
-    /* Cards – white on dark */
-    .metric-card {
-        background: #ffffff;
-        border-radius: 16px;
-        border: 1px solid rgba(148,163,184,0.35);
-        box-shadow: 0 6px 18px rgba(15,23,42,0.35);
-        padding: 1.1rem 1.25rem;
-        margin: 0.7rem 0;
-        transition: transform 0.18s ease, box-shadow 0.18s ease;
-    }
-    .metric-card:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 10px 26px rgba(15,23,42,0.55);
-    }
-
-    /* Buttons */
-    .stButton > button {
-        background: linear-gradient(90deg, #f97316, #fb923c);
-        border: none;
-        border-radius: 999px;
-        padding: 0.6rem 1.7rem;
-        font-weight: 600;
-        font-size: 0.9rem;
-        color: #ffffff;
-        box-shadow: 0 4px 12px rgba(249,115,22,0.5);
-        transition: transform 0.15s ease, box-shadow 0.15s ease;
-    }
-    .stButton > button:hover {
-        transform: scale(1.03);
-        box-shadow: 0 6px 18px rgba(249,115,22,0.7);
-    }
-
-    /* Top app bar */
-    .custom-appbar {
-        position: fixed;
-        top: 0;
-        left: 0;
-        right: 0;
-        height: 54px;
-        background: #020617;
-        border-bottom: 1px solid rgba(148,163,184,0.4);
-        display: flex;
-        align-items: center;
-        justify-content: space-between;
-        padding: 0 0.9rem;
-        z-index: 999;
-        box-shadow: 0 2px 8px rgba(15,23,42,0.7);
-    }
-    .custom-appbar-logo {
-        display: flex;
-        align-items: center;
-        gap: 0.45rem;
-        font-weight: 600;
-        font-size: 1rem;
-        color: #e5e7eb;
-    }
-    .logo-circle {
-        width: 28px;
-        height: 28px;
-        border-radius: 999px;
-        background: #f97316;
-        color: #ffffff;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        font-weight: 700;
-        font-size: 0.9rem;
-        box-shadow: 0 2px 6px rgba(249,115,22,0.7);
-    }
-    .custom-appbar-menu {
-        font-size: 1.35rem;
-        color: #e5e7eb;
-        cursor: pointer;
-        user-select: none;
-    }
-
-    /* Simple dropdown menu */
-    .top-menu-panel {
-        position: fixed;
-        top: 54px;
-        right: 0.75rem;
-        background: #020617;
-        border-radius: 12px;
-        border: 1px solid rgba(148,163,184,0.5);
-        box-shadow: 0 10px 30px rgba(15,23,42,0.9);
-        padding: 0.4rem 0;
-        z-index: 1000;
-        width: 220px;
-    }
-    .top-menu-item {
-        padding: 0.45rem 0.9rem;
-        color: #e5e7eb;
-        font-size: 0.9rem;
-        cursor: pointer;
-    }
-    .top-menu-item:hover {
-        background: rgba(148,163,184,0.25);
-    }
-    .top-menu-divider {
-        height: 1px;
-        background: rgba(148,163,184,0.45);
-        margin: 0.25rem 0;
-    }
-
-    h1 {
-        font-size: 1.35rem;
-        color: #e5e7eb;
-    }
-    h2, h3 {
-        color: #e5e7eb;
-    }
-    p, li, label {
-        color: #e5e7eb;
-        font-size: 0.9rem;
-    }
-
-    @media (max-width: 768px) {
-        .main .block-container {
-            padding-left: 0.55rem;
-            padding-right: 0.55rem;
-        }
-        .metric-card {
-            margin: 0.5rem 0;
-            padding: 0.9rem 0.95rem;
-        }
-        .stButton > button {
-            width: 100%;
-            padding: 0.85rem;
-            font-size: 0.85rem;
-        }
-        h1 { font-size: 1.2rem; }
-        h2 { font-size: 1.05rem; }
-        [data-testid="column"] {
-            width: 100% !important;
-            flex: 1 1 100% !important;
-        }
-        .stDataFrame, .stDataFrame div[role="grid"] {
-            overflow-x: auto;
-        }
-    }
-
-    .icon { font-size: 2rem; margin-right: 0.5rem; }
-    </style>
-""", unsafe_allow_html=True)
-
-# Top app bar
-if 'show_menu' not in st.session_state:
-    st.session_state.show_menu = False
-if 'active_panel' not in st.session_state:
-    st.session_state.active_panel = None  # superadmin: dashboard, restaurants, ...
-
-st.markdown("""
-<div class="custom-appbar">
-  <div class="custom-appbar-logo">
-    <div class="logo-circle">F</div>
-    <div>Foodees</div>
-  </div>
-  <div class="custom-appbar-menu">☰</div>
-</div>
-""", unsafe_allow_html=True)
-
-# Invisible button to toggle menu (placed at top)
-menu_col1, menu_col2, menu_col3 = st.columns([5,1,1])
-with menu_col3:
-    if st.button("☰", key="menu_button", help="Menu"):
-        st.session_state.show_menu = not st.session_state.show_menu
-
-# DB
-@st.cache_resource
-def get_db():
-    conn = sqlite3.connect('foodtiger.db', check_same_thread=False)
-    c = conn.cursor()
-
-    c.execute('''CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        phone TEXT UNIQUE,
-        password TEXT,
-        role TEXT,
-        name TEXT,
-        status INTEGER DEFAULT 1
-    )''')
-
-    c.execute('''CREATE TABLE IF NOT EXISTS restaurants (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        owner_id INTEGER,
-        name TEXT,
-        banner_image TEXT,
-        rating REAL DEFAULT 4.0,
-        is_approved INTEGER DEFAULT 0,
-        FOREIGN KEY(owner_id) REFERENCES users(id)
-    )''')
-
-    c.execute('''CREATE TABLE IF NOT EXISTS menu_items (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        restaurant_id INTEGER,
-        name TEXT,
-        hindi_name TEXT,
-        price REAL,
-        image_path TEXT,
-        is_available INTEGER DEFAULT 1,
-        FOREIGN KEY(restaurant_id) REFERENCES restaurants(id)
-    )''')
-
-    c.execute('''CREATE TABLE IF NOT EXISTS orders (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        customer_id INTEGER,
-        restaurant_id INTEGER,
-        delivery_id INTEGER,
-        items_json TEXT,
-        total REAL,
-        status TEXT DEFAULT 'pending',
-        tracking_id TEXT,
-        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY(customer_id) REFERENCES users(id),
-        FOREIGN KEY(restaurant_id) REFERENCES restaurants(id),
-        FOREIGN KEY(delivery_id) REFERENCES users(id)
-    )''')
-
-    conn.commit()
-
-    sample_users = [
-        (9876543210, hashlib.md5('admin123'.encode()).hexdigest(), 'superadmin', 'Super Admin'),
-        (9876543211, hashlib.md5('rest123'.encode()).hexdigest(), 'restaurant', 'Restaurant Owner'),
-        (9876543212, hashlib.md5('cust123'.encode()).hexdigest(), 'customer', 'Rahul Sharma'),
-        (9876543213, hashlib.md5('del123'.encode()).hexdigest(), 'delivery', 'Delivery Boy 1'),
-    ]
-    c.executemany(
-        "INSERT OR IGNORE INTO users (phone, password, role, name) VALUES (?, ?, ?, ?)",
-        sample_users
-    )
-
-    sample_restaurants = [
-        (2, 'Biryani House', 'biriyani_banner.jpg', 4.5, 1),
-        (2, 'Pizza Corner', 'pizza_banner.jpg', 4.2, 1),
-        (2, 'Chai Sutta Bar', 'chai_banner.jpg', 4.8, 0),
-    ]
-    c.executemany(
-        "INSERT OR IGNORE INTO restaurants (owner_id, name, banner_image, rating, is_approved) VALUES (?, ?, ?, ?, ?)",
-        sample_restaurants
-    )
-
-    sample_menu = [
-        (1, 'Chicken Biryani', 'मुर्गा बिरयानी', 250, 'chicken_biryani.jpg'),
-        (1, 'Veg Biryani', 'वेज बिरयानी', 180, 'veg_biryani.jpg'),
-        (2, 'Margherita Pizza', 'मार्गेरिटा पिज्जा', 320, 'pizza.jpg'),
-        (2, 'Pepperoni Pizza', 'पेपरनी पिज्जा', 380, 'pepperoni.jpg'),
-    ]
-    c.executemany(
-        "INSERT OR IGNORE INTO menu_items (restaurant_id, name, hindi_name, price, image_path) VALUES (?, ?, ?, ?, ?)",
-        sample_menu
-    )
-
-    for _ in range(20):
-        c.execute(
-            "INSERT INTO orders (customer_id, restaurant_id, delivery_id, items_json, total, tracking_id) VALUES (?, ?, ?, ?, ?, ?)",
-            (3, random.choice([1, 2]), 4, '[{"name":"Biryani","qty":2}]', random.uniform(200, 500), f'TRACK{random.randint(1000,9999)}')
-        )
-
-    conn.commit()
-    return conn
-
-os.makedirs('images', exist_ok=True)
-
-if 'user' not in st.session_state:
-    st.session_state.user = None
-if 'cart' not in st.session_state:
-    st.session_state.cart = []
-
-def hash_password(pwd: str) -> str:
-    return hashlib.md5(pwd.encode()).hexdigest()
-
-def load_image(path):
-    if path and os.path.exists(path):
-        return Image.open(path)
-    return None
-
-def save_image(uploaded_file, filename):
-    path = f'images/{filename}'
-    with open(path, 'wb') as f:
-        f.write(uploaded_file.getbuffer())
-    return path
-
-def auto_refresh():
-    time.sleep(5)
-    st.rerun()
-
-conn = get_db()
-
-# LOGIN SCREEN (no big title, no refresh)
-if st.session_state.user is None:
-    st.header("📱 लॉगिन करें")
-    phone = st.text_input("📞 फोन नंबर", placeholder="9876543210")
-    password = st.text_input("🔑 पासवर्ड", type="password")
-
-    if st.button("🚀 लॉगिन", type="primary"):
-        df = pd.read_sql(
-            "SELECT * FROM users WHERE phone=? AND password=? AND status=1",
-            conn,
-            params=(phone, hash_password(password))
-        )
-        if not df.empty:
-            st.session_state.user = df.iloc[0].to_dict()
-            st.session_state.active_panel = None
-            st.success(f"✅ स्वागत है, {st.session_state.user['name']}!")
-            st.rerun()
-        else:
-            st.error("❌ गलत फोन या पासवर्ड!")
-
-    st.info("डेमो लॉगिन:\nSuper Admin: 9876543210/admin123\nRestaurant: 9876543211/rest123\nCustomer: 9876543212/cust123\nDelivery: 9876543213/del123")
-
-else:
-    user = st.session_state.user
-    role = user['role']
-
-    # Top-right dropdown menu content
-    if st.session_state.show_menu:
-        menu_html = "<div class='top-menu-panel'>"
-        menu_html += f"<div class='top-menu-item'>👤 {user['name']}</div>"
-        menu_html += "<div class='top-menu-divider'></div>"
-
-        if role == 'superadmin':
-            items = [
-                ("dashboard", "📊 डैशबोर्ड"),
-                ("restaurants", "🏪 रेस्टोरेंट्स"),
-                ("delivery", "🚚 डिलीवरी बॉय"),
-                ("orders", "📋 ऑर्डर्स"),
-                ("payments", "💰 पेमेंट्स")
-            ]
-        elif role == 'restaurant':
-            items = [
-                ("menu", "🍽️ मेन्यू"),
-                ("orders", "📦 ऑर्डर्स"),
-                ("sales", "💰 सेल्स"),
-                ("profile", "👤 प्रोफाइल")
-            ]
-        elif role == 'customer':
-            items = [
-                ("home", "🏠 होम"),
-                ("cart", "🛒 कार्ट"),
-                ("history", "📱 ऑर्डर हिस्ट्री"),
-                ("profile", "👤 प्रोफाइल")
-            ]
-        elif role == 'delivery':
-            items = [
-                ("available", "📦 उपलब्ध ऑर्डर्स"),
-                ("active", "🚚 एक्टिव डिलीवरी"),
-                ("earnings", "💰 कमाई")
-            ]
-        else:
-            items = []
-
-        # Show items as text; selection हम नीचे buttons से करेंगे
-        for key, label in items:
-            menu_html += f"<div class='top-menu-item'>{label}</div>"
-
-        menu_html += "<div class='top-menu-divider'></div>"
-        menu_html += "<div class='top-menu-item'>🚪 लॉगआउट</div>"
-        menu_html += "</div>"
-        st.markdown(menu_html, unsafe_allow_html=True)
-
-    # Actual menu selection buttons (mapped to same items)
-    st.write("")  # spacing
-    menu_buttons = []
-
-    if role == 'superadmin':
-        menu_buttons = [
-            ("dashboard", "📊 डैशबोर्ड"),
-            ("restaurants", "🏪 रेस्टोरेंट्स"),
-            ("delivery", "🚚 डिलीवरी बॉय"),
-            ("orders", "📋 ऑर्डर्स"),
-            ("payments", "💰 पेमेंट्स")
-        ]
-    elif role == 'restaurant':
-        menu_buttons = [
-            ("menu", "🍽️ मेन्यू"),
-            ("orders", "📦 ऑर्डर्स"),
-            ("sales", "💰 सेल्स"),
-            ("profile", "👤 प्रोफाइल")
-        ]
-    elif role == 'customer':
-        menu_buttons = [
-            ("home", "🏠 होम"),
-            ("cart", "🛒 कार्ट"),
-            ("history", "📱 ऑर्डर हिस्ट्री"),
-            ("profile", "👤 प्रोफाइल")
-        ]
-    elif role == 'delivery':
-        menu_buttons = [
-            ("available", "📦 उपलब्ध ऑर्डर्स"),
-            ("active", "🚚 एक्टिव डिलीवरी"),
-            ("earnings", "💰 कमाई")
-        ]
-
-    # Logout + refresh small row
-    top_row1, top_row2, top_row3 = st.columns([2,1,1])
-    with top_row2:
-        if st.button("🚪 लॉगआउट"):
-            st.session_state.user = None
-            st.session_state.cart = []
-            st.rerun()
-    with top_row3:
-        if st.button("🔄 5 सेकंड रिफ्रेश"):
-            auto_refresh()
-
-    # Panel selection row (small buttons)
-    if menu_buttons:
-        cols = st.columns(len(menu_buttons))
-        for i, (key, label) in enumerate(menu_buttons):
-            with cols[i]:
-                if st.button(label, key=f"panel_{key}"):
-                    st.session_state.active_panel = key
-
-    panel = st.session_state.active_panel
-
-    # SUPERADMIN PANELS
-    if role == 'superadmin':
-        if panel is None or panel == "dashboard":
-            col1, col2, col3, col4 = st.columns(4)
-
-            with col1:
-                today_orders = pd.read_sql(
-                    "SELECT COUNT(*) FROM orders WHERE DATE(created_at)=DATE('now')",
-                    conn
-                ).iloc[0,0]
-                st.markdown(f"""
-                <div class="metric-card">
-                    <h3>📦 आज के ऑर्डर्स</h3>
-                    <h1 style='color:#16a34a;'>{today_orders}</h1>
-                </div>
-                """, unsafe_allow_html=True)
-
-            with col2:
-                month_orders = pd.read_sql(
-                    "SELECT COUNT(*) FROM orders WHERE strftime('%Y-%m', created_at)=strftime('%Y-%m', 'now')",
-                    conn
-                ).iloc[0,0]
-                st.markdown(f"""
-                <div class="metric-card">
-                    <h3>📅 महीने के ऑर्डर्स</h3>
-                    <h1 style='color:#fb923c;'>{month_orders}</h1>
-                </div>
-                """, unsafe_allow_html=True)
-
-            with col3:
-                rests = pd.read_sql(
-                    "SELECT COUNT(*) FROM restaurants WHERE is_approved=1",
-                    conn
-                ).iloc[0,0]
-                st.markdown(f"""
-                <div class="metric-card">
-                    <h3>🏪 एक्टिव रेस्टोरेंट्स</h3>
-                    <h1 style='color:#16a34a;'>{rests}</h1>
-                </div>
-                """, unsafe_allow_html=True)
-
-            with col4:
-                users_count = pd.read_sql(
-                    "SELECT COUNT(*) FROM users WHERE role='customer'",
-                    conn
-                ).iloc[0,0]
-                st.markdown(f"""
-                <div class="metric-card">
-                    <h3>👥 कस्टमर्स</h3>
-                    <h1 style='color:#fb923c;'>{users_count}</h1>
-                </div>
-                """, unsafe_allow_html=True)
-
-            col1, col2 = st.columns(2)
-            with col1:
-                df_orders = pd.read_sql(
-                    "SELECT status, COUNT(*) as count FROM orders GROUP BY status",
-                    conn
-                )
-                if not df_orders.empty:
-                    fig_pie = px.pie(df_orders, names='status', values='count', title='ऑर्डर स्टेटस')
-                    st.plotly_chart(fig_pie, use_container_width=True)
-            with col2:
-                df_rev = pd.read_sql(
-                    "SELECT strftime('%Y-%m', created_at) as month, SUM(total) as revenue FROM orders GROUP BY month ORDER BY month",
-                    conn
-                )
-                if not df_rev.empty:
-                    fig_line = px.line(df_rev, x='month', y='revenue', title='रेवेन्यू ट्रेंड')
-                    st.plotly_chart(fig_line, use_container_width=True)
-
-        elif panel == "restaurants":
-            df_rests = pd.read_sql("SELECT * FROM restaurants", conn)
-            st.dataframe(df_rests)
-            st.subheader("✅ अप्रूव्ड रेस्टोरेंट")
-            approved = df_rests[df_rests['is_approved'] == 1]
-            st.dataframe(approved)
-
-        elif panel == "delivery":
-            df_del = pd.read_sql("SELECT * FROM users WHERE role='delivery'", conn)
-            st.dataframe(df_del)
-
-        elif panel == "orders":
-            df_orders = pd.read_sql("SELECT * FROM orders ORDER BY id DESC LIMIT 50", conn)
-            st.dataframe(df_orders)
-
-        elif panel == "payments":
-            st.info("💰 पेमेंट मैनेजमेंट - आने वाला फीचर")
-
-    # RESTAURANT
-    elif role == 'restaurant':
-        rest_df = pd.read_sql(
-            "SELECT id, name FROM restaurants WHERE owner_id=? AND is_approved=1",
-            conn,
-            params=(user['id'],)
-        )
-        if rest_df.empty:
-            st.error("❌ आपका रेस्टोरेंट अभी अप्रूव नहीं है या मौजूद नहीं है।")
-            st.stop()
-        rest_id = int(rest_df.iloc[0]['id'])
-        rest_name = rest_df.iloc[0]['name']
-
-        if panel is None or panel == "menu":
-            st.header(f"🍽️ {rest_name} - मेन्यू")
-
-            with st.form("add_item"):
-                col1, col2 = st.columns(2)
-                with col1:
-                    name = st.text_input("नाम")
-                    hindi_name = st.text_input("हिंदी नाम")
-                    price = st.number_input("कीमत (₹)", min_value=10.0)
-                with col2:
-                    uploaded = st.file_uploader("फूड फोटो", type=['jpg', 'png'])
-                    available = st.checkbox("उपलब्ध", value=True)
-
-                submit_menu = st.form_submit_button("➕ जोड़ें")
-
-                if submit_menu:
-                    if not name:
-                        st.error("नाम ज़रूरी है!")
-                    else:
-                        img_path = None
-                        if uploaded:
-                            img_path = save_image(uploaded, f"food_{int(time.time())}.jpg")
-                        conn.execute(
-                            "INSERT INTO menu_items (restaurant_id, name, hindi_name, price, image_path, is_available) VALUES (?, ?, ?, ?, ?, ?)",
-                            (rest_id, name, hindi_name, price, img_path, 1 if available else 0)
-                        )
-                        conn.commit()
-                        st.success("✅ जोड़ा गया!")
-                        st.rerun()
-
-            df_menu = pd.read_sql(
-                "SELECT * FROM menu_items WHERE restaurant_id=? ORDER BY id DESC",
-                conn,
-                params=(rest_id,)
-            )
-            st.dataframe(df_menu)
-
-            for idx, row in df_menu.iterrows():
-                col1, col2, col3 = st.columns([2, 1, 1])
-                with col1:
-                    img = load_image(row['image_path'])
-                    if img:
-                        st.image(img, width=150, caption=row['name'])
-                    else:
-                        st.write("🖼️")
-                with col2:
-                    st.markdown(f"**{row['hindi_name']}**")
-                    st.caption(f"₹{row['price']}")
-                with col3:
-                    if st.button("🗑️ डिलीट", key=f"del_{row['id']}"):
-                        conn.execute("DELETE FROM menu_items WHERE id=?", (row['id'],))
-                        conn.commit()
-                        st.rerun()
-
-        elif panel == "orders":
-            df_orders = pd.read_sql(
-                "SELECT * FROM orders WHERE restaurant_id=? ORDER BY id DESC",
-                conn,
-                params=(rest_id,)
-            )
-            for idx, order in df_orders.iterrows():
-                with st.expander(f"📦 ऑर्डर #{order['id']} - ₹{order['total']} - {order['status']}"):
-                    st.json(order['items_json'])
-                    status_options = ['pending', 'preparing', 'ready', 'delivered']
-                    current = order['status'] if order['status'] in status_options else 'pending'
-                    new_status = st.selectbox(
-                        "स्टेटस अपडेट",
-                        status_options,
-                        index=status_options.index(current),
-                        key=f"status_{order['id']}"
-                    )
-                    if st.button("✅ अपडेट", key=f"update_{order['id']}"):
-                        conn.execute(
-                            "UPDATE orders SET status=? WHERE id=?",
-                            (new_status, order['id'])
-                        )
-                        conn.commit()
-                        st.success("✅ अपडेट!")
-                        st.rerun()
-
-        elif panel == "sales":
-            df_sales = pd.read_sql(
-                "SELECT strftime('%Y-%m-%d', created_at) as date, SUM(total) as revenue FROM orders WHERE restaurant_id=? GROUP BY date",
-                conn,
-                params=(rest_id,)
-            )
-            st.dataframe(df_sales)
-            if not df_sales.empty:
-                fig = px.bar(df_sales, x='date', y='revenue', title="दैनिक सेल्स")
-                st.plotly_chart(fig, use_container_width=True)
-
-        elif panel == "profile":
-            st.info("🏪 रेस्टोरेंट प्रोफाइल - आने वाला फीचर")
-
-    # CUSTOMER
-    elif role == 'customer':
-        if panel is None or panel == "home":
-            st.header("🔥 वेलकम होम!")
-
-            banners = ["50% ऑफ फर्स्ट ऑर्डर!", "फ्री डिलीवरी ऑन 3+ आइटम्स", "बिरयानी @ ₹99"]
-            selected_banner = random.choice(banners)
-            st.markdown(f"""
-            <div class="metric-card" style='text-align:center; font-size:1.4rem; color:#0f172a;'>
-                🎉 {selected_banner} 🎉
-            </div>
-            """, unsafe_allow_html=True)
-
-            st.subheader("🏪 पॉपुलर रेस्टोरेंट्स")
-            cols = st.columns(3)
-            rest_samples = [
-                {'name': 'Biryani House', 'rating': 4.5, 'time': '25 मिनट', 'offer': '20% ऑफ'},
-                {'name': 'Pizza Corner', 'rating': 4.2, 'time': '30 मिनट', 'offer': '₹50 ऑफ'},
-                {'name': 'Chai Sutta', 'rating': 4.8, 'time': '15 मिनट', 'offer': 'BOGO'}
-            ]
-            for i, rest in enumerate(rest_samples):
-                with cols[i]:
-                    st.markdown(f"""
-                    <div class="metric-card">
-                        <h3 style='color:#0f172a;'>{rest['name']}</h3>
-                        <p style='color:#0f172a;'>⭐ {rest['rating']} | ⏱️ {rest['time']}</p>
-                        <p style='color:#b91c1c; font-weight:bold;'>{rest['offer']}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-            st.subheader("🍕 ट्रेंडिंग फूड")
-            food_samples = [
-                ('Chicken Biryani', 'मुर्गा बिरयानी', 250),
-                ('Pizza', 'पिज्जा', 320),
-                ('Chai', 'चाय', 20)
-            ]
-            for food in food_samples:
-                col1, col2 = st.columns([3, 1])
-                with col1:
-                    st.write(f"**{food[0]}** - {food[1]} - ₹{food[2]}")
-                with col2:
-                    if st.button("➕", key=f"add_{food[0]}"):
-                        st.session_state.cart.append({'name': food[0], 'price': food[2], 'qty': 1})
-                        st.rerun()
-
-        elif panel == "cart":
-            if st.session_state.cart:
-                st.subheader("🛒 शॉपिंग कार्ट")
-                total = 0
-                for item in st.session_state.cart:
-                    st.write(f"{item['name']} x{item['qty']} - ₹{item['price'] * item['qty']}")
-                    total += item['price'] * item['qty']
-
-                st.markdown(f"**ग्रैंड टोटल: ₹{total}**")
-
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button("🗑️ क्लियर कार्ट"):
-                        st.session_state.cart = []
-                        st.rerun()
-                with col2:
-                    if st.button("💳 चेकआउट"):
-                        tracking = f'TRACK{random.randint(1000, 9999)}'
-                        conn.execute(
-                            "INSERT INTO orders (customer_id, restaurant_id, items_json, total, tracking_id) VALUES (?, ?, ?, ?, ?)",
-                            (user['id'], 1, str(st.session_state.cart), total, tracking)
-                        )
-                        conn.commit()
-                        st.success(f"✅ ऑर्डर प्लेस! ट्रैकिंग: {tracking}")
-                        st.session_state.cart = []
-                        st.rerun()
-            else:
-                st.info("🛒 आपका कार्ट खाली है!")
-
-        elif panel == "history":
-            df_myorders = pd.read_sql(
-                "SELECT * FROM orders WHERE customer_id=? ORDER BY id DESC",
-                conn,
-                params=(user['id'],)
-            )
-            st.dataframe(df_myorders)
-
-        elif panel == "profile":
-            st.info("👤 प्रोफाइल - एड्रेस मैनेजमेंट आने वाला")
-
-    # DELIVERY
-    elif role == 'delivery':
-        if panel is None or panel == "available":
-            df_avail = pd.read_sql(
-                "SELECT * FROM orders WHERE delivery_id IS NULL AND status='ready' ORDER BY id DESC LIMIT 10",
-                conn
-            )
-            if df_avail.empty:
-                st.info("📦 अभी कोई ready ऑर्डर नहीं है।")
-            for idx, order in df_avail.iterrows():
-                with st.expander(f"📦 ऑर्डर #{order['id']} - ₹{order['total']}"):
-                    st.json(order['items_json'])
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        if st.button("✅ एक्सेप्ट", key=f"accept_{order['id']}"):
-                            conn.execute(
-                                "UPDATE orders SET delivery_id=? WHERE id=?",
-                                (user['id'], order['id'])
-                            )
-                            conn.commit()
-                            st.success("✅ एक्सेप्टेड!")
-                            st.rerun()
-                    with col2:
-                        st.caption("❌ रिजेक्ट (dummy)")
-
-        elif panel == "active":
-            df_active = pd.read_sql(
-                """
-                SELECT o.*, u.name as cust_name 
-                FROM orders o 
-                JOIN users u ON o.customer_id=u.id 
-                WHERE o.delivery_id = ? AND o.status != 'delivered'
-                """,
-                conn,
-                params=(user['id'],)
-            )
-            if df_active.empty:
-                st.info("🚚 कोई एक्टिव डिलीवरी नहीं है।")
-            for idx, order in df_active.iterrows():
-                st.markdown(f"""
-                <div class="metric-card">
-                    <h3 style='color:#0f172a;'>📦 ऑर्डर #{order['id']} - {order['cust_name']}</h3>
-                    <p style='color:#0f172a;'>📱 9876******123 (मास्क्ड)</p>
-                    <p style='color:#0f172a;'>💰 ₹{order['total']}</p>
-                    <p style='color:#0f172a;'>📍 रेस्टोरेंट → कस्टमर (20km, ETA 25min)</p>
-                </div>
-                """, unsafe_allow_html=True)
-
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    if st.button("📞 कॉल", key=f"call_{order['id']}"):
-                        st.info("📞 कॉल सिमुलेशन - 9876******123")
-                with col2:
-                    if st.button("✅ डिलीवर", key=f"delivered_{order['id']}"):
-                        conn.execute(
-                            "UPDATE orders SET status='delivered' WHERE id=?",
-                            (order['id'],)
-                        )
-                        conn.commit()
-                        st.rerun()
-                with col3:
-                    fig = go.Figure(go.Scattermapbox(
-                        lat=[26.4499, 26.4499],
-                        lon=[80.3319, 80.3319],
-                        mode='markers',
-                        marker=go.scattermapbox.Marker(size=12, color=['green', 'red'])
-                    ))
-                    fig.update_layout(mapbox_style="open-street-map", mapbox=dict(zoom=10))
-                    st.plotly_chart(fig, use_container_width=True, key=f"del_map_{order['id']}")
-
-        elif panel == "earnings":
-            earnings_df = pd.read_sql(
-                """
-                SELECT 
-                    COUNT(*) as deliveries,
-                    COALESCE(SUM(total*0.2), 0) as earnings
-                FROM orders 
-                WHERE delivery_id=? AND status='delivered'
-                """,
-                conn,
-                params=(user['id'],)
-            )
-            if not earnings_df.empty:
-                earnings = earnings_df.iloc[0]
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.metric("🚚 कुल कमाई", f"₹{int(earnings['earnings'])}")
-                with col2:
-                    st.metric("📦 टोटल डिलीवरी", int(earnings['deliveries']))
-
-# Footer
-st.markdown("---")
-st.markdown(
-    "<p style='text-align:center; color:rgba(248,250,252,0.8);'>🍕 Foodees - Sikariganj का तेज डिलीवरी ऐप | Made with ❤️ by Foodees</p>",
-    unsafe_allow_html=True
-)
+import streamlit as st
+from datetime import datetime
+import json
+import random
+import os
+import analytics
+import assets
+import auth
+import db
+import dispatch
+import grids
+import images
+import maps
+import menu_import
+import orders
+import profiler
+import reports
+import sales
+import search
+import trending
+
+# Page config
+st.set_page_config(
+    page_title="Foodees - Food Delivery",
+    page_icon="F",
+    layout="wide",
+    initial_sidebar_state="collapsed"
+)
+
+# Styles: static/app.css (see assets.py), linked into <head> once per session
+if not st.session_state.get('assets_linked'):
+    st.html(assets.head_html(), unsafe_allow_javascript=True)
+    st.session_state.assets_linked = True
+
+# Top app bar
+if 'show_menu' not in st.session_state:
+    st.session_state.show_menu = False
+if 'active_panel' not in st.session_state:
+    st.session_state.active_panel = None  # superadmin: dashboard, restaurants, ...
+
+st.markdown("""
+<div class="custom-appbar">
+  <div class="custom-appbar-logo">
+    <div class="logo-circle">F</div>
+    <div>Foodees</div>
+  </div>
+  <div class="custom-appbar-menu">☰</div>
+</div>
+""", unsafe_allow_html=True)
+
+# Invisible button to toggle menu (placed at top)
+menu_col1, menu_col2, menu_col3 = st.columns([5,1,1])
+with menu_col3:
+    if st.button("☰", key="menu_button", help="Menu"):
+        st.session_state.show_menu = not st.session_state.show_menu
+
+# DB
+@st.cache_resource
+def get_db():
+    db.init_db()
+    return db
+
+os.makedirs('images', exist_ok=True)
+
+if 'user' not in st.session_state:
+    st.session_state.user = None
+if 'cart' not in st.session_state:
+    st.session_state.cart = []
+
+def load_image(path):
+    return images.thumbnail(path)
+
+def save_image(uploaded_file):
+    ext = os.path.splitext(uploaded_file.name)[1] or '.jpg'
+    return images.store_image(bytes(uploaded_file.getbuffer()), ext)
+
+REFRESH_SECONDS = 5
+
+if 'live_updates' not in st.session_state:
+    st.session_state.live_updates = False
+
+def live_fragment(fn):
+    # Panel as a fragment: while live updates are on it re-runs by itself every
+    # REFRESH_SECONDS without re-running the rest of the page.
+    return st.fragment(run_every=REFRESH_SECONDS if st.session_state.live_updates else None)(
+        profiler.keep_panel(fn))
+
+def live_value(key, tables, load, args=()):
+    # load() again only once one of `tables` has been written to or args change;
+    # one entry per key, so keys name a view and whatever varies goes in args
+    version = db.table_version(*tables)
+    cache = st.session_state.setdefault('live_rows', {})
+    hit = cache.get(key)
+    if hit is not None and hit[0] == version and hit[1] == args:
+        return hit[2]
+    found = load()
+    cache[key] = (version, args, found)
+    return found
+
+def live_rows(key, tables, sql, params=()):
+    return live_value(key, tables, lambda: db.rows(sql, params), tuple(params))
+
+STATUS_LABELS = {
+    'open': "⏳ खुले ऑर्डर", 'all': "📋 सभी", 'pending': "🕐 pending",
+    'preparing': "👨‍🍳 preparing", 'ready': "✅ ready", 'delivered': "🚚 delivered",
+}
+
+def order_page(key, owner_column, owner_id):
+    # status filter + keyset cursor; only the visible page is ever read
+    cursors = st.session_state.setdefault(f"{key}_cursors", [None])
+    status = st.selectbox(
+        "स्टेटस", ['open', 'all'] + orders.STATUSES, key=f"{key}_status",
+        format_func=STATUS_LABELS.get, on_change=cursors.clear
+    )
+    if not cursors:
+        cursors.append(None)
+    return live_value(
+        f"{key}_page", ('orders',),
+        lambda: orders.page(owner_column, owner_id, None if status == 'all' else status, cursors[-1]),
+        (status, cursors[-1])
+    )
+
+def pager_buttons(key, next_cursor, has_more):
+    cursors = st.session_state[f"{key}_cursors"]
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("⬅️ पिछले", key=f"{key}_prev", disabled=len(cursors) == 1, on_click=cursors.pop)
+    with col2:
+        st.caption(f"पेज {len(cursors)}")
+    with col3:
+        st.button("अगले ➡️", key=f"{key}_next", disabled=not has_more,
+                  on_click=cursors.append, args=(next_cursor,))
+
+def admin_grid(name):
+    # filters, sort and paging all go to SQL; only one page ever reaches the browser
+    grid = grids.GRIDS[name]
+    key = f"grid_{name}"
+    cursors = st.session_state.setdefault(f"{key}_cursors", [None])
+    values = {}
+    cols = st.columns(len(grid.filters) + 1)
+    for col, (field, flt) in zip(cols, grid.filters.items()):
+        with col:
+            if flt.kind == 'choice':
+                values[field] = st.selectbox(flt.label, flt.options, key=f"{key}_{field}",
+                                             format_func=lambda v: "सभी" if v is None else str(v), on_change=cursors.clear)
+            elif flt.kind == 'int':
+                values[field] = st.number_input(flt.label, min_value=0, step=1, value=None,
+                                                key=f"{key}_{field}", on_change=cursors.clear)
+            else:
+                values[field] = st.text_input(flt.label, key=f"{key}_{field}", on_change=cursors.clear).strip()
+    with cols[-1]:
+        sort = st.selectbox("↕️ सॉर्ट", [f"{s} ↓" for s in grid.sorts] + [f"{s} ↑" for s in grid.sorts],
+                            key=f"{key}_sort", on_change=cursors.clear)
+    if not cursors:
+        cursors.append(None)
+    found, has_more = grid.page(values, sort.split()[0], sort.endswith('↓'), cursors[-1])
+    total, exact = grid.count(values)
+    st.caption(f"कुल: {total}{'' if exact else '+'}")
+    st.dataframe(db.to_frame(found), hide_index=True)
+    last = found[-1] if found else None
+    pager_buttons(key, (getattr(last, sort.split()[0]), last.id) if last else None, has_more)
+
+def session_cookie(token):
+    # script that stores the session token in the browser, or clears it for ''
+    cookie = (f"{auth.SESSION_COOKIE}={token}; Path=/; SameSite=Strict; "
+              f"Max-Age={auth.SESSION_SECONDS if token else 0}")
+    return ("<script>document.cookie = " + json.dumps(cookie) +
+            " + (location.protocol === 'https:' ? '; Secure' : '');</script>")
+
+def snapshot_age(refresh=False):
+    # analytics mode: the figures below come from the Parquet snapshot, so say how old they are
+    if not analytics.enabled or not analytics.available():
+        return
+    lag = analytics.lag_seconds()
+    if lag is None:
+        st.caption("📸 एनालिटिक्स स्नैपशॉट अभी नहीं बना, आंकड़े सीधे डेटाबेस से")
+    else:
+        age = (f"{int(lag)} सेकंड" if lag < 60 else f"{int(lag // 60)} मिनट" if lag < 3600
+               else f"{lag / 3600:.1f} घंटे")
+        (st.warning if lag > analytics.STALE_SECONDS else st.caption)(f"📸 एनालिटिक्स स्नैपशॉट {age} पुराना है")
+    if refresh:
+        st.button("🔄 स्नैपशॉट रिफ्रेश", key="analytics_refresh", on_click=analytics.refresh)
+
+def show_items(lines, items_json):
+    if lines:
+        for line in lines:
+            st.write(f"{line.name} x{line.qty} - ₹{line.price * line.qty}")
+    elif items_json:
+        # order placed before order_items existed and not backfilled yet
+        st.code(items_json)
+
+def location_form(key, current, on_save, label="📍 लोकेशन सेव करें"):
+    lat = current.lat if current and current.lat is not None else dispatch.CITY_CENTER[0]
+    lon = current.lon if current and current.lon is not None else dispatch.CITY_CENTER[1]
+    with st.form(key):
+        col1, col2 = st.columns(2)
+        with col1:
+            new_lat = st.number_input("अक्षांश (lat)", value=float(lat), format="%.5f")
+        with col2:
+            new_lon = st.number_input("देशांतर (lon)", value=float(lon), format="%.5f")
+        if st.form_submit_button(label):
+            on_save(new_lat, new_lon)
+            st.success("✅ लोकेशन सेव हो गई!")
+
+get_db()
+
+# A reload starts a fresh session; the session cookie logs it back in (see auth.py).
+if 'session' in st.query_params:
+    del st.query_params['session']  # tokens from old links, never valid now
+if st.session_state.user is None and 'cookie_checked' not in st.session_state:
+    st.session_state.cookie_checked = True
+    token = st.context.cookies.get(auth.SESSION_COOKIE)
+    if token:
+        st.session_state.user = auth.resume(token)
+        if st.session_state.user is None:
+            st.session_state.set_cookie = ''
+        else:
+            st.session_state.session_token = token
+
+# Cookie writes wait for the next full run: the st.rerun() after login / logout
+# would otherwise cut the script off before it reaches the browser.
+if 'set_cookie' in st.session_state:
+    st.html(session_cookie(st.session_state.pop('set_cookie')), unsafe_allow_javascript=True)
+
+# LOGIN SCREEN (no big title, no refresh)
+if st.session_state.user is None:
+    st.header("📱 लॉगिन करें")
+    phone = st.text_input("📞 फोन नंबर", placeholder="9876543210")
+    password = st.text_input("🔑 पासवर्ड", type="password")
+
+    if st.button("🚀 लॉगिन", type="primary"):
+        found = auth.login(phone, password)
+        if found:
+            st.session_state.user = found
+            st.session_state.session_token = st.session_state.set_cookie = auth.issue_token(found)
+            st.session_state.active_panel = None
+            st.success(f"✅ स्वागत है, {st.session_state.user['name']}!")
+            st.rerun()
+        else:
+            st.error("❌ गलत फोन या पासवर्ड!")
+
+    st.info("डेमो लॉगिन:\nSuper Admin: 9876543210/admin123\nRestaurant: 9876543211/rest123\nCustomer: 9876543212/cust123\nDelivery: 9876543213/del123")
+
+else:
+    user = st.session_state.user
+    role = user['role']
+
+    # Top-right dropdown menu content
+    if st.session_state.show_menu:
+        menu_html = "<div class='top-menu-panel'>"
+        menu_html += f"<div class='top-menu-item'>👤 {user['name']}</div>"
+        menu_html += "<div class='top-menu-divider'></div>"
+
+        if role == 'superadmin':
+            items = [
+                ("dashboard", "📊 डैशबोर्ड"),
+                ("restaurants", "🏪 रेस्टोरेंट्स"),
+                ("delivery", "🚚 डिलीवरी बॉय"),
+                ("orders", "📋 ऑर्डर्स"),
+                ("fleet", "🗺️ फ्लीट मैप"),
+                ("payments", "💰 पेमेंट्स"),
+                ("performance", "⚡ परफॉर्मेंस")
+            ]
+        elif role == 'restaurant':
+            items = [
+                ("menu", "🍽️ मेन्यू"),
+                ("orders", "📦 ऑर्डर्स"),
+                ("sales", "💰 सेल्स"),
+                ("profile", "👤 प्रोफाइल")
+            ]
+        elif role == 'customer':
+            items = [
+                ("home", "🏠 होम"),
+                ("search", "🔍 सर्च"),
+                ("cart", "🛒 कार्ट"),
+                ("history", "📱 ऑर्डर हिस्ट्री"),
+                ("profile", "👤 प्रोफाइल")
+            ]
+        elif role == 'delivery':
+            items = [
+                ("available", "📦 उपलब्ध ऑर्डर्स"),
+                ("active", "🚚 एक्टिव डिलीवरी"),
+                ("earnings", "💰 कमाई")
+            ]
+        else:
+            items = []
+
+        # Show items as text; selection हम नीचे buttons से करेंगे
+        for key, label in items:
+            menu_html += f"<div class='top-menu-item'>{label}</div>"
+
+        menu_html += "<div class='top-menu-divider'></div>"
+        menu_html += "<div class='top-menu-item'>🚪 लॉगआउट</div>"
+        menu_html += "</div>"
+        st.markdown(menu_html, unsafe_allow_html=True)
+
+    # Actual menu selection buttons (mapped to same items)
+    st.write("")  # spacing
+    menu_buttons = []
+
+    if role == 'superadmin':
+        menu_buttons = [
+            ("dashboard", "📊 डैशबोर्ड"),
+            ("restaurants", "🏪 रेस्टोरेंट्स"),
+            ("delivery", "🚚 डिलीवरी बॉय"),
+            ("orders", "📋 ऑर्डर्स"),
+            ("fleet", "🗺️ फ्लीट मैप"),
+            ("payments", "💰 पेमेंट्स"),
+            ("performance", "⚡ परफॉर्मेंस")
+        ]
+    elif role == 'restaurant':
+        menu_buttons = [
+            ("menu", "🍽️ मेन्यू"),
+            ("orders", "📦 ऑर्डर्स"),
+            ("sales", "💰 सेल्स"),
+            ("profile", "👤 प्रोफाइल")
+        ]
+    elif role == 'customer':
+        menu_buttons = [
+            ("home", "🏠 होम"),
+            ("search", "🔍 सर्च"),
+            ("cart", "🛒 कार्ट"),
+            ("history", "📱 ऑर्डर हिस्ट्री"),
+            ("profile", "👤 प्रोफाइल")
+        ]
+    elif role == 'delivery':
+        menu_buttons = [
+            ("available", "📦 उपलब्ध ऑर्डर्स"),
+            ("active", "🚚 एक्टिव डिलीवरी"),
+            ("earnings", "💰 कमाई")
+        ]
+
+    # Logout + refresh small row
+    top_row1, top_row2, top_row3 = st.columns([2,1,1])
+    with top_row2:
+        if st.button("🚪 लॉगआउट"):
+            auth.revoke(st.session_state.pop('session_token', None))
+            st.session_state.set_cookie = ''
+            st.session_state.user = None
+            st.session_state.cart = []
+            st.rerun()
+    with top_row3:
+        st.toggle("🔄 लाइव अपडेट", key="live_updates")
+
+    # Panel selection row (small buttons)
+    if menu_buttons:
+        cols = st.columns(len(menu_buttons))
+        for i, (key, label) in enumerate(menu_buttons):
+            with cols[i]:
+                if st.button(label, key=f"panel_{key}"):
+                    st.session_state.active_panel = key
+
+    panel = st.session_state.active_panel
+
+    # timed and tagged for the superadmin performance panel (when profiling is on)
+    with profiler.panel(f"{role}/{panel or 'default'}"):
+        # SUPERADMIN PANELS
+        if role == 'superadmin':
+            if panel is None or panel == "dashboard":
+                import plotly.express as px
+                snapshot_age(refresh=True)
+                summary = reports.dashboard_summary()
+                col1, col2, col3, col4 = st.columns(4)
+
+                with col1:
+                    st.markdown(f"""
+                    <div class="metric-card">
+                        <h3>📦 आज के ऑर्डर्स</h3>
+                        <h1 style='color:#16a34a;'>{summary['today_orders']}</h1>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+                with col2:
+                    st.markdown(f"""
+                    <div class="metric-card">
+                        <h3>📅 महीने के ऑर्डर्स</h3>
+                        <h1 style='color:#fb923c;'>{summary['month_orders']}</h1>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+                with col3:
+                    st.markdown(f"""
+                    <div class="metric-card">
+                        <h3>🏪 एक्टिव रेस्टोरेंट्स</h3>
+                        <h1 style='color:#16a34a;'>{summary['approved_restaurants']}</h1>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+                with col4:
+                    st.markdown(f"""
+                    <div class="metric-card">
+                        <h3>👥 कस्टमर्स</h3>
+                        <h1 style='color:#fb923c;'>{summary['customers']}</h1>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    df_orders = reports.status_breakdown()
+                    if not df_orders.empty:
+                        fig_pie = px.pie(df_orders, names='status', values='count', title='ऑर्डर स्टेटस')
+                        st.plotly_chart(fig_pie, use_container_width=True)
+                with col2:
+                    df_rev = reports.revenue_trend()
+                    if not df_rev.empty:
+                        fig_line = px.line(df_rev, x='month', y='revenue', title='रेवेन्यू ट्रेंड')
+                        st.plotly_chart(fig_line, use_container_width=True)
+
+            elif panel in ("restaurants", "delivery", "orders"):
+                admin_grid(panel)
+
+            elif panel == "fleet":
+                @live_fragment
+                def fleet_map():
+                    fleet = live_rows("fleet_orders", ('orders', 'restaurants'), dispatch.FLEET_ORDERS)
+                    couriers = live_rows("fleet_couriers", ('orders', 'users'), dispatch.FLEET_COURIERS)
+                    col1, col2 = st.columns(2)
+                    col1.metric("📦 रास्ते में ऑर्डर्स", len(fleet))
+                    col2.metric("🚚 एक्टिव डिलीवरी बॉय", len(couriers))
+                    fleet_figure = live_value("fleet_map", ('orders', 'users', 'restaurants'),
+                                              lambda: maps.delivery_map(fleet, couriers))
+                    if fleet_figure:
+                        st.plotly_chart(fleet_figure, use_container_width=True, key="fleet_map")
+                    else:
+                        st.info("🗺️ अभी कोई डिलीवरी रास्ते में नहीं है।")
+                fleet_map()
+
+            elif panel == "payments":
+                st.info("💰 पेमेंट मैनेजमेंट - आने वाला फीचर")
+
+            elif panel == "performance":
+                col1, col2, col3 = st.columns([2, 2, 1])
+                with col1:
+                    # process-wide: every session's DB calls and panel renders are recorded
+                    st.toggle("⚡ प्रोफाइलिंग चालू", value=profiler.enabled, key="profiling",
+                              on_change=lambda: setattr(profiler, 'enabled', st.session_state.profiling))
+                with col2:
+                    st.number_input("🐢 स्लो क्वेरी (ms)", min_value=0.1, value=float(profiler.SLOW_MS), step=10.0,
+                                    key="slow_ms",
+                                    on_change=lambda: setattr(profiler, 'SLOW_MS', st.session_state.slow_ms))
+                with col3:
+                    if st.button("🧹 रीसेट"):
+                        profiler.reset()
+                if not profiler.enabled and not profiler.queries:
+                    st.info("प्रोफाइलिंग बंद है - चालू करें और दूसरे पैनल खोलें।")
+                else:
+                    st.caption(f"पिछली {len(profiler.queries)} क्वेरी, {len(profiler.panels)} पैनल रेंडर")
+                    st.subheader("🔝 टॉप क्वेरी (कुल समय)")
+                    st.dataframe(profiler.top_queries(), hide_index=True)
+
+                    st.subheader("📊 पैनल लेटेंसी")
+                    stats = profiler.panel_stats()
+                    if stats:
+                        st.dataframe(
+                            [{'panel': name, **{k: v for k, v in row.items() if k != 'buckets'}}
+                             for name, row in stats.items()],
+                            hide_index=True
+                        )
+                        import plotly.graph_objects as go
+                        labels = [f"≤{upper:g}" if upper != float('inf') else f">{profiler.BUCKETS_MS[-2]:g}"
+                                  for upper in profiler.BUCKETS_MS]
+                        fig = go.Figure([go.Bar(name=name, x=labels, y=row['buckets']) for name, row in stats.items()])
+                        fig.update_layout(barmode='group', xaxis_title="ms", yaxis_title="रेंडर", height=350)
+                        st.plotly_chart(fig, use_container_width=True)
+
+                    st.subheader("🐢 हाल की स्लो क्वेरी")
+                    if not profiler.slow:
+                        st.caption(f"{profiler.SLOW_MS:g} ms से धीमी कोई क्वेरी नहीं।")
+                    for query in reversed(profiler.slow):
+                        with st.expander(f"{query.ms:.1f} ms - {query.panel or '-'} - {query.sql[:80]}"):
+                            st.code(query.sql, language='sql')
+                            st.caption(f"params: ({query.shape}) | rows: {query.rows} | "
+                                       f"{datetime.fromtimestamp(query.at):%H:%M:%S}")
+                            st.code('\n'.join(query.plan), language=None)
+
+        # RESTAURANT
+        elif role == 'restaurant':
+            restaurant = db.one(auth.OWNER_RESTAURANT, (user['id'],))
+            if restaurant is None:
+                st.error("❌ आपका रेस्टोरेंट अभी अप्रूव नहीं है या मौजूद नहीं है।")
+                st.stop()
+            rest_id = restaurant.id
+            rest_name = restaurant.name
+
+            if panel is None or panel == "menu":
+                st.header(f"🍽️ {rest_name} - मेन्यू")
+
+                with st.form("add_item"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        name = st.text_input("नाम")
+                        hindi_name = st.text_input("हिंदी नाम")
+                        price = st.number_input("कीमत (₹)", min_value=10.0)
+                    with col2:
+                        uploaded = st.file_uploader("फूड फोटो", type=['jpg', 'png'])
+                        available = st.checkbox("उपलब्ध", value=True)
+
+                    submit_menu = st.form_submit_button("➕ जोड़ें")
+
+                    if submit_menu:
+                        if not name:
+                            st.error("नाम ज़रूरी है!")
+                        else:
+                            img_path = None
+                            if uploaded:
+                                img_path = save_image(uploaded)
+                            db.execute(
+                                "INSERT INTO menu_items (restaurant_id, name, hindi_name, price, image_path, is_available, roman_name) "
+                                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                (rest_id, name, hindi_name, price, img_path, 1 if available else 0, search.transliterate(hindi_name))
+                            )
+                            st.success("✅ जोड़ा गया!")
+                            st.rerun()
+
+                with st.expander("📥 बल्क इम्पोर्ट (CSV / Excel + फोटो zip)"):
+                    st.download_button("📄 टेम्पलेट CSV", menu_import.template_csv(), "menu_template.csv", "text/csv")
+                    with st.form("bulk_import"):
+                        table_file = st.file_uploader("आइटम लिस्ट", type=['csv', 'xlsx'])
+                        archive_file = st.file_uploader("फोटो zip (वैकल्पिक)", type=['zip'])
+                        skip_invalid = st.checkbox("गलत पंक्तियाँ छोड़कर बाकी इम्पोर्ट करें")
+                        if st.form_submit_button("📥 इम्पोर्ट") and table_file:
+                            result = menu_import.import_menu(
+                                rest_id, table_file.getvalue(), table_file.name,
+                                archive_file.getvalue() if archive_file else None, skip_invalid
+                            )
+                            if result.inserted:
+                                st.success(f"✅ {result.inserted} आइटम जोड़े गए!")
+                            if result.errors:
+                                st.error(f"❌ {len(result.errors)} गलतियाँ" + ("" if result.inserted else " - कुछ भी इम्पोर्ट नहीं हुआ"))
+                                st.dataframe(db.to_frame(result.errors), hide_index=True)
+
+                menu = db.rows(menu_import.RESTAURANT_MENU, (rest_id,))
+                st.dataframe(db.to_frame(menu))
+
+                for row in menu:
+                    col1, col2, col3 = st.columns([2, 1, 1])
+                    with col1:
+                        img = load_image(row.image_path)
+                        if img:
+                            st.image(img, width=150, caption=row.name)
+                        else:
+                            st.write("🖼️")
+                    with col2:
+                        st.markdown(f"**{row.hindi_name}**")
+                        st.caption(f"₹{row.price}")
+                    with col3:
+                        if st.button("🗑️ डिलीट", key=f"del_{row.id}"):
+                            db.execute("DELETE FROM menu_items WHERE id=?", (row.id,))
+                            st.rerun()
+
+            elif panel == "orders":
+                @live_fragment
+                def restaurant_orders():
+                    rest_orders, has_more = order_page(f"rest_orders_{rest_id}", 'restaurant_id', rest_id)
+                    if not rest_orders:
+                        st.info("📦 इस फ़िल्टर में कोई ऑर्डर नहीं है।")
+                    shown = tuple(o.id for o in rest_orders)
+                    lines = live_value(f"rest_lines_{rest_id}", ('orders',),
+                                       lambda: orders.items_for(list(shown)), shown)
+                    history = live_value(f"rest_history_{rest_id}", ('orders',),
+                                         lambda: orders.history_for(list(shown)), shown)
+                    movable = [o for o in rest_orders if orders.NEXT_STATUS.get(o.status) in orders.RESTAURANT_MOVES]
+
+                    def move(order_ids, to_status):
+                        # on_click: runs before the fragment re-renders, so the list shows the new statuses
+                        moved = orders.transition(order_ids, to_status, restaurant_id=rest_id)
+                        if len(order_ids) > 1:
+                            st.session_state[f"moved_{rest_id}"] = (
+                                f"✅ {len(moved)} ऑर्डर {to_status}"
+                                + (f", {len(order_ids) - len(moved)} नहीं बदले" if len(moved) < len(order_ids) else "")
+                            )
+                        for order_id in order_ids:
+                            st.session_state.pop(f"pick_{order_id}", None)
+                        st.session_state[f"select_all_{rest_id}"] = False
+
+                    moved_note = st.session_state.pop(f"moved_{rest_id}", None)
+                    if moved_note:
+                        st.success(moved_note)
+                    if movable:
+                        # batch bar: one transaction for every ticked order
+                        select_all = st.checkbox("☑️ सभी चुनें", key=f"select_all_{rest_id}")
+                        picked = [o.id for o in movable if select_all or st.session_state.get(f"pick_{o.id}")]
+                        cols = st.columns(len(orders.RESTAURANT_MOVES))
+                        for col, to_status in zip(cols, orders.RESTAURANT_MOVES):
+                            with col:
+                                st.button(f"➡️ {to_status} ({len(picked)})", key=f"batch_{to_status}",
+                                          disabled=not picked, on_click=move, args=(picked, to_status))
+                    for order in rest_orders:
+                        next_status = orders.NEXT_STATUS.get(order.status)
+                        col1, col2 = st.columns([1, 12])
+                        with col1:
+                            if next_status in orders.RESTAURANT_MOVES:
+                                st.checkbox("चुनें", key=f"pick_{order.id}", label_visibility="collapsed")
+                        with col2:
+                            with st.expander(f"📦 ऑर्डर #{order.id} - ₹{order.total} - {order.status}"):
+                                show_items(lines.get(order.id), order.items_json)
+                                for step in history.get(order.id, []):
+                                    st.caption(f"🕐 {step.changed_at[:19]}: {step.from_status} → {step.to_status}")
+                                if next_status in orders.RESTAURANT_MOVES:
+                                    st.button(f"➡️ {next_status}", key=f"update_{order.id}",
+                                              on_click=move, args=([order.id], next_status))
+                    pager_buttons(f"rest_orders_{rest_id}", rest_orders[-1].id if rest_orders else None, has_more)
+
+                restaurant_orders()
+
+            elif panel == "sales":
+                col1, col2 = st.columns(2)
+                with col1:
+                    sales_range = st.radio("📅 अवधि", list(sales.RANGES), index=2, horizontal=True, key="sales_range")
+                with col2:
+                    allowed = sales.granularities(sales_range)
+                    granularity = st.selectbox(
+                        "📊 ग्रुप", allowed, key=f"sales_granularity_{sales_range}",
+                        index=allowed.index('day') if 'day' in allowed else 0,
+                        format_func={'hour': "घंटा", 'day': "दिन", 'week': "हफ्ता", 'month': "महीना"}.get
+                    )
+                snapshot_age()
+                points = sales.series(rest_id, sales_range, granularity)
+                if points:
+                    col1, col2 = st.columns(2)
+                    col1.metric("📦 ऑर्डर्स", sum(p.orders for p in points))
+                    col2.metric("💰 सेल्स", f"₹{sum(p.revenue for p in points):,.0f}")
+                    import plotly.express as px
+                    fig = px.bar(db.to_frame(points), x='bucket', y='revenue', title="सेल्स")
+                    st.plotly_chart(fig, use_container_width=True)
+                else:
+                    st.info("📉 इस अवधि में कोई सेल नहीं।")
+
+                st.subheader("🏆 बेस्टसेलर")
+                st.dataframe(reports.bestsellers(rest_id))
+
+            elif panel == "profile":
+                st.subheader("📍 रेस्टोरेंट लोकेशन (पिकअप)")
+                location_form(
+                    "restaurant_location",
+                    db.one("SELECT lat, lon FROM restaurants WHERE id=?", (rest_id,)),
+                    lambda lat, lon: db.execute("UPDATE restaurants SET lat=?, lon=? WHERE id=?", (lat, lon, rest_id))
+                )
+
+                with st.form("restaurant_city"):
+                    city = st.text_input("🏙️ शहर", value=db.scalar("SELECT city FROM restaurants WHERE id=?", (rest_id,)) or "")
+                    if st.form_submit_button("💾 शहर सेव करें"):
+                        db.execute("UPDATE restaurants SET city=? WHERE id=?", (city.strip() or None, rest_id))
+                        st.success("✅ शहर सेव हो गया!")
+
+        # CUSTOMER
+        elif role == 'customer':
+            if panel is None or panel == "home":
+                st.header("🔥 वेलकम होम!")
+
+                banners = ["50% ऑफ फर्स्ट ऑर्डर!", "फ्री डिलीवरी ऑन 3+ आइटम्स", "बिरयानी @ ₹99"]
+                selected_banner = random.choice(banners)
+                st.markdown(f"""
+                <div class="metric-card" style='text-align:center; font-size:1.4rem; color:#0f172a;'>
+                    🎉 {selected_banner} 🎉
+                </div>
+                """, unsafe_allow_html=True)
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    city = st.selectbox("🏙️ शहर", [trending.ALL_CITIES] + trending.trending.cities(),
+                                        format_func=lambda c: "सभी शहर" if c == trending.ALL_CITIES else c)
+                with col2:
+                    window = st.radio("⏱️ ट्रेंडिंग", list(trending.WINDOWS), index=1, horizontal=True)
+
+                st.subheader("🏪 पॉपुलर रेस्टोरेंट्स")
+                top_restaurants = trending.trending.top('restaurant', window, city, n=3)
+                if not top_restaurants:
+                    st.info("🏪 इस शहर में अभी कोई रेस्टोरेंट नहीं है।")
+                cols = st.columns(3)
+                for i, rest in enumerate(top_restaurants):
+                    with cols[i]:
+                        st.markdown(f"""
+                        <div class="metric-card">
+                            <h3 style='color:#0f172a;'>{rest.name}</h3>
+                            <p style='color:#0f172a;'>⭐ {rest.rating} | 📍 {rest.city or '-'}</p>
+                        </div>
+                        """, unsafe_allow_html=True)
+
+                st.subheader("🍕 ट्रेंडिंग फूड")
+                for food in trending.trending.top('dish', window, city, n=5):
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        st.write(f"**{food.name}** - {food.hindi_name or ''} - ₹{food.price}")
+                    with col2:
+                        if st.button("➕", key=f"add_{food.id}"):
+                            st.session_state.cart.append({
+                                'id': food.id, 'name': food.name, 'price': food.price,
+                                'qty': 1, 'restaurant_id': food.restaurant_id
+                            })
+                            st.rerun()
+
+            elif panel == "search":
+                @st.fragment
+                @profiler.keep_panel
+                def menu_search():
+                    query = st.text_input("🔍 डिश या रेस्टोरेंट खोजें", placeholder="biryani / बिरयानी / murga")
+                    if not query.strip():
+                        return
+                    found_restaurants = search.search_restaurants(query)
+                    if found_restaurants:
+                        st.caption("🏪 " + " | ".join(f"{r.name} ⭐ {r.rating}" for r in found_restaurants))
+                    dishes = search.search_menu(query)
+                    if not dishes:
+                        st.info("😕 कुछ नहीं मिला।")
+                    for dish in dishes:
+                        col1, col2 = st.columns([3, 1])
+                        with col1:
+                            st.write(f"**{dish.name}** - {dish.hindi_name or ''} - ₹{dish.price}")
+                            st.caption(f"🏪 {dish.restaurant}")
+                        with col2:
+                            if st.button("➕", key=f"search_add_{dish.id}"):
+                                st.session_state.cart.append({
+                                    'id': dish.id, 'name': dish.name, 'price': dish.price,
+                                    'qty': 1, 'restaurant_id': dish.restaurant_id
+                                })
+                                st.toast(f"🛒 {dish.name} कार्ट में जोड़ा गया")
+
+                menu_search()
+
+            elif panel == "cart":
+                if st.session_state.cart:
+                    st.subheader("🛒 शॉपिंग कार्ट")
+                    total = 0
+                    for item in st.session_state.cart:
+                        st.write(f"{item['name']} x{item['qty']} - ₹{item['price'] * item['qty']}")
+                        total += item['price'] * item['qty']
+
+                    st.markdown(f"**ग्रैंड टोटल: ₹{total}**")
+
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        if st.button("🗑️ क्लियर कार्ट"):
+                            st.session_state.cart = []
+                            st.rerun()
+                    with col2:
+                        if st.button("💳 चेकआउट"):
+                            # one order per restaurant; items added before carts knew their restaurant go to 1
+                            by_restaurant = {}
+                            for item in st.session_state.cart:
+                                by_restaurant.setdefault(item.get('restaurant_id', 1), []).append(item)
+                            tracking = [orders.place_order(user['id'], rid, items) for rid, items in by_restaurant.items()]
+                            st.success(f"✅ ऑर्डर प्लेस! ट्रैकिंग: {', '.join(tracking)}")
+                            st.session_state.cart = []
+                            st.rerun()
+                else:
+                    st.info("🛒 आपका कार्ट खाली है!")
+
+            elif panel == "history":
+                my_orders, has_more = order_page(f"history_{user['id']}", 'customer_id', user['id'])
+                st.dataframe(db.to_frame(my_orders))
+                pager_buttons(f"history_{user['id']}", my_orders[-1].id if my_orders else None, has_more)
+
+            elif panel == "profile":
+                st.subheader("📍 डिलीवरी लोकेशन")
+                location_form(
+                    "customer_location",
+                    db.one("SELECT lat, lon FROM users WHERE id=?", (user['id'],)),
+                    lambda lat, lon: dispatch.update_location(user['id'], lat, lon)
+                )
+
+        # DELIVERY
+        elif role == 'delivery':
+            if panel is None or panel == "available":
+                @live_fragment
+                def available_orders():
+                    def accept(order_id):
+                        # on_click: runs before the fragment re-renders, so the claimed order drops off the list
+                        st.session_state[f"claimed_{user['id']}"] = dispatch.claim_order(order_id, user['id'])
+
+                    claimed = st.session_state.pop(f"claimed_{user['id']}", None)
+                    if claimed:
+                        st.success("✅ एक्सेप्टेड!")
+                    elif claimed is not None:
+                        st.warning("⚠️ यह ऑर्डर किसी और ने ले लिया।")
+                    avail = dispatch.queue.offers(user['id'])
+                    if not avail:
+                        st.info("📦 अभी कोई ready ऑर्डर नहीं है।")
+                    lines = orders.items_for([o.id for o in avail])
+                    for order in avail:
+                        with st.expander(f"📦 ऑर्डर #{order.id} - ₹{order.total}"):
+                            show_items(lines.get(order.id), order.items_json)
+                            col1, col2 = st.columns(2)
+                            with col1:
+                                st.button("✅ एक्सेप्ट", key=f"accept_{order.id}", on_click=accept, args=(order.id,))
+                            with col2:
+                                st.caption("❌ रिजेक्ट (dummy)")
+
+                available_orders()
+
+                with st.expander("📍 मेरी लोकेशन"):
+                    location_form(
+                        "courier_location",
+                        db.one("SELECT lat, lon FROM users WHERE id=?", (user['id'],)),
+                        lambda lat, lon: dispatch.update_location(user['id'], lat, lon)
+                    )
+
+            elif panel == "active":
+                active = live_rows(f"del_active_{user['id']}", ('orders', 'users', 'restaurants'),
+                                   dispatch.COURIER_ACTIVE, (user['id'],))
+                if not active:
+                    st.info("🚚 कोई एक्टिव डिलीवरी नहीं है।")
+                # all of this courier's pickups and drops on one map, rebuilt only when the rows change
+                route_map = live_value(f"del_map_{user['id']}", ('orders', 'users', 'restaurants'),
+                                       lambda: maps.delivery_map(active))
+                if route_map:
+                    st.plotly_chart(route_map, use_container_width=True, key="del_map")
+                for order in active:
+                    if maps.located(order):
+                        km = float(dispatch.haversine_km(order.pickup_lat, order.pickup_lon, order.drop_lat, order.drop_lon))
+                        route = f"{km:.1f}km, ETA {dispatch.eta_minutes(km)}min"
+                    else:
+                        route = "लोकेशन उपलब्ध नहीं"
+                    st.markdown(f"""
+                    <div class="metric-card">
+                        <h3 style='color:#0f172a;'>📦 ऑर्डर #{order.id} - {order.cust_name}</h3>
+                        <p style='color:#0f172a;'>📱 9876******123 (मास्क्ड)</p>
+                        <p style='color:#0f172a;'>💰 ₹{order.total}</p>
+                        <p style='color:#0f172a;'>📍 रेस्टोरेंट → कस्टमर ({route})</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        if st.button("📞 कॉल", key=f"call_{order.id}"):
+                            st.info("📞 कॉल सिमुलेशन - 9876******123")
+                    with col2:
+                        if st.button("✅ डिलीवर", key=f"delivered_{order.id}"):
+                            orders.transition([order.id], 'delivered', delivery_id=user['id'])
+                            st.rerun()
+
+            elif panel == "earnings":
+                snapshot_age()
+                earnings = orders.courier_earnings(user['id'])
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.metric("🚚 कुल कमाई", f"₹{int(earnings.earnings)}")
+                with col2:
+                    st.metric("📦 टोटल डिलीवरी", earnings.deliveries)
+
+# Footer
+st.markdown("---")
+st.markdown(
+    "<p style='text-align:center; color:rgba(248,250,252,0.8);'>🍕 Foodees - Sikariganj का तेज डिलीवरी ऐप | Made with ❤️ by Foodees</p>",
+    unsafe_allow_html=True
+)
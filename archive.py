@@ -0,0 +1,229 @@
+"""Cold storage for old orders: a second SQLite file next to the live one.
+
+``python manage.py archive-orders`` (run it from cron) moves delivered orders
+older than ARCHIVE_AFTER_DAYS, with their order_items and status history, to
+the archive in batches.  Each batch is first copied (INSERT OR REPLACE, so a
+rerun is harmless) and committed in the archive, then deleted from the live
+tables in a second transaction; a crash in between leaves the batch in both
+files and the next run finishes it.  Readers drop archive rows whose id is
+still live, and aggregates stop at archive_max_id (only moved after the
+delete), so that window never counts an order twice.
+
+The live delete runs with the 'archiving' maintenance flag set, which stops
+the rollup triggers from subtracting the orders from daily/monthly stats and
+the sales buckets: the dashboards and the sales panel keep the whole history
+without ever reading the archive.  entity_counts keeps counting the live
+table (the admin grid totals match their rows); archived orders are counted
+under 'archived:<status>' and per courier in courier_archived.
+
+Order lists only ATTACH the archive when the page they are asked for reaches
+below the newest archived id.
+"""
+import contextlib
+import os
+import threading
+
+import db
+
+ARCHIVE_AFTER_DAYS = int(os.environ.get('FOODTIGER_ARCHIVE_DAYS', '90'))
+BATCH = 5000
+
+_local = threading.local()
+
+ORDER_COLUMNS = ('id, customer_id, restaurant_id, delivery_id, items_json, total, status, tracking_id, created_at, '
+                 'drop_lat, drop_lon')
+ITEM_COLUMNS = 'id, order_id, restaurant_id, menu_item_id, name, qty, price'
+HISTORY_COLUMNS = 'id, order_id, from_status, to_status, changed_at'
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS archive.orders (
+        id INTEGER PRIMARY KEY,
+        customer_id INTEGER,
+        restaurant_id INTEGER,
+        delivery_id INTEGER,
+        items_json TEXT,
+        total REAL,
+        status TEXT,
+        tracking_id TEXT,
+        created_at DATETIME,
+        drop_lat REAL,
+        drop_lon REAL
+    )""",
+    "CREATE INDEX IF NOT EXISTS archive.idx_archive_orders_customer ON orders(customer_id)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_archive_orders_restaurant ON orders(restaurant_id)",
+    """CREATE TABLE IF NOT EXISTS archive.order_items (
+        id INTEGER PRIMARY KEY,
+        order_id INTEGER NOT NULL,
+        restaurant_id INTEGER,
+        menu_item_id INTEGER,
+        name TEXT,
+        qty INTEGER NOT NULL,
+        price REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS archive.idx_archive_order_items_order ON order_items(order_id)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_archive_order_items_restaurant "
+    "ON order_items(restaurant_id, menu_item_id, qty, price)",
+    """CREATE TABLE IF NOT EXISTS archive.order_status_history (
+        id INTEGER PRIMARY KEY,
+        order_id INTEGER NOT NULL,
+        from_status TEXT,
+        to_status TEXT,
+        changed_at TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS archive.idx_archive_status_history_order ON order_status_history(order_id)",
+]
+
+
+def archive_path():
+    return os.environ.get('FOODTIGER_ARCHIVE') or os.path.splitext(db.DB_PATH)[0] + '-archive.db'
+
+
+def max_id():
+    """Newest archived order id; 0 while nothing is archived."""
+    return db.scalar("SELECT value FROM job_state WHERE name='archive_max_id'", default=0)
+
+
+@contextlib.contextmanager
+def attached():
+    """This thread's reader connection with the archive attached as ``archive``.
+
+    db.rows / db.read_df inside the block reuse the same connection, so their
+    SQL can name archive.orders etc.  Nested blocks share the outer ATTACH.
+    """
+    with db.reader() as conn:
+        if getattr(_local, 'depth', 0):
+            yield conn
+            return
+        conn.execute("ATTACH DATABASE ? AS archive", (f"file:{archive_path()}?mode=ro",))
+        _local.depth = 1
+        try:
+            yield conn
+        finally:
+            _local.depth = 0
+            conn.execute("DETACH DATABASE archive")
+
+
+def transaction(fn):
+    """db.transaction with the archive attached (created if missing) on the writer connection."""
+    with db.writer() as conn:
+        conn.execute("ATTACH DATABASE ? AS archive", (archive_path(),))
+        try:
+            return db.transaction(fn)
+        finally:
+            conn.execute("DETACH DATABASE archive")
+
+
+def archive_orders(older_than_days=ARCHIVE_AFTER_DAYS, batch=BATCH, progress=None):
+    """Move delivered orders older than older_than_days into the archive; returns how many moved.
+
+    Safe to stop and rerun at any point.
+    """
+    if older_than_days < 1:
+        raise ValueError("older_than_days must be at least 1")
+    moved = 0
+    with db.writer() as conn:
+        conn.execute("ATTACH DATABASE ? AS archive", (archive_path(),))
+        try:
+            conn.execute("PRAGMA archive.journal_mode=WAL")
+            db.transaction(_create_schema)
+            while True:
+                ids = [row[0] for row in conn.execute(
+                    "SELECT id FROM main.orders WHERE status='delivered' AND created_at < DATETIME('now', ?) "
+                    "ORDER BY id LIMIT ?", (f'-{older_than_days} days', batch)
+                )]
+                if not ids:
+                    return moved
+                db.with_retry(lambda: _copy(conn, ids))
+                kept = db.transaction(lambda c: _delete(c, ids))
+                if len(kept) < len(ids):
+                    db.with_retry(lambda: _drop_copies(conn, sorted(set(ids) - set(kept))))
+                moved += len(kept)
+                if progress:
+                    progress(moved)
+        finally:
+            conn.execute("DETACH DATABASE archive")
+
+
+def _create_schema(conn):
+    for sql in SCHEMA:
+        conn.execute(sql)
+
+
+def _copy(conn, ids):
+    # deferred BEGIN: only the archive file is written, live writers are not held up
+    marks = ','.join('?' * len(ids))
+    conn.execute("BEGIN")
+    try:
+        conn.execute(f"INSERT OR REPLACE INTO archive.orders ({ORDER_COLUMNS}) "
+                     f"SELECT {ORDER_COLUMNS} FROM main.orders WHERE id IN ({marks})", ids)
+        conn.execute(f"INSERT OR REPLACE INTO archive.order_items ({ITEM_COLUMNS}) "
+                     f"SELECT {ITEM_COLUMNS} FROM main.order_items WHERE order_id IN ({marks})", ids)
+        conn.execute(f"INSERT OR REPLACE INTO archive.order_status_history ({HISTORY_COLUMNS}) "
+                     f"SELECT {HISTORY_COLUMNS} FROM main.order_status_history WHERE order_id IN ({marks})", ids)
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def _delete(conn, ids):
+    # only what the archive really holds, and only if it is still delivered
+    marks = ','.join('?' * len(ids))
+    ids = [row[0] for row in conn.execute(
+        f"SELECT o.id FROM main.orders o JOIN archive.orders a ON a.id = o.id "
+        f"WHERE o.id IN ({marks}) AND o.status = 'delivered'", ids
+    )]
+    if not ids:
+        return ids
+    marks = ','.join('?' * len(ids))
+    conn.execute(f"""
+        INSERT INTO courier_archived (delivery_id, deliveries, total)
+        SELECT delivery_id, COUNT(*), COALESCE(SUM(total), 0) FROM main.orders
+        WHERE id IN ({marks}) AND delivery_id IS NOT NULL GROUP BY delivery_id
+        ON CONFLICT (delivery_id) DO UPDATE
+        SET deliveries = deliveries + excluded.deliveries, total = total + excluded.total
+    """, ids)
+    conn.execute("""
+        INSERT INTO entity_counts (name, value) VALUES ('archived:delivered', ?)
+        ON CONFLICT (name) DO UPDATE SET value = value + excluded.value
+    """, (len(ids),))
+    conn.execute("INSERT INTO maintenance_flags (name) VALUES ('archiving')")
+    conn.execute(f"DELETE FROM main.order_items WHERE order_id IN ({marks})", ids)
+    conn.execute(f"DELETE FROM main.order_status_history WHERE order_id IN ({marks})", ids)
+    conn.execute(f"DELETE FROM main.orders WHERE id IN ({marks})", ids)
+    conn.execute("DELETE FROM maintenance_flags WHERE name = 'archiving'")
+    conn.execute("""
+        INSERT INTO job_state (name, value) VALUES ('archive_max_id', ?)
+        ON CONFLICT (name) DO UPDATE SET value = MAX(value, excluded.value)
+    """, (max(ids),))
+    return ids
+
+
+def _drop_copies(conn, ids):
+    # copied, but deleted or changed in the live file before they could move
+    marks = ','.join('?' * len(ids))
+    conn.execute("BEGIN")
+    try:
+        conn.execute(f"DELETE FROM archive.order_items WHERE order_id IN ({marks})", ids)
+        conn.execute(f"DELETE FROM archive.order_status_history WHERE order_id IN ({marks})", ids)
+        conn.execute(f"DELETE FROM archive.orders WHERE id IN ({marks})", ids)
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def page(owner_column, owner_id, status=None, before=None, limit=20):
+    """Archived orders for orders.page(): same columns, newest first, skipping ids still live."""
+    if status not in (None, 'delivered'):
+        return []
+    where, params = [f"a.{owner_column}=?"], [owner_id]
+    if before is not None:
+        where.append("a.id < ?")
+        params.append(before)
+    with attached():
+        return db.rows(
+            f"SELECT a.* FROM archive.orders a WHERE {' AND '.join(where)} "
+            f"AND NOT EXISTS (SELECT 1 FROM main.orders o WHERE o.id = a.id) ORDER BY a.id DESC LIMIT ?",
+            (*params, limit)
+        )
@@ -0,0 +1,63 @@
+"""Static assets: the app stylesheet.
+
+Streamlit serves ./static at app/static/ (enableStaticServing in
+.streamlit/config.toml).  app.py links the stylesheets into <head> once per
+session instead of sending an inline <style> block on every rerun; the URLs
+carry a ?v=<content hash>.  Streamlit sends them with Last-Modified and no
+Cache-Control, which browsers cache heuristically; behind a proxy, app/static/
+can be marked immutable since a changed file gets a new URL.
+
+app.css names Poppins and Noto Sans Devanagari where they are installed and
+falls back to the platform's UI and Devanagari fonts; nothing is fetched
+from outside.
+"""
+import functools
+import hashlib
+import json
+import os
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(HERE, 'static')
+URL_PREFIX = 'app/static/'
+STYLESHEETS = ('app.css',)  # in cascade order
+
+HEAD_SCRIPT = """<script>
+(function (links) {
+    links.forEach(function (attrs) {
+        if (!document.head.querySelector('link[href="' + attrs.href + '"]')) {
+            document.head.appendChild(Object.assign(document.createElement('link'), attrs));
+        }
+    });
+})(%s);
+</script>"""
+
+
+@functools.lru_cache(maxsize=64)
+def _digest(path, mtime_ns):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def version(path):
+    """Short content hash of a file, recomputed only when its mtime changes."""
+    return _digest(path, os.stat(path).st_mtime_ns)
+
+
+def url(name):
+    """Versioned URL of a file under static/, relative to the app's page."""
+    return f"{URL_PREFIX}{name}?v={version(os.path.join(STATIC_DIR, name))}"
+
+
+def head_links():
+    """<link> attributes for the stylesheets that exist, in cascade order."""
+    return [{'rel': 'stylesheet', 'href': url(name)}
+            for name in STYLESHEETS if os.path.exists(os.path.join(STATIC_DIR, name))]
+
+
+def head_html():
+    """Script for st.html that appends the links to <head> unless they are already there.
+
+    The links outlive the element that added them, so it only has to be sent
+    once per session.
+    """
+    return HEAD_SCRIPT % json.dumps(head_links())
@@ -0,0 +1,142 @@
+"""Password hashing and login sessions.
+
+Passwords are stored as ``scrypt$n$r$p$salt$hash``.  Rows still holding a
+legacy unsalted MD5 hex digest are verified the old way once and rewritten
+as scrypt on that successful login.  Hashing is deliberately slow, so it
+runs in a small fixed pool: a burst of logins queues there instead of
+taking every core from the sessions that are only rendering.
+
+A login session is a random token kept in the browser's SESSION_COOKIE
+(never in the URL, where history, Referer headers and proxy logs would keep
+it).  The sessions table stores only its SHA-256, with the user and the
+expiry, so a reload on any worker, or after a restart, resumes it with one
+primary-key read, and logging out deletes the row everywhere at once.
+Expired rows never resume; ``python manage.py purge-sessions`` deletes them
+off the login path.
+
+The token is random rather than signed: it is looked up anyway, which is
+what makes revoking it work, so a signature would only add a secret to
+manage.  Streamlit has no way to set response headers, so app.py stores the
+cookie from a script and it cannot be HttpOnly; script running in the page
+could read it.  SameSite=Strict, Secure over HTTPS, a bounded lifetime and
+the server keeping only the hash limit what a stolen token is worth.
+"""
+import base64
+import concurrent.futures
+import hashlib
+import hmac
+import os
+import secrets
+import time
+
+import db
+
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+HASH_WORKERS = min(4, os.cpu_count() or 1)
+
+SESSION_SECONDS = 7 * 24 * 3600
+SESSION_COOKIE = 'foodtiger_session'
+
+USER_BY_PHONE = "SELECT * FROM users WHERE phone=? AND status=1"
+SESSION_USER = ("SELECT u.* FROM sessions s JOIN users u ON u.id = s.user_id "
+                "WHERE s.token_hash=? AND s.expires > ? AND u.status=1")
+# the restaurant a logged-in owner works on
+OWNER_RESTAURANT = "SELECT id, name FROM restaurants WHERE owner_id=? AND is_approved=1"
+
+_pool = concurrent.futures.ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix='auth-hash')
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + 1024 * 1024)
+
+
+def hash_password(password):
+    """A fresh salted scrypt hash for storing in users.password."""
+    salt = os.urandom(16)
+    digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+
+
+def verify_password(password, stored):
+    """(matches, needs_rehash) for a stored scrypt or legacy MD5 hash."""
+    if not stored:
+        return False, False
+    if not stored.startswith('scrypt$'):
+        legacy = hashlib.md5(password.encode()).hexdigest()
+        return hmac.compare_digest(legacy, stored), True
+    try:
+        _, n, r, p, salt, digest = stored.split('$')
+        n, r, p = int(n), int(r), int(p)
+        matches = hmac.compare_digest(_scrypt(password, _unb64(salt), n, r, p), _unb64(digest))
+    except ValueError:
+        return False, False
+    return matches, (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+
+_dummy_hash = None
+
+
+def login(phone, password):
+    """The active user with this phone and password as a dict, or None.
+
+    Unknown phones still pay for one hash so they take as long as a wrong password.
+    """
+    global _dummy_hash
+    found = db.one(USER_BY_PHONE, (phone,))
+    if found is None:
+        if _dummy_hash is None:
+            _dummy_hash = hash_password(os.urandom(8).hex())
+        _pool.submit(verify_password, password, _dummy_hash).result()
+        return None
+    matches, stale = _pool.submit(verify_password, password, found.password).result()
+    if not matches:
+        return None
+    user = found._asdict()
+    if stale:
+        upgraded = _pool.submit(hash_password, password).result()
+        # only if nobody changed the password meanwhile
+        if db.execute("UPDATE users SET password=? WHERE id=? AND password=?",
+                      (upgraded, user['id'], found.password)):
+            user['password'] = upgraded
+    return user
+
+
+def _token_hash(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_token(user, ttl=SESSION_SECONDS):
+    """A new session token for a user dict returned by login()."""
+    token = secrets.token_urlsafe(32)
+    db.execute("INSERT INTO sessions (token_hash, user_id, expires) VALUES (?, ?, ?)",
+               (_token_hash(token), user['id'], int(time.time()) + ttl))
+    return token
+
+
+def resume(token):
+    """The user dict for a live session token, or None when it is unknown, expired or revoked."""
+    if not token or not isinstance(token, str):
+        return None
+    found = db.one(SESSION_USER, (_token_hash(token), int(time.time())))
+    return found._asdict() if found else None
+
+
+def revoke(token):
+    """Log a token out, for every worker."""
+    if token and isinstance(token, str):
+        db.execute("DELETE FROM sessions WHERE token_hash=?", (_token_hash(token),))
+
+
+def purge_sessions():
+    """Delete expired sessions; returns how many."""
+    return db.execute("DELETE FROM sessions WHERE expires < ?", (int(time.time()),))
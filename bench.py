@@ -0,0 +1,1342 @@
+"""Benchmarks for the data layer and panels.
+
+Run one scenario at a time, e.g. ``python bench.py pool``.  Every scenario
+works on a throwaway database in a temp directory, never on foodtiger.db.
+"""
+import argparse
+import ast
+import hashlib
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import analytics
+import archive
+import assets
+import auth
+import db
+import dispatch
+import grids
+import images
+import maps
+import menu_import
+import migrations
+import orders
+import profiler
+import reports
+import sales
+import search
+import trending
+
+
+def fresh_db():
+    """Point the db module at an empty temp database with the schema applied."""
+    db.close_all()
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(prefix='foodtiger-bench-'), 'bench.db')
+    db.transaction(migrations.migrate)
+    return db.DB_PATH
+
+
+def fill_orders(n, restaurants=50, customers=1000, batch=10000, open_days=None):
+    """n orders over the last year; with open_days, in id order and delivered once older than that."""
+    statuses = ['pending', 'preparing', 'ready', 'delivered']
+
+    def insert(conn, rows):
+        conn.executemany(
+            "INSERT INTO orders (customer_id, restaurant_id, delivery_id, items_json, total, status, tracking_id, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now', ?))",
+            rows
+        )
+
+    done = 0
+    while done < n:
+        rows = []
+        for i in range(done, done + min(batch, n - done)):
+            # with open_days, ids grow with time as they do in the app
+            age = (n - i) * 365 * 24 * 60 // n if open_days is not None else random.randint(0, 365 * 24 * 60)
+            status = 'delivered' if open_days is not None and age > open_days * 24 * 60 else random.choice(statuses)
+            rows.append((
+                random.randint(1, customers), random.randint(1, restaurants),
+                random.randint(1, 100) if status == 'delivered' else None,
+                '[]', round(random.uniform(100, 900), 2), status,
+                f'TRACK{random.randint(1000, 9999)}', f'-{age} minutes'
+            ))
+        db.transaction(lambda conn: insert(conn, rows))
+        done += len(rows)
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def run_threads(n, target, duration):
+    stop = time.perf_counter() + duration
+    counts = [0] * n
+
+    def worker(i):
+        while time.perf_counter() < stop:
+            target(i)
+            counts[i] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(counts)
+
+
+def bench_pool(args):
+    fresh_db()
+    fill_orders(20000)
+
+    def read(i):
+        with db.reader() as conn:
+            conn.execute("SELECT COUNT(*), SUM(total) FROM orders WHERE restaurant_id=?",
+                         (random.randint(1, 50),)).fetchone()
+
+    def write(i):
+        db.execute("UPDATE orders SET status='ready' WHERE id=?", (random.randint(1, 20000),))
+
+    print(f"{'sessions':>8} {'reads/s':>10} {'writes/s':>10}")
+    for sessions in (1, 2, 4, 8, 16, 32):
+        reads = run_threads(sessions, read, args.duration) / args.duration
+        writes = run_threads(sessions, write, args.duration) / args.duration
+        print(f"{sessions:>8} {reads:>10.0f} {writes:>10.0f}")
+
+
+def bench_plans(args):
+    """Regression check: exits non-zero if a hot query stops using an index."""
+    fresh_db()
+    fill_orders(5000)
+    with db.writer() as conn:
+        conn.execute("ANALYZE")
+        problems = migrations.plan_problems(conn)
+        for name in migrations.hot_queries():
+            print(f"{'FAIL' if name in problems else 'ok':>4}  {name}")
+            if name in problems:
+                for step in problems[name]:
+                    print(f"        {step}")
+    if problems:
+        raise SystemExit(1)
+
+
+LEGACY_DASHBOARD = [
+    "SELECT COUNT(*) FROM orders WHERE DATE(created_at)=DATE('now')",
+    "SELECT COUNT(*) FROM orders WHERE strftime('%Y-%m', created_at)=strftime('%Y-%m', 'now')",
+    "SELECT COUNT(*) FROM restaurants WHERE is_approved=1",
+    "SELECT COUNT(*) FROM users WHERE role='customer'",
+    "SELECT status, COUNT(*) as count FROM orders GROUP BY status",
+    "SELECT strftime('%Y-%m', created_at) as month, SUM(total) as revenue FROM orders GROUP BY month ORDER BY month",
+]
+
+ROLLUP_DASHBOARD = [
+    "SELECT (SELECT COALESCE(SUM(orders), 0) FROM daily_order_stats WHERE day = DATE('now')), "
+    "(SELECT COALESCE(SUM(orders), 0) FROM monthly_order_stats WHERE month = strftime('%Y-%m', 'now'))",
+    "SELECT name, value FROM entity_counts WHERE name IN ('restaurants:approved', 'role:customer')",
+    "SELECT substr(name, 8) as status, value as count FROM entity_counts "
+    "WHERE name > 'orders:' AND name < 'orders;' AND value > 0",
+    "SELECT month, revenue FROM monthly_order_stats WHERE orders > 0 ORDER BY month",
+]
+
+
+def bench_dashboard(args):
+    sizes = [int(float(s)) for s in args.sizes.split(',')]
+    print(f"{'orders':>10} {'legacy ms':>10} {'rollup ms':>10}")
+    for size in sizes:
+        fresh_db()
+        fill_orders(size)
+        with db.reader() as conn:
+            legacy = timed(lambda: [conn.execute(sql).fetchall() for sql in LEGACY_DASHBOARD], repeat=3)
+            rollup = timed(lambda: [conn.execute(sql).fetchall() for sql in ROLLUP_DASHBOARD])
+        print(f"{size:>10} {legacy * 1000:>10.1f} {rollup * 1000:>10.2f}")
+
+
+IMPORT_PROBE = """
+import time
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+"""
+
+FIRST_RENDER_PROBE = """
+import time
+t = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file('app.py', default_timeout=60).run()
+assert not at.exception, at.exception
+print(time.perf_counter() - t)
+"""
+
+
+def probe(code, env=None):
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+    if out.returncode:
+        return None
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def app_imports():
+    """The modules app.py imports at the top, in order."""
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py'), encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            modules.append(node.module)
+    return modules
+
+
+def bench_coldstart(args):
+    """Fresh-interpreter import times (the heavy libraries, then each of app.py's own
+    imports and all of them together) and time to first render of the login screen."""
+    env = dict(os.environ, FOODTIGER_DB=fresh_db())
+    here = os.path.dirname(os.path.abspath(__file__))
+    modules = app_imports()
+    own = [m for m in modules if os.path.exists(os.path.join(here, f'{m}.py'))]
+    heavy = ['pandas', 'plotly.express', 'plotly.graph_objects', 'PIL.Image', 'pyarrow']
+    probes = [(f'import {m}', m) for m in heavy + [m for m in modules if m not in heavy]]
+    probes += [("app.py's own modules", ', '.join(own)), ('all app.py imports', ', '.join(modules))]
+    for label, module in probes:
+        took = probe(IMPORT_PROBE.format(module=module), env)
+        print(f"{label:<29} {'n/a' if took is None else f'{took * 1000:8.1f} ms'}")
+    took = probe(FIRST_RENDER_PROBE, env)
+    print(f"{'first render (login)':<29} {'n/a' if took is None else f'{took * 1000:8.1f} ms'}")
+
+
+RERUN_LOOKUPS = [
+    ('login', "SELECT * FROM users WHERE phone=? AND status=1", ('9876543212',)),
+    ('restaurant', "SELECT id, name FROM restaurants WHERE owner_id=? AND is_approved=1", (2,)),
+    ('earnings', "SELECT COUNT(*) as deliveries, COALESCE(SUM(total*0.2), 0) as earnings "
+                 "FROM orders WHERE delivery_id=? AND status='delivered'", (4,)),
+    ('available', "SELECT * FROM orders WHERE delivery_id IS NULL AND status='ready' ORDER BY id DESC LIMIT 10", ()),
+]
+
+
+def bench_profiler(args):
+    """Per-call cost of the profiler hooks on the hottest small lookups, off vs. on."""
+    fresh_db()
+    db.transaction(db.seed_demo)
+    fill_orders(10000)
+    calls = 20000
+
+    def lookups():
+        for i in range(calls):
+            db.one("SELECT id, name FROM restaurants WHERE owner_id=? AND is_approved=1", (2,))
+
+    def raw():
+        # the same statement straight on a pooled connection, no db.one wrapper
+        with db.reader() as conn:
+            for i in range(calls):
+                conn.execute("SELECT id, name FROM restaurants WHERE owner_id=? AND is_approved=1", (2,)).fetchone()
+
+    base = timed(raw, repeat=3)
+    print(f"{'raw sqlite3':<14} {base / calls * 1e6:>7.2f} us/call")
+    for state in (False, True):
+        profiler.enabled = state
+        took = timed(lookups, repeat=3)
+        print(f"{'profiler ' + ('on' if state else 'off'):<14} {took / calls * 1e6:>7.2f} us/call")
+    profiler.enabled = False
+    print(f"{len(profiler.queries)} calls in the ring, {len(profiler.top_queries())} distinct statements")
+
+
+def bench_queries(args):
+    """Per-rerun overhead of the small lookups: DataFrame vs. row API."""
+    fresh_db()
+    db.transaction(db.seed_demo)
+    fill_orders(10000)
+    print(f"{'lookup':<12} {'read_df us':>11} {'rows us':>9}")
+    for name, sql, params in RERUN_LOOKUPS:
+        n = 200
+        frame = timed(lambda: [db.read_df(sql, params) for _ in range(n)], repeat=3) / n
+        fetched = timed(lambda: [db.rows(sql, params) for _ in range(n)], repeat=3) / n
+        print(f"{name:<12} {frame * 1e6:>11.0f} {fetched * 1e6:>9.0f}")
+
+
+def bench_images(args):
+    """Render a 200-item menu: full-size decode+encode vs. cached thumbnails."""
+    import io
+    from PIL import Image
+
+    root = tempfile.mkdtemp(prefix='foodtiger-images-')
+    images.IMAGE_DIR = root
+    images.THUMB_DIR = os.path.join(root, 'thumbs')
+    paths = []
+    for i in range(200):
+        img = Image.new('RGB', (2400, 1800), (i, 255 - i, (i * 7) % 255))
+        buf = io.BytesIO()
+        img.save(buf, 'JPEG', quality=90)
+        t = time.perf_counter()
+        paths.append(images.store_image(buf.getvalue()))
+        if i == 0:
+            print(f"upload + thumbnails: {(time.perf_counter() - t) * 1000:.1f} ms per image")
+
+    def legacy():
+        # what st.image(Image.open(path), width=150) costs: decode + re-encode full size
+        for path in paths:
+            out = io.BytesIO()
+            Image.open(path).save(out, 'JPEG')
+
+    def thumbs():
+        for path in paths:
+            images.thumbnail(path)
+
+    print(f"legacy full-size render : {timed(legacy, repeat=1) * 1000:8.1f} ms")
+    images._cache = images.ByteLRU(images.CACHE_BYTES)
+    print(f"thumbnails, cold cache  : {timed(thumbs, repeat=1) * 1000:8.1f} ms")
+    print(f"thumbnails, warm cache  : {timed(thumbs) * 1000:8.2f} ms")
+    print(f"cache size              : {images._cache.size / 1024:8.0f} KiB")
+
+
+def bench_import(args):
+    """Menu onboarding throughput: one insert + commit per item vs. the bulk importer.
+
+    The per-item numbers leave out the full script rerun the form does after
+    every item, so they flatter the old flow.  With photos both sides are
+    bound by thumbnail encoding; the importer's pool scales with cores.
+    """
+    import io
+    import zipfile
+    from PIL import Image
+
+    print(f"{'items':>6} {'photos':>7} {'per-item rows/s':>16} {'bulk rows/s':>12}")
+    for items, photos in ((300, 0), (3000, 0), (300, 300), (3000, 300)):
+        fresh_db()
+        root = tempfile.mkdtemp(prefix='foodtiger-images-')
+        images.IMAGE_DIR = root
+        images.THUMB_DIR = os.path.join(root, 'thumbs')
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zf:
+            for i in range(photos):
+                buf = io.BytesIO()
+                Image.new('RGB', (1600, 1200), (i % 255, 99, (i * 7) % 255)).save(buf, 'JPEG', quality=85)
+                zf.writestr(f'dish{i}.jpg', buf.getvalue())
+        lines = ['name,hindi_name,price,is_available,image']
+        lines += [f"Dish {i},व्यंजन {i},{100 + i % 400},1,{f'dish{i % photos}.jpg' if photos else ''}" for i in range(items)]
+        table = '\n'.join(lines).encode()
+
+        photo_bytes = menu_import.read_archive(archive.getvalue())
+        t = time.perf_counter()
+        for i in range(items):
+            # the add_item form: save the photo, insert, commit (plus a full rerun, not counted)
+            path = images.store_image(photo_bytes[f'dish{i % photos}.jpg']) if photos else None
+            db.execute(
+                "INSERT INTO menu_items (restaurant_id, name, hindi_name, price, image_path, is_available) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (1, f'Old {i}', None, 100, path, 1)
+            )
+        legacy = items / (time.perf_counter() - t)
+
+        # new restaurant and cold photo directories, so photos are processed again
+        images.IMAGE_DIR = os.path.join(root, 'bulk')
+        images.THUMB_DIR = os.path.join(root, 'bulk', 'thumbs')
+        t = time.perf_counter()
+        result = menu_import.import_menu(2, table, 'menu.csv', archive.getvalue() if photos else None)
+        bulk = result.inserted / (time.perf_counter() - t)
+        assert not result.errors, result.errors[:3]
+        print(f"{items:>6} {photos:>7} {legacy:>16.0f} {bulk:>12.0f}")
+
+
+def count_queries():
+    """Install a trace callback on new connections; returns the live counter list."""
+    counter = [0]
+
+    def trace(sql):
+        # trigger bodies and FTS5 shadow-table reads are traced too ('-- ...' or 'main'.'x');
+        # only statements the app itself runs count
+        if not sql.startswith('--') and "'main'." not in sql:
+            counter[0] += 1
+
+    def hook(conn):
+        conn.set_trace_callback(trace)
+
+    db.close_all()
+    db.CONNECT_HOOKS.append(hook)
+    return counter
+
+
+def bench_idle(args):
+    """Queries and CPU per minute for one idle session watching the restaurant orders panel."""
+    fresh_db()
+    db.transaction(db.seed_demo)
+    fill_orders(2000, restaurants=2)
+    counter = count_queries()
+    ticks = 12  # one refresh every 5 s
+
+    def legacy_tick():
+        # old auto_refresh: full script rerun -> restaurant lookup + every order of the restaurant
+        db.one("SELECT id, name FROM restaurants WHERE owner_id=? AND is_approved=1", (2,))
+        db.rows("SELECT * FROM orders WHERE restaurant_id=? ORDER BY id DESC", (1,))
+
+    cache = {}
+
+    def live_tick():
+        # fragment rerun: version probe, rows only when orders changed
+        version = db.table_version('orders')
+        if cache.get('v') != version:
+            cache['v'] = version
+            cache['rows'] = db.rows("SELECT * FROM orders WHERE restaurant_id=? ORDER BY id DESC", (1,))
+
+    for name, tick in (('legacy rerun', legacy_tick), ('live fragment', live_tick)):
+        counter[0] = 0
+        cpu = time.process_time()
+        for _ in range(ticks):
+            tick()
+        cpu = time.process_time() - cpu
+        print(f"{name:<14} {counter[0]:>4} queries/min {cpu * 1000:>8.1f} ms CPU/min")
+    db.CONNECT_HOOKS.clear()
+
+
+def bench_checkout(args):
+    """Checkouts per second from 1, 10 and 100 sessions: a commit per checkout vs. group commit."""
+    import json
+    cart = [{'id': 1, 'name': 'Chicken Biryani', 'price': 250, 'qty': 2}, {'id': 2, 'name': 'Veg Biryani', 'price': 180, 'qty': 1}]
+
+    def legacy(i):
+        # the old place_order: its own BEGIN IMMEDIATE ... COMMIT per checkout
+        def write(conn):
+            order_id = conn.execute(
+                "INSERT INTO orders (customer_id, restaurant_id, items_json, total, tracking_id, drop_lat, drop_lon) "
+                "SELECT ?, ?, ?, ?, ?, lat, lon FROM users WHERE id=?",
+                (3, 1, json.dumps(cart), 680, 'T', 3)
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO order_items (order_id, restaurant_id, menu_item_id, name, qty, price) VALUES (?, ?, ?, ?, ?, ?)",
+                [(order_id, 1, item['id'], item['name'], item['qty'], item['price']) for item in cart]
+            )
+        db.transaction(write)
+
+    def grouped(i):
+        orders.place_order(3, 1, cart)
+
+    print(f"{'synchronous':>11} {'sessions':>8} {'commit each/s':>14} {'group commit/s':>15}")
+    for sync in ('NORMAL', 'FULL'):
+        db.CONNECT_HOOKS.append(lambda conn, sync=sync: conn.execute(f"PRAGMA synchronous={sync}"))
+        fresh_db()
+        db.transaction(db.seed_demo)
+        for sessions in (1, 10, 100):
+            each = run_threads(sessions, legacy, args.duration) / args.duration
+            group = run_threads(sessions, grouped, args.duration) / args.duration
+            print(f"{sync:>11} {sessions:>8} {each:>14.0f} {group:>15.0f}")
+        db.CONNECT_HOOKS.clear()
+
+
+def bench_claims(args):
+    """Hundreds of couriers claiming concurrently; checks exactly-once assignment."""
+    fresh_db()
+    orders = args.orders
+    db.transaction(lambda conn: conn.executemany(
+        "INSERT INTO orders (customer_id, restaurant_id, items_json, total, status, tracking_id) "
+        "VALUES (1, 1, '[]', 100, 'ready', ?)",
+        [(f'T{i}',) for i in range(orders)]
+    ))
+    queue = dispatch.DispatchQueue()
+    dispatch.queue = queue
+    wins, losses = {}, [0]
+    lock = threading.Lock()
+
+    def courier(courier_id):
+        while True:
+            offered = queue.offers(courier_id)
+            if not offered:
+                return
+            for order in offered:
+                if dispatch.claim_order(order.id, courier_id):
+                    with lock:
+                        wins.setdefault(order.id, []).append(courier_id)
+                else:
+                    with lock:
+                        losses[0] += 1
+
+    threads = [threading.Thread(target=courier, args=(c,)) for c in range(1, args.couriers + 1)]
+    t = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    took = time.perf_counter() - t
+
+    double = [oid for oid, who in wins.items() if len(who) > 1]
+    assigned = db.scalar("SELECT COUNT(*) FROM orders WHERE delivery_id IS NOT NULL")
+    print(f"couriers={args.couriers} orders={orders}")
+    print(f"claims won {len(wins)}, lost races {losses[0]}, double-claimed {len(double)}, assigned in db {assigned}")
+    print(f"{len(wins) / took:.0f} claims/s")
+    if double or len(wins) != orders or assigned != orders:
+        raise SystemExit("exactly-once violated")
+
+
+def bench_dispatch(args):
+    """Synthetic city: match every ready order to the nearest idle courier."""
+    import numpy as np
+    rng = np.random.default_rng(7)
+    lat0, lon0 = dispatch.CITY_CENTER
+    print(f"{'couriers':>9} {'orders':>7} {'match ms':>9} {'matched':>8} {'avg km':>7}")
+    for couriers, orders in ((1000, 1000), (5000, 5000), (20000, 10000)):
+        # ~30 km x 30 km city, couriers clustered around a few hubs
+        hubs = rng.normal(0, 0.06, size=(8, 2))
+        c = hubs[rng.integers(0, 8, couriers)] + rng.normal(0, 0.03, size=(couriers, 2))
+        o = rng.uniform(-0.13, 0.13, size=(orders, 2))
+        t = time.perf_counter()
+        matches = dispatch.match_nearest(
+            list(range(orders)), lat0 + o[:, 0], lon0 + o[:, 1],
+            list(range(couriers)), lat0 + c[:, 0], lon0 + c[:, 1]
+        )
+        took = time.perf_counter() - t
+        avg = sum(km for _, km in matches.values()) / max(len(matches), 1)
+        print(f"{couriers:>9} {orders:>7} {took * 1000:>9.1f} {len(matches):>8} {avg:>7.2f}")
+
+
+LEGACY_TRENDING = [
+    "SELECT restaurant_id, COUNT(*) as n FROM orders WHERE created_at >= DATETIME('now', '-1 day') "
+    "GROUP BY restaurant_id ORDER BY n DESC LIMIT 3",
+    "SELECT i.menu_item_id, SUM(i.qty) as n FROM orders o JOIN order_items i ON i.order_id=o.id "
+    "WHERE o.created_at >= DATETIME('now', '-1 day') GROUP BY i.menu_item_id ORDER BY n DESC LIMIT 5",
+]
+
+
+def bench_trending(args):
+    """Home panel: per-visit GROUP BY over the last day vs. the in-memory top-K."""
+    print(f"{'orders':>10} {'dishes':>7} {'sql ms':>8} {'top-K ms':>9} {'warm-up s':>10} {'record us':>10}")
+    for size in (int(float(s)) for s in args.sizes.split(',')):
+        fresh_db()
+        restaurants, dishes = 50, max(200, size // 100)
+        db.transaction(lambda conn: conn.executemany(
+            "INSERT INTO restaurants (owner_id, name, rating, is_approved, city) VALUES (1, ?, 4.0, 1, ?)",
+            [(f'R{i}', f'City{i % 5}') for i in range(restaurants)]
+        ))
+        db.transaction(lambda conn: conn.executemany(
+            "INSERT INTO menu_items (restaurant_id, name, price) VALUES (?, ?, 100)",
+            [(i % restaurants + 1, f'D{i}') for i in range(dishes)]
+        ))
+        fill_orders(size, restaurants=restaurants)
+        # one to three lines per order, popularity skewed towards low dish ids
+        db.transaction(lambda conn: conn.execute(
+            "INSERT INTO order_items (order_id, restaurant_id, menu_item_id, name, qty, price) "
+            "SELECT o.id, o.restaurant_id, 1 + abs(random()) % ? * abs(random()) % ?, 'x', 1 + o.id % 3, 100 "
+            "FROM orders o", (dishes, dishes)
+        ))
+        with db.reader() as conn:
+            sql = timed(lambda: [conn.execute(q).fetchall() for q in LEGACY_TRENDING], repeat=3)
+        service = trending.Trending()
+        t = time.perf_counter()
+        service.warm_up()
+        warm = time.perf_counter() - t
+        top = timed(lambda: (service.top('restaurant', '24h', 'City1', 3), service.top('dish', '24h', 'City1', 5)))
+        n = 2000
+        t = time.perf_counter()
+        for i in range(n):
+            service.record_order(i % restaurants + 1, [(random.randint(1, dishes), 1), (random.randint(1, dishes), 2)])
+        record = (time.perf_counter() - t) / n
+        print(f"{size:>10} {dishes:>7} {sql * 1000:>8.1f} {top * 1000:>9.3f} {warm:>10.2f} {record * 1e6:>10.1f}")
+
+
+DISHES = [
+    ('Chicken Biryani', 'मुर्गा बिरयानी'), ('Veg Biryani', 'वेज बिरयानी'), ('Paneer Tikka', 'पनीर टिक्का'),
+    ('Dal Makhani', 'दाल मखनी'), ('Masala Dosa', 'मसाला डोसा'), ('Samosa', 'समोसा'),
+    ('Chole Bhature', 'छोले भटूरे'), ('Aloo Paratha', 'आलू पराठा'), ('Margherita Pizza', 'मार्गेरिटा पिज्जा'),
+    ('Masala Chai', 'मसाला चाय'), ('Gulab Jamun', 'गुलाब जामुन'), ('Rajma Chawal', 'राजमा चावल'),
+]
+TYPED = ['chicken biryani', 'मुर्गा बिरयानी', 'paneer', 'murga', 'masala chai', 'pasta']
+
+
+def bench_search(args):
+    """Search-as-you-type: one query per keystroke, FTS5 vs. LIKE over the menu."""
+    size = args.items
+    fresh_db()
+    restaurants = max(size // 50, 1)
+    db.transaction(lambda conn: conn.executemany(
+        "INSERT INTO restaurants (owner_id, name, rating, is_approved) VALUES (1, ?, 4.0, 1)",
+        [(f'Restaurant {i}',) for i in range(restaurants)]
+    ))
+    t = time.perf_counter()
+    rows = []
+    for i in range(size):
+        name, hindi = DISHES[i % len(DISHES)]
+        rows.append((i % restaurants + 1, f'{name} {i}', hindi, 100 + i % 300, search.transliterate(hindi)))
+    db.transaction(lambda conn: conn.executemany(
+        "INSERT INTO menu_items (restaurant_id, name, hindi_name, price, roman_name) VALUES (?, ?, ?, ?, ?)", rows
+    ))
+    print(f"indexed {size} menu items in {time.perf_counter() - t:.1f}s (through the sync triggers)")
+    like = ("SELECT id FROM menu_items WHERE name LIKE ?1 OR hindi_name LIKE ?1 OR roman_name LIKE ?1 LIMIT 20")
+    fts, scan = [], []
+    with db.reader() as conn:
+        for text in TYPED:
+            for n in range(search.MIN_PREFIX, len(text) + 1):
+                typed = text[:n]
+                fts.append(timed(lambda: search.search_menu(typed), repeat=3))
+                scan.append(timed(lambda: conn.execute(like, (f'%{typed}%',)).fetchall(), repeat=3))
+    for label, times in (('fts5', fts), ('like', scan)):
+        times.sort()
+        print(f"{label}: {len(times)} keystrokes, p50 {times[len(times) // 2] * 1000:.2f} ms, "
+              f"p99 {times[int(len(times) * 0.99)] * 1000:.2f} ms, max {times[-1] * 1000:.2f} ms")
+
+
+def bench_login(args):
+    """A burst of simultaneous logins: latency of login vs. resuming a session token, and
+    of a cheap page read running alongside."""
+    fresh_db()
+    count = args.sessions
+    legacy = hashlib.md5(b'pass123').hexdigest()
+    db.transaction(lambda conn: conn.executemany(
+        "INSERT INTO users (phone, password, role, name) VALUES (?, ?, 'customer', ?)",
+        [(str(8000000000 + i), legacy, f'C{i}') for i in range(count)]
+    ))
+
+    def burst(target):
+        latencies, done = [], threading.Event()
+        lock = threading.Lock()
+        reads = []
+
+        def session(i):
+            t = time.perf_counter()
+            result = target(i)
+            with lock:
+                latencies.append(time.perf_counter() - t)
+            return result
+
+        def reader():
+            # another session rendering a page while the burst runs
+            while not done.is_set():
+                t = time.perf_counter()
+                db.rows("SELECT id, name FROM restaurants WHERE is_approved=1 LIMIT 20")
+                reads.append(time.perf_counter() - t)
+                time.sleep(0.005)
+
+        side = threading.Thread(target=reader)
+        side.start()
+        threads = [threading.Thread(target=session, args=(i,)) for i in range(count)]
+        t = time.perf_counter()
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        took = time.perf_counter() - t
+        done.set()
+        side.join()
+        return took, sorted(latencies), sorted(reads) or [0]
+
+    tokens = [None] * count
+
+    def login(i):
+        user = auth.login(str(8000000000 + i), 'pass123')
+        tokens[i] = auth.issue_token(user)
+
+    def pct(values, p):
+        return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+    print(f"{count} sessions at once, {auth.HASH_WORKERS} hash workers")
+    print(f"{'burst':<22} {'total s':>8} {'p50 ms':>8} {'p99 ms':>8} {'page read p99 ms':>17}")
+    cases = (
+        ('login (md5 -> scrypt)', login),
+        ('login (scrypt)', login),
+        ('reload (session row)', lambda i: auth.resume(tokens[i])),
+    )
+    for label, target in cases:
+        took, latencies, reads = burst(target)
+        print(f"{label:<22} {took:>8.2f} {pct(latencies, 0.5):>8.1f} {pct(latencies, 0.99):>8.1f} "
+              f"{pct(reads, 0.99):>17.2f}")
+    upgraded = db.scalar("SELECT COUNT(*) FROM users WHERE password LIKE 'scrypt$%'")
+    print(f"{upgraded}/{count} stored hashes upgraded to scrypt")
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+LOAD_PASSWORD = 'load123'
+
+
+def load_users(per_role):
+    """per_role logins of every role, each restaurant owner with an approved restaurant and menu."""
+    password = auth.hash_password(LOAD_PASSWORD)  # one scrypt for all of them
+    phones = {}
+
+    def insert(conn):
+        for r, role in enumerate(('superadmin', 'restaurant', 'customer', 'delivery')):
+            phones[role] = [str(6000000000 + r * 100000 + i) for i in range(per_role)]
+            conn.executemany(
+                "INSERT INTO users (phone, password, role, name, lat, lon) VALUES (?, ?, ?, ?, ?, ?)",
+                [(phone, password, role, f'{role} {i}', 25.6 + random.random() / 10, 84.1 + random.random() / 10)
+                 for i, phone in enumerate(phones[role])]
+            )
+        for phone in phones['restaurant']:
+            owner = conn.execute("SELECT id FROM users WHERE phone=?", (phone,)).fetchone()[0]
+            rest = conn.execute(
+                "INSERT INTO restaurants (owner_id, name, rating, is_approved, city, lat, lon) "
+                "VALUES (?, ?, 4.2, 1, 'Sikariganj', 25.65, 84.15)", (owner, f'Load Kitchen {phone[-3:]}')
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO menu_items (restaurant_id, name, hindi_name, price, roman_name) VALUES (?, ?, ?, ?, ?)",
+                [(rest, f'Biryani {n}', 'बिरयानी', 150 + n * 10, 'biryani') for n in range(8)]
+            )
+
+    db.transaction(insert)
+    return phones
+
+
+def app_session(phone, password):
+    """A logged-in AppTest session."""
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py'),
+                           default_timeout=120).run()
+    at.text_input[0].input(phone)
+    at.text_input[1].input(password)
+    next(b for b in at.button if 'लॉगिन' in b.label).click()
+    return at.run()
+
+
+def _click(prefix):
+    # the first button whose key starts with prefix, or a plain rerun when there is none
+    def step(at):
+        button = next((b for b in at.button if b.key and b.key.startswith(prefix) and not b.disabled), None)
+        return button.click().run() if button else at.run()
+    return step
+
+
+def _click_label(text):
+    def step(at):
+        button = next((b for b in at.button if text in b.label), None)
+        return button.click().run() if button else at.run()
+    return step
+
+
+def _type(value):
+    def step(at):
+        return at.text_input[0].input(value).run()
+    return step
+
+
+def _switch_on(key):
+    def step(at):
+        return at.toggle(key=key).set_value(True).run()
+    return step
+
+
+def _open(at):
+    return at.run()
+
+
+# role -> [(step name, panel, action)]; the action's rerun is what gets timed
+LOAD_JOURNEYS = {
+    'superadmin': [(panel, panel, _open)
+                   for panel in ('dashboard', 'restaurants', 'delivery', 'orders', 'payments', 'fleet')] + [
+        ('performance', 'performance', _open),
+        ('performance: profile', 'performance', _switch_on('profiling')),
+    ],
+    'restaurant': [
+        ('menu', 'menu', _open),
+        ('orders', 'orders', _open),
+        ('orders: next status', 'orders', _click('update_')),
+        ('sales', 'sales', _open),
+        ('profile', 'profile', _open),
+    ],
+    'customer': [
+        ('home', 'home', _open),
+        ('home: add to cart', 'home', _click('add_')),
+        ('search', 'search', _open),
+        ('search: type', 'search', _type('biry')),
+        ('cart', 'cart', _open),
+        ('cart: checkout', 'cart', _click_label('चेकआउट')),
+        ('history', 'history', _open),
+        ('profile', 'profile', _open),
+    ],
+    'delivery': [
+        ('available', 'available', _open),
+        ('available: accept', 'available', _click('accept_')),
+        ('active', 'active', _open),
+        ('active: deliver', 'active', _click('delivered_')),
+        ('earnings', 'earnings', _open),
+    ],
+}
+
+
+def load_session(role, phone, rounds, barrier, results):
+    """One session in its own process (AppTest keeps a global runtime per run, so sessions
+    cannot share a process): log in and walk the role's journey rounds times.
+
+    Puts (role, [(step, seconds, queries, error)], peak RSS in KB) on results.
+    """
+    import resource
+    counter = count_queries()
+    records = []
+
+    def step(name, action, at=None):
+        before, t = counter[0], time.perf_counter()
+        try:
+            at = action(at)
+            error = at.exception[0].value if at.exception else None
+        except Exception as exc:  # a timeout or a widget that vanished mid-run
+            error = f'{exc.__class__.__name__}: {exc}'
+        records.append((f'{role}/{name}', time.perf_counter() - t, counter[0] - before, error and str(error)[:200]))
+        return at
+
+    from streamlit.testing.v1 import AppTest  # noqa: F401 - imported before the barrier, not timed
+    barrier.wait()
+    at = step('login', lambda _: app_session(phone, LOAD_PASSWORD))
+    for _ in range(rounds):
+        for name, panel, action in LOAD_JOURNEYS[role]:
+            if at.session_state.active_panel != panel:
+                at.session_state.active_panel = panel
+            at = step(name, action, at)
+    results.put((role, records, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+
+def bench_load(args):
+    """N concurrent AppTest sessions per role walking their panels: per-step latency,
+    queries per rerun and peak memory, optionally saved as JSON and compared to a baseline."""
+    import json
+    import multiprocessing
+    path = fresh_db()
+    db.transaction(db.seed_demo)
+    fill_orders(args.orders, restaurants=10)
+    # a third of the history ready and unassigned, so couriers have work
+    db.execute("UPDATE orders SET status='ready', delivery_id=NULL WHERE id % 3 = 0")
+    phones = load_users(args.per_role)
+    db.close_all()
+
+    os.environ['FOODTIGER_DB'] = path
+    os.environ.pop('FOODTIGER_SEED_DEMO', None)
+    ctx = multiprocessing.get_context('spawn')  # no inherited db / writer threads
+    jobs = [(role, phone) for role in LOAD_JOURNEYS for phone in phones[role]]
+    barrier, results = ctx.Barrier(len(jobs)), ctx.Queue()
+    procs = [ctx.Process(target=load_session, args=(role, phone, args.rounds, barrier, results))
+             for role, phone in jobs]
+    for proc in procs:
+        proc.start()
+    t = time.perf_counter()
+    collected = [results.get() for _ in procs]
+    took = time.perf_counter() - t
+    for proc in procs:
+        proc.join()
+
+    latencies, queries, errors = {}, {}, {}
+    for role, records, _ in collected:
+        for step, seconds, count, error in records:
+            latencies.setdefault(step, []).append(seconds)
+            queries.setdefault(step, []).append(count)
+            if error:
+                errors.setdefault(step, []).append(error)
+    steps = {}
+    for step, times in sorted(latencies.items()):
+        steps[step] = {
+            'runs': len(times),
+            'p50_ms': round(percentile(times, 0.50) * 1000, 1),
+            'p95_ms': round(percentile(times, 0.95) * 1000, 1),
+            'p99_ms': round(percentile(times, 0.99) * 1000, 1),
+            'queries': round(sum(queries[step]) / len(queries[step]), 1),
+            'errors': len(errors.get(step, [])),
+        }
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    result = {
+        'commit': commit,
+        'when': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'sessions_per_role': args.per_role,
+        'rounds': args.rounds,
+        'orders': args.orders,
+        'seconds': round(took, 2),
+        'reruns': sum(len(times) for times in latencies.values()),
+        # every session runs in its own process: the largest one is the cost of a runtime plus one session
+        'peak_rss_mb': round(max(peak for _, _, peak in collected) / 1024, 1),
+        'steps': steps,
+        'error_samples': {step: found[:3] for step, found in errors.items()},
+    }
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('steps', {})
+    print(f"{args.per_role} sessions per role x {args.rounds} rounds: {result['reruns']} reruns in {took:.1f}s, "
+          f"peak RSS {result['peak_rss_mb']} MB per session process")
+    print(f"{'step':<32} {'runs':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'errors':>6}"
+          + (f" {'p95 vs base':>12}" if baseline else ''))
+    for step, row in steps.items():
+        line = (f"{step:<32} {row['runs']:>5} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+                f"{row['queries']:>8.1f} {row['errors']:>6}")
+        if baseline.get(step, {}).get('p95_ms'):
+            line += f" {(row['p95_ms'] / baseline[step]['p95_ms'] - 1) * 100:>+11.0f}%"
+        print(line)
+    for step, found in result['error_samples'].items():
+        print(f"  {step}: {found[0]}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"saved {args.json}")
+
+
+def bench_lists(args):
+    """Render time of the restaurant orders and customer history panels as history grows."""
+    from streamlit.testing.v1 import AppTest
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+    def session(phone, password, panel):
+        at = AppTest.from_file(app, default_timeout=120).run()
+        at.text_input[0].input(phone)
+        at.text_input[1].input(password)
+        next(b for b in at.button if 'लॉगिन' in b.label).click()
+        at.run()
+        at.session_state.active_panel = panel
+        return at
+
+    print(f"{'orders':>8} {'open ms':>8} {'all ms':>8} {'history ms':>11} {'widgets':>8}")
+    for size in (100, 1000, 10000, 100000):
+        fresh_db()
+        db.transaction(db.seed_demo)
+        fill_orders(size, restaurants=1)
+        db.execute("UPDATE orders SET customer_id=3")
+        restaurant = session('9876543211', 'rest123', 'orders')
+        open_ms = timed(restaurant.run, repeat=3)
+        restaurant.selectbox[0].set_value('all')
+        all_ms = timed(restaurant.run, repeat=3)
+        history = session('9876543212', 'cust123', 'history')
+        history_ms = timed(history.run, repeat=3)
+        widgets = len(restaurant.selectbox) + len(restaurant.button)
+        print(f"{size:>8} {open_ms * 1000:>8.0f} {all_ms * 1000:>8.0f} {history_ms * 1000:>11.0f} {widgets:>8}")
+
+
+def bench_grids(args):
+    """Admin panels: whole table into a DataFrame vs. one server-side grid page plus its count."""
+    print(f"{'rows':>10} {'panel':>8} {'legacy ms':>10} {'grid ms':>8} {'filtered ms':>12}")
+    for size in (int(float(s)) for s in args.sizes.split(',')):
+        fresh_db()
+        fill_orders(size)
+        db.transaction(lambda conn: conn.executemany(
+            "INSERT INTO users (phone, password, role, name, status) VALUES (?, '', ?, ?, ?)",
+            [(str(7000000000 + i), 'delivery' if i % 10 == 0 else 'customer', f'U{i}', int(i % 7 != 0))
+             for i in range(size)]
+        ))
+        cases = (
+            ('orders', "SELECT * FROM orders ORDER BY id DESC", {'status': 'ready', 'customer_id': 7}),
+            ('delivery', "SELECT * FROM users WHERE role='delivery'", {'status': 0, 'phone': '70000'}),
+        )
+        for name, legacy_sql, filters in cases:
+            grid = grids.GRIDS[name]
+            legacy = timed(lambda: db.read_df(legacy_sql), repeat=1)
+            page = timed(lambda: (grid.page({}), grid.count({})))
+            filtered = timed(lambda: (grid.page(filters), grid.count(filters)))
+            print(f"{size:>10} {name:>8} {legacy * 1000:>10.1f} {page * 1000:>8.2f} {filtered * 1000:>12.2f}")
+
+
+def bench_sales(args):
+    """Sales panel for a restaurant with years of orders: legacy GROUP BY vs. bucketed series."""
+    fresh_db()
+    years, per_day = 3, args.orders // (3 * 365) or 1
+    t = time.perf_counter()
+    db.transaction(lambda conn: conn.executemany(
+        "INSERT INTO orders (customer_id, restaurant_id, items_json, total, status, tracking_id, created_at) "
+        "VALUES (1, ?, '[]', ?, 'delivered', 'T', datetime('now', ?))",
+        [(1 if i % 3 else random.randint(2, 50), round(random.uniform(100, 900), 2),
+          f'-{random.randint(0, years * 365 * 24 * 60)} minutes')
+         for i in range(years * 365 * per_day)]
+    ))
+    restaurant_orders = db.scalar("SELECT COUNT(*) FROM orders WHERE restaurant_id=1")
+    print(f"{restaurant_orders} orders for restaurant 1 over {years} years "
+          f"(inserted through the bucket triggers in {time.perf_counter() - t:.1f}s)")
+    legacy_sql = ("SELECT strftime('%Y-%m-%d', created_at) as date, SUM(total) as revenue "
+                  "FROM orders WHERE restaurant_id=? GROUP BY date")
+    with db.reader() as conn:
+        legacy = timed(lambda: conn.execute(legacy_sql, (1,)).fetchall(), repeat=3)
+        points = len(conn.execute(legacy_sql, (1,)).fetchall())
+    print(f"{'legacy all days':<16} {legacy * 1000:>8.1f} ms {points:>6} points")
+    for range_key in sales.RANGES:
+        for granularity in sales.granularities(range_key):
+            took = timed(lambda: sales.series(1, range_key, granularity))
+            points = len(sales.series(1, range_key, granularity))
+            print(f"{range_key + ' / ' + granularity:<16} {took * 1000:>8.2f} ms {points:>6} points")
+
+
+def bench_transitions(args):
+    """Status changes per second: one UPDATE + commit per order vs. orders.transition batches,
+    then the same through the restaurant panel (one click and rerun per order vs. select all + batch)."""
+    from streamlit.testing.v1 import AppTest
+
+    def pending(n):
+        fresh_db()
+        db.transaction(db.seed_demo)
+        db.transaction(lambda conn: conn.executemany(
+            "INSERT INTO orders (customer_id, restaurant_id, items_json, total, tracking_id) VALUES (3, 1, '[]', 100, 'T')",
+            [()] * n
+        ))
+        return [row.id for row in db.rows("SELECT id FROM orders WHERE status='pending' ORDER BY id")]
+
+    n = 2000
+    ids = pending(n)
+    t = time.perf_counter()
+    for order_id in ids:
+        db.execute("UPDATE orders SET status=? WHERE id=?", ('preparing', order_id))
+    print(f"{'per-order UPDATE':<24} {len(ids) / (time.perf_counter() - t):>9.0f} transitions/s")
+    for batch in (20, 200):
+        ids = pending(n)
+        t = time.perf_counter()
+        moved = sum(len(orders.transition(ids[i:i + batch], 'preparing', restaurant_id=1))
+                    for i in range(0, len(ids), batch))
+        print(f"{f'transition x{batch}':<24} {moved / (time.perf_counter() - t):>9.0f} transitions/s")
+
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+    for mode in ('per-order clicks', 'select all + batch'):
+        pending(orders.PAGE_SIZE)
+        at = AppTest.from_file(app, default_timeout=120).run()
+        at.text_input[0].input('9876543211')
+        at.text_input[1].input('rest123')
+        next(b for b in at.button if 'लॉगिन' in b.label).click()
+        at.run()
+        at.session_state.active_panel = 'orders'
+        at.run()
+        t = time.perf_counter()
+        if mode == 'per-order clicks':
+            while True:
+                # pending -> preparing -> ready, one click and rerun each
+                button = next((b for b in at.button if (b.key or '').startswith('update_')), None)
+                if button is None:
+                    break
+                button.click()
+                at.run()
+        else:
+            at.checkbox(key='select_all_1').check()
+            at.run()
+            at.button(key='batch_preparing').click()
+            at.run()
+        took = time.perf_counter() - t
+        moved = db.scalar("SELECT COUNT(*) FROM order_status_history")
+        print(f"{'panel: ' + mode:<24} {moved / took:>9.1f} transitions/s ({moved} moves in {took:.2f}s)")
+
+
+def bench_archive(args):
+    """Hot-path reads before and after moving delivered orders older than 90 days to the archive."""
+    hot = [
+        ('restaurant open page', lambda: orders.page('restaurant_id', 7, 'open')),
+        ('restaurant all page', lambda: orders.page('restaurant_id', 7, None)),
+        ('customer history page', lambda: orders.page('customer_id', 7, None)),
+        ('courier earnings', lambda: orders.courier_earnings(7)),
+        ('admin orders grid', lambda: (grids.GRIDS['orders'].page({}), grids.GRIDS['orders'].count({}))),
+        ('status breakdown', reports.status_breakdown),
+        # these two have to reach into the archive once it exists
+        ('history page 200 days back', lambda: orders.page('customer_id', 7, None, before=deep)),
+        ('restaurant bestsellers', lambda: reports.bestsellers(7)),
+    ]
+    for size in (int(float(s)) for s in args.sizes.split(',')):
+        fresh_db()
+        t = time.perf_counter()
+        fill_orders(size, open_days=2)
+        db.transaction(lambda conn: conn.execute(
+            "INSERT INTO order_items (order_id, restaurant_id, menu_item_id, name, qty, price) "
+            "SELECT id, restaurant_id, id % 40, 'dish ' || (id % 40), 1 + id % 3, total / 2 FROM orders"
+        ))
+        print(f"{size} orders filled in {time.perf_counter() - t:.0f}s")
+        deep = db.scalar("SELECT MAX(id) FROM orders WHERE created_at < DATETIME('now', '-200 days')")
+        before = {name: timed(fn) for name, fn in hot}
+        earnings = orders.courier_earnings(7)
+        t = time.perf_counter()
+        moved = archive.archive_orders(90)
+        took = time.perf_counter() - t
+        assert orders.courier_earnings(7).deliveries == earnings.deliveries, "archiving lost deliveries"
+        live = db.scalar("SELECT COUNT(*) FROM orders")
+        print(f"archived {moved} orders in {took:.1f}s ({moved / took:.0f}/s); "
+              f"{live} live, {os.path.getsize(archive.archive_path()) // 2 ** 20} MB archive file")
+        print(f"{'query':<28} {'before ms':>10} {'after ms':>9}")
+        for name, fn in hot:
+            print(f"{name:<28} {before[name] * 1000:>10.2f} {timed(fn) * 1000:>9.2f}")
+
+
+def legacy_map(order):
+    # the figure the active panel used to draw for every order
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Scattermap(
+        lat=[order.pickup_lat, order.drop_lat], lon=[order.pickup_lon, order.drop_lon], mode='markers',
+        marker=go.scattermap.Marker(size=12, color=['green', 'red'])
+    ))
+    fig.update_layout(map_style="open-street-map", map=dict(
+        zoom=11, center=dict(lat=(order.pickup_lat + order.drop_lat) / 2, lon=(order.pickup_lon + order.drop_lon) / 2)
+    ))
+    return fig
+
+
+def chart_spec(figure):
+    # what st.plotly_chart sends for a figure
+    import plotly.io
+    import plotly.tools
+    return plotly.io.to_json(plotly.tools.return_figure_from_figure_or_data(figure, validate_figure=True),
+                             validate=False)
+
+
+def bench_maps(args):
+    """Courier active panel at 1, 10 and 100 orders: a figure per order vs. one batched map."""
+    from streamlit import config
+    from streamlit.testing.v1 import AppTest
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+    cached_from = config.get_option('global.minCachedMessageSize')
+    print(f"{'orders':>6} {'per-order KB':>13} {'build ms':>9} {'batched KB':>11} {'build ms':>9} "
+          f"{'panel ms':>9} {'rerun ms':>9} {'hash ref':>9}")
+    for n in (1, 10, 100):
+        fresh_db()
+        db.transaction(db.seed_demo)
+        db.execute("DELETE FROM orders")
+        db.transaction(lambda conn: conn.executemany(
+            "INSERT INTO orders (customer_id, restaurant_id, delivery_id, items_json, total, status, tracking_id, "
+            "drop_lat, drop_lon) VALUES (3, ?, 4, '[]', 300, 'ready', 'T', ?, ?)",
+            [(1 + i % 3, 26.45 + random.uniform(-0.03, 0.03), 80.33 + random.uniform(-0.03, 0.03)) for i in range(n)]
+        ))
+        active = db.rows(
+            "SELECT o.*, r.lat as pickup_lat, r.lon as pickup_lon FROM orders o "
+            "LEFT JOIN restaurants r ON o.restaurant_id=r.id WHERE o.delivery_id = 4 AND o.status != 'delivered'"
+        )
+        legacy_bytes = sum(len(chart_spec(legacy_map(order))) for order in active)
+        legacy = timed(lambda: [chart_spec(legacy_map(order)) for order in active], repeat=3)
+        batched_bytes = len(chart_spec(maps.delivery_map(active)))
+        batched = timed(lambda: chart_spec(maps.delivery_map(active)), repeat=3)
+
+        at = AppTest.from_file(app, default_timeout=120).run()
+        at.text_input[0].input('9876543213')
+        at.text_input[1].input('del123')
+        next(b for b in at.button if 'लॉगिन' in b.label).click()
+        at.run()
+        at.session_state.active_panel = 'active'
+        t = time.perf_counter()
+        at.run()
+        panel = time.perf_counter() - t
+        rerun = timed(at.run, repeat=3)
+        sent = sum(len(chart.proto.spec) for chart in at.get('plotly_chart'))
+        print(f"{n:>6} {legacy_bytes / 1024:>13.1f} {legacy * 1000:>9.1f} {batched_bytes / 1024:>11.1f} "
+              f"{batched * 1000:>9.1f} {panel * 1000:>9.0f} {rerun * 1000:>9.0f} "
+              f"{'yes' if sent >= cached_from else 'no':>9}")
+
+
+REPORT_PACE = 0.05
+
+
+def bench_analytics(args):
+    """Report latency from SQLite vs. the Parquet snapshot, and checkouts/s while reports run."""
+    if not analytics.available():
+        print("pyarrow is not installed")
+        return
+    cart = [{'id': 1, 'name': 'Chicken Biryani', 'price': 250, 'qty': 2}]
+    reports_run = [
+        ('dashboard summary', reports.dashboard_summary),
+        ('status breakdown', reports.status_breakdown),
+        ('revenue trend', reports.revenue_trend),
+        ('sales all / day', lambda: sales.series(1, 'all', 'day')),
+        ('sales 30d / hour', lambda: sales.series(1, '30d', 'hour')),
+        ('bestsellers', lambda: reports.bestsellers(1)),
+        ('courier earnings', lambda: orders.courier_earnings(7)),
+    ]
+
+    def everything(i=None):
+        for _, fn in reports_run:
+            fn()
+
+    def uncached(i=None):
+        analytics._cache['as_of'] = None
+        everything()
+
+    for size in (int(float(s)) for s in args.sizes.split(',')):
+        fresh_db()
+        db.transaction(db.seed_demo)
+        fill_orders(size, restaurants=10, open_days=2)
+        db.transaction(lambda conn: conn.execute(
+            "INSERT INTO order_items (order_id, restaurant_id, menu_item_id, name, qty, price) "
+            "SELECT id, restaurant_id, id % 40, 'dish ' || (id % 40), 1 + id % 3, total / 2 FROM orders"
+        ))
+        analytics.enabled = False
+        t = time.perf_counter()
+        analytics.refresh()
+        print(f"{size} orders: first export {time.perf_counter() - t:.1f}s", end='')
+        fill_orders(1000, restaurants=10)
+        t = time.perf_counter()
+        analytics.refresh()
+        print(f", then 1000 new orders in {(time.perf_counter() - t) * 1000:.0f} ms")
+
+        print(f"{'report':<20} {'sqlite ms':>10} {'snapshot ms':>12} {'cached ms':>10}")
+        for name, fn in reports_run:
+            analytics.enabled = False
+            live = timed(fn)
+            analytics.enabled = True
+            scan = timed(lambda: (analytics._cache.update(as_of=None), fn()))
+            cached = timed(fn)
+            print(f"{name:<20} {live * 1000:>10.2f} {scan * 1000:>12.2f} {cached * 1000:>10.3f}")
+
+        print(f"{'4 viewers, reports from':<24} {'checkouts/s':>12} {'report rounds/s':>16}")
+        for label, mode, target in (('(none)', False, None), ('sqlite', False, everything),
+                                    ('snapshot', True, uncached), ('snapshot, cached', True, everything)):
+            analytics.enabled = mode
+            stop = threading.Event()
+            rounds = [0]
+
+            def reporter():
+                # a viewer refreshing every REPORT_PACE seconds, or as fast as the reports allow
+                while not stop.is_set():
+                    t = time.perf_counter()
+                    target()
+                    rounds[0] += 1
+                    stop.wait(max(0.0, REPORT_PACE - (time.perf_counter() - t)))
+
+            threads = [threading.Thread(target=reporter) for _ in range(4 if target else 0)]
+            for thread in threads:
+                thread.start()
+            checkouts = run_threads(10, lambda i: orders.place_order(3, 1, cart), args.duration)
+            stop.set()
+            for thread in threads:
+                thread.join()
+            print(f"{label:<24} {checkouts / args.duration:>12.0f} {rounds[0] / args.duration:>16.1f}")
+        analytics.enabled = False
+
+
+LEGACY_FONT_IMPORT = ("@import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700"
+                      "&family=Noto+Sans+Devanagari:wght@400;500;700&display=swap');")
+
+
+def legacy_style():
+    # the inline block app.py sent on every run before the stylesheet moved to static/
+    with open(os.path.join(assets.STATIC_DIR, 'app.css'), encoding='utf-8') as f:
+        return f"<style>\n{LEGACY_FONT_IMPORT}\n\n{f.read()}</style>"
+
+
+def sent_bytes():
+    """Count the ForwardMsg bytes sessions in this process send; returns the live counter list."""
+    from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+    counter = [0]
+    enqueue = ForwardMsgQueue.enqueue
+
+    def counted(self, msg):
+        counter[0] += msg.ByteSize()
+        return enqueue(self, msg)
+
+    ForwardMsgQueue.enqueue = counted
+    return counter
+
+
+def fetch(url):
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return response.read()
+
+
+def bench_assets(args):
+    """Bytes sent per run with the inline stylesheet vs. the once-per-session link, and the
+    requests the first paint waits on, fetched from a live server."""
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+    from streamlit.testing.v1 import AppTest
+    here = os.path.dirname(os.path.abspath(__file__))
+    fresh_db()
+    db.transaction(db.seed_demo)
+    inline, link = ForwardMsg(), ForwardMsg()
+    inline.delta.new_element.markdown.body = legacy_style()
+    inline.delta.new_element.markdown.allow_html = True
+    link.delta.new_element.html.body = assets.head_html()
+    link.delta.new_element.html.unsafe_allow_javascript = True
+
+    def login(at):
+        at.text_input[0].input('9876543212')
+        at.text_input[1].input('cust123')
+        next(b for b in at.button if 'लॉगिन' in b.label).click()
+        return at.run()
+
+    counter = sent_bytes()
+    at = AppTest.from_file(os.path.join(here, 'app.py'), default_timeout=120)
+    print(f"{'run':<24} {'inline KB':>10} {'linked KB':>10}")
+    runs = [('login: first run', at.run), ('login: rerun', at.run),
+            ('customer: log in', lambda: login(at)), ('customer: home rerun', at.run)]
+    for i, (name, step) in enumerate(runs):
+        before = counter[0]
+        step()
+        linked = counter[0] - before
+        # the inline block went out on every run, the link script only on the session's first
+        legacy = linked + inline.ByteSize() - (link.ByteSize() if i == 0 else 0)
+        print(f"{name:<24} {legacy / 1024:>10.2f} {linked / 1024:>10.2f}")
+
+    took = probe(FIRST_RENDER_PROBE, dict(os.environ, FOODTIGER_DB=db.DB_PATH))
+    print(f"\nfirst render (login, server side) {'n/a' if took is None else f'{took * 1000:.0f} ms'}")
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        port = s.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', 'app.py', '--server.headless', 'true', '--server.port', str(port)],
+        cwd=here, env=dict(os.environ, FOODTIGER_DB=db.DB_PATH),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f'http://localhost:{port}/'
+    try:
+        deadline = time.perf_counter() + 60
+        while True:
+            try:
+                fetch(base + '_stcore/health')
+                break
+            except OSError:
+                if time.perf_counter() > deadline:
+                    raise
+                time.sleep(0.2)
+        print("render-blocking requests: inline = fonts.googleapis.com css, then fonts.gstatic.com fonts "
+              "(never load offline); linked = same origin:")
+        for attrs in assets.head_links():
+            size = len(fetch(base + attrs['href']))
+            took = timed(lambda: fetch(base + attrs['href']))
+            print(f"  {attrs['rel']:<10} {attrs['href'].split('?')[0]:<36} {size / 1024:>7.1f} KB {took * 1000:>6.1f} ms")
+    finally:
+        server.terminate()
+        server.wait()
+    # first paint itself needs a browser; with every blocking request same-origin it
+    # follows the server render and the requests above
+
+
+SCENARIOS = {
+    'analytics': bench_analytics,
+    'archive': bench_archive,
+    'assets': bench_assets,
+    'checkout': bench_checkout,
+    'claims': bench_claims,
+    'coldstart': bench_coldstart,
+    'dashboard': bench_dashboard,
+    'dispatch': bench_dispatch,
+    'grids': bench_grids,
+    'idle': bench_idle,
+    'images': bench_images,
+    'import': bench_import,
+    'lists': bench_lists,
+    'maps': bench_maps,
+    'load': bench_load,
+    'login': bench_login,
+    'plans': bench_plans,
+    'pool': bench_pool,
+    'profiler': bench_profiler,
+    'queries': bench_queries,
+    'sales': bench_sales,
+    'search': bench_search,
+    'transitions': bench_transitions,
+    'trending': bench_trending,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scenario', choices=sorted(SCENARIOS))
+    parser.add_argument('--duration', type=float, default=2.0, help="seconds per concurrency level")
+    parser.add_argument('--couriers', type=int, default=300)
+    parser.add_argument('--orders', type=int, default=5000, help="orders for the claims / sales scenarios")
+    parser.add_argument('--sessions', type=int, default=200, help="simultaneous logins for the login scenario")
+    parser.add_argument('--per-role', type=int, default=5, help="concurrent sessions per role for the load scenario")
+    parser.add_argument('--rounds', type=int, default=3, help="journeys per session for the load scenario")
+    parser.add_argument('--json', help="load scenario: save the results to this file")
+    parser.add_argument('--baseline', help="load scenario: compare p95 with a saved JSON result")
+    parser.add_argument('--items', type=int, default=100000, help="menu items for the search scenario")
+    parser.add_argument('--sizes', default='1e4,1e6,1e7', help="comma-separated order counts")
+    args = parser.parse_args()
+    SCENARIOS[args.scenario](args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,424 @@
+import collections
+import concurrent.futures
+import functools
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import profiler
+
+DB_PATH = os.environ.get('FOODTIGER_DB', 'foodtiger.db')
+POOL_SIZE = int(os.environ.get('FOODTIGER_POOL_SIZE', '8'))
+BUSY_TIMEOUT_MS = 5000
+MAX_RETRIES = 6
+RETRY_BASE_DELAY = 0.02
+WRITE_WINDOW = 0.002  # seconds the writer waits for more requests to share a commit
+WRITE_BATCH = 64
+
+# Callables run on every new connection (e.g. to install a trace callback).
+CONNECT_HOOKS = []
+
+
+def _connect(path, readonly=False):
+    if readonly:
+        conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False,
+                               isolation_level=None)
+    else:
+        conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    for hook in CONNECT_HOOKS:
+        hook(conn)
+    return conn
+
+
+class ConnectionPool:
+    """Bounded pool; a thread keeps the same connection for nested checkouts."""
+
+    def __init__(self, path, size=POOL_SIZE, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+
+    @contextmanager
+    def connection(self):
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            yield held
+            return
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = _connect(self.path, self.readonly)
+            self._local.conn = conn
+            try:
+                yield conn
+            finally:
+                self._local.conn = None
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool(readonly=False):
+    key = (DB_PATH, readonly)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(DB_PATH, readonly=readonly)
+        return _pools[key]
+
+
+def close_all():
+    with _pools_lock:
+        for p in _pools.values():
+            p.close()
+        _pools.clear()
+
+
+def is_lock_error(exc):
+    msg = str(exc).lower()
+    return isinstance(exc, sqlite3.OperationalError) and ('locked' in msg or 'busy' in msg)
+
+
+def with_retry(fn, retries=MAX_RETRIES):
+    """Call fn(), backing off exponentially (with jitter) while the db is locked."""
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except sqlite3.OperationalError as exc:
+            if not is_lock_error(exc) or attempt == retries:
+                raise
+            time.sleep(RETRY_BASE_DELAY * (2 ** attempt) * (0.5 + random.random()))
+
+
+@contextmanager
+def reader():
+    """Read-only connection for queries (dashboards, lists)."""
+    with pool(readonly=True).connection() as conn:
+        yield conn
+
+
+@contextmanager
+def writer():
+    with pool().connection() as conn:
+        yield conn
+
+
+def transaction(fn):
+    """Run fn(conn) inside BEGIN IMMEDIATE ... COMMIT, retried on lock contention."""
+    def attempt():
+        with writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn)
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+            return result
+    if not profiler.enabled:
+        return with_retry(attempt)
+    start = time.perf_counter()
+    value = with_retry(attempt)
+    # like write(): one record for the whole transaction, retries included
+    profiler.record(f"-- transaction {fn.__qualname__}", (), time.perf_counter() - start, None)
+    return value
+
+
+class GroupCommitWriter:
+    """One thread that applies queued write requests in shared transactions.
+
+    Requests that queue up while a commit is in flight, plus any arriving
+    within WRITE_WINDOW after them (up to WRITE_BATCH), are committed
+    together.  Each runs in its own SAVEPOINT, so a failing request is rolled
+    back alone and only its future gets the exception.  Futures are resolved
+    after COMMIT, so a result means the write is durable.
+    """
+
+    def __init__(self, window=WRITE_WINDOW, max_batch=WRITE_BATCH):
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn):
+        """Queue fn(conn); returns a Future with its return value or exception."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("write requests cannot queue further write requests")
+        future = concurrent.futures.Future()
+        self._queue.put((fn, future))
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+                    self._thread.start()
+        return future
+
+    def _collect(self):
+        # take what is already queued; wait up to the window for more only when
+        # others are writing too, so a lone session never pays the window
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if len(batch) > 1 and remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _apply(self, batch):
+        outcomes = []
+        with writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for fn, _ in batch:
+                    conn.execute("SAVEPOINT request")
+                    try:
+                        value = fn(conn)
+                    except Exception as exc:
+                        conn.execute("ROLLBACK TO request")
+                        conn.execute("RELEASE request")
+                        outcomes.append((False, exc))
+                    else:
+                        conn.execute("RELEASE request")
+                        outcomes.append((True, value))
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        return outcomes
+
+    def _run(self):
+        while True:
+            batch = [(fn, future) for fn, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                outcomes = with_retry(lambda: self._apply(batch))
+            except BaseException as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            for (_, future), (ok, value) in zip(batch, outcomes):
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+
+_group_writer = GroupCommitWriter()
+
+
+def submit(fn):
+    """Queue fn(conn) for the group-commit writer; returns a Future."""
+    return _group_writer.submit(fn)
+
+
+def write(fn, timeout=None):
+    """Run fn(conn) through the group-commit writer and wait for its commit."""
+    if not profiler.enabled:
+        return submit(fn).result(timeout)
+    start = time.perf_counter()
+    value = submit(fn).result(timeout)
+    # the statements inside fn are not traced; the profiler sees the whole write, queueing included
+    profiler.record(f"-- write {fn.__qualname__}", (), time.perf_counter() - start, None)
+    return value
+
+
+def execute(sql, params=()):
+    """Single write statement through the group-commit writer; returns the cursor's rowcount."""
+    if not profiler.enabled:
+        return submit(lambda conn: conn.execute(sql, params).rowcount).result()
+    start = time.perf_counter()
+    count = submit(lambda conn: conn.execute(sql, params).rowcount).result()
+    seconds = time.perf_counter() - start
+    plan = None
+    if profiler.is_slow(seconds):
+        with reader() as conn:
+            plan = _plan(conn, sql, params)
+    profiler.record(sql, params, seconds, count, plan)
+    return count
+
+
+def _plan(conn, sql, params):
+    try:
+        return [step[3] for step in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    except sqlite3.Error as exc:
+        return [f"EXPLAIN failed: {exc}"]
+
+
+@functools.lru_cache(maxsize=256)
+def _row_type(columns):
+    return collections.namedtuple('Row', columns, rename=True)
+
+
+def _fetch(sql, params, size=None):
+    start = time.perf_counter() if profiler.enabled else None
+    with reader() as conn:
+        def run():
+            cur = conn.execute(sql, params)
+            found = cur.fetchall() if size is None else cur.fetchmany(size)
+            return [d[0] for d in cur.description], found
+        columns, found = with_retry(run)
+        if start is not None:
+            seconds = time.perf_counter() - start
+            profiler.record(sql, params, seconds, len(found),
+                            _plan(conn, sql, params) if profiler.is_slow(seconds) else None)
+        return columns, found
+
+
+def scalar(sql: str, params=(), default=None):
+    """First column of the first row, or default when there is none."""
+    _, found = _fetch(sql, params, 1)
+    if not found or found[0][0] is None:
+        return default
+    return found[0][0]
+
+
+def one(sql: str, params=()):
+    """First row as a Row namedtuple (attribute access, ``_asdict()``), or None."""
+    columns, found = _fetch(sql, params, 1)
+    return _row_type(tuple(columns))._make(found[0]) if found else None
+
+
+def rows(sql: str, params=()) -> list:
+    columns, found = _fetch(sql, params)
+    make = _row_type(tuple(columns))._make
+    return [make(r) for r in found]
+
+
+def table_version(*tables):
+    """Sum of the change counters of tables; moves whenever any of them is written."""
+    marks = ','.join('?' * len(tables))
+    return scalar(f"SELECT SUM(version) FROM table_versions WHERE name IN ({marks})", tables, 0)
+
+
+def to_frame(records):
+    """DataFrame from rows(); for st.dataframe and charts only."""
+    import pandas as pd
+    return pd.DataFrame.from_records(records, columns=records[0]._fields if records else None)
+
+
+def read_df(sql, params=()):
+    import pandas as pd
+    start = time.perf_counter() if profiler.enabled else None
+    with reader() as conn:
+        frame = with_retry(lambda: pd.read_sql(sql, conn, params=params))
+        if start is not None:
+            seconds = time.perf_counter() - start
+            profiler.record(sql, params, seconds, len(frame),
+                            _plan(conn, sql, params) if profiler.is_slow(seconds) else None)
+        return frame
+
+
+def seed_demo(conn):
+    """Insert the demo users, restaurants, menu and orders.  Safe to run repeatedly."""
+    import auth
+    import search
+    sample_users = [
+        (9876543210, auth.hash_password('admin123'), 'superadmin', 'Super Admin'),
+        (9876543211, auth.hash_password('rest123'), 'restaurant', 'Restaurant Owner'),
+        (9876543212, auth.hash_password('cust123'), 'customer', 'Rahul Sharma'),
+        (9876543213, auth.hash_password('del123'), 'delivery', 'Delivery Boy 1'),
+    ]
+    conn.executemany(
+        "INSERT OR IGNORE INTO users (phone, password, role, name) VALUES (?, ?, ?, ?)",
+        sample_users
+    )
+
+    def user_id(phone):
+        return conn.execute("SELECT id FROM users WHERE phone=?", (phone,)).fetchone()[0]
+
+    owner_id = user_id(9876543211)
+    sample_restaurants = [
+        (owner_id, 'Biryani House', 'biriyani_banner.jpg', 4.5, 1),
+        (owner_id, 'Pizza Corner', 'pizza_banner.jpg', 4.2, 1),
+        (owner_id, 'Chai Sutta Bar', 'chai_banner.jpg', 4.8, 0),
+    ]
+    conn.executemany(
+        "INSERT INTO restaurants (owner_id, name, banner_image, rating, is_approved) "
+        "SELECT ?1, ?2, ?3, ?4, ?5 WHERE NOT EXISTS (SELECT 1 FROM restaurants WHERE owner_id=?1 AND name=?2)",
+        sample_restaurants
+    )
+
+    def restaurant_id(name):
+        return conn.execute("SELECT id FROM restaurants WHERE owner_id=? AND name=?", (owner_id, name)).fetchone()[0]
+
+    biryani, pizza = restaurant_id('Biryani House'), restaurant_id('Pizza Corner')
+    sample_menu = [
+        (biryani, 'Chicken Biryani', 'मुर्गा बिरयानी', 250, 'chicken_biryani.jpg'),
+        (biryani, 'Veg Biryani', 'वेज बिरयानी', 180, 'veg_biryani.jpg'),
+        (pizza, 'Margherita Pizza', 'मार्गेरिटा पिज्जा', 320, 'pizza.jpg'),
+        (pizza, 'Pepperoni Pizza', 'पेपरनी पिज्जा', 380, 'pepperoni.jpg'),
+    ]
+    conn.executemany(
+        "INSERT INTO menu_items (restaurant_id, name, hindi_name, price, image_path, roman_name) "
+        "SELECT ?1, ?2, ?3, ?4, ?5, ?6 WHERE NOT EXISTS (SELECT 1 FROM menu_items WHERE restaurant_id=?1 AND name=?2)",
+        [item + (search.transliterate(item[2]),) for item in sample_menu]
+    )
+
+    # demo locations around the city centre; only filled in where still unset
+    locations = [
+        ('restaurants', biryani, 26.4670, 80.3500),
+        ('restaurants', pizza, 26.4380, 80.3180),
+        ('restaurants', restaurant_id('Chai Sutta Bar'), 26.4550, 80.3300),
+        ('users', user_id(9876543212), 26.4499, 80.3319),
+        ('users', user_id(9876543213), 26.4600, 80.3400),
+    ]
+    for table, row_id, lat, lon in locations:
+        conn.execute(f"UPDATE {table} SET lat=?, lon=? WHERE id=? AND lat IS NULL", (lat, lon, row_id))
+    conn.execute("UPDATE restaurants SET city=? WHERE owner_id=? AND city IS NULL", ('Sikariganj', owner_id))
+
+    customer_id, delivery_id = user_id(9876543212), user_id(9876543213)
+    rng = random.Random(20)
+    sample_orders = [
+        (customer_id, rng.choice([biryani, pizza]), delivery_id, '[{"name":"Biryani","qty":2}]',
+         round(rng.uniform(200, 500), 2), f'DEMO{i:04d}')
+        for i in range(1, 21)
+    ]
+    conn.executemany(
+        "INSERT INTO orders (customer_id, restaurant_id, delivery_id, items_json, total, tracking_id, drop_lat, drop_lon) "
+        "SELECT ?1, ?2, ?3, ?4, ?5, ?6, lat, lon FROM users "
+        "WHERE id=?1 AND NOT EXISTS (SELECT 1 FROM orders WHERE tracking_id=?6)",
+        sample_orders
+    )
+
+
+def init_db(seed=None):
+    """Bring the schema up to date; seed demo data only when asked to.
+
+    seed defaults to the FOODTIGER_SEED_DEMO environment variable.
+    """
+    import migrations
+    transaction(migrations.migrate)
+    if seed is None:
+        seed = os.environ.get('FOODTIGER_SEED_DEMO') == '1'
+    if seed:
+        transaction(seed_demo)
@@ -0,0 +1,254 @@
+"""Courier dispatch: race-free order claiming, a queue that spreads offers and
+a nearest-courier matcher.
+
+Claiming is a compare-and-set on orders.delivery_id, so exactly one courier
+can win an order no matter how many click at once.  The queue hands each
+courier a short lease on a few ready orders so that couriers see different
+offers instead of all fighting over the same top 10, starting with the order
+the matcher picked as nearest to them.
+"""
+import math
+import threading
+import time
+
+import db
+
+OFFER_SIZE = 3
+OFFER_TTL = 30  # seconds an offer stays reserved for one courier
+MAX_CANDIDATES = 200
+MAX_PICKUP_KM = 8.0
+GRID_CELL_KM = 0.5
+SPEED_KMH = 20.0
+EARTH_KM = 6371.0
+CITY_CENTER = (26.4499, 80.3319)
+
+READY_ORDERS = "SELECT * FROM orders WHERE delivery_id IS NULL AND status='ready' ORDER BY id LIMIT ?"
+IDLE_COURIERS = (
+    "SELECT id, lat, lon FROM users u WHERE role='delivery' AND status=1 AND lat IS NOT NULL "
+    "AND NOT EXISTS (SELECT 1 FROM orders o WHERE o.delivery_id=u.id AND o.status != 'delivered')"
+)
+READY_PICKUPS = (
+    "SELECT o.id, r.lat, r.lon FROM orders o JOIN restaurants r ON r.id=o.restaurant_id "
+    "WHERE o.delivery_id IS NULL AND o.status='ready' AND r.lat IS NOT NULL ORDER BY o.id LIMIT ?"
+)
+CLAIM = "UPDATE orders SET delivery_id=? WHERE id=? AND delivery_id IS NULL AND status='ready'"
+# a courier's undelivered orders, with the pickup point for the route map
+COURIER_ACTIVE = """
+    SELECT o.*, u.name as cust_name, r.lat as pickup_lat, r.lon as pickup_lon
+    FROM orders o
+    JOIN users u ON o.customer_id=u.id
+    LEFT JOIN restaurants r ON o.restaurant_id=r.id
+    WHERE o.delivery_id = ? AND o.status != 'delivered'
+"""
+# every claimed, undelivered order (claims only happen on 'ready') and its courier
+FLEET_ORDERS = (
+    "SELECT o.id, o.delivery_id, r.lat as pickup_lat, r.lon as pickup_lon, o.drop_lat, o.drop_lon "
+    "FROM orders o LEFT JOIN restaurants r ON r.id = o.restaurant_id "
+    "WHERE o.status = 'ready' AND o.delivery_id IS NOT NULL"
+)
+FLEET_COURIERS = (
+    "SELECT id, name, lat, lon FROM users WHERE id IN "
+    "(SELECT delivery_id FROM orders WHERE status = 'ready' AND delivery_id IS NOT NULL)"
+)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance; works elementwise on numpy arrays."""
+    import numpy as np
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_KM * np.arcsin(np.sqrt(a))
+
+
+def eta_minutes(km):
+    return int(math.ceil(km / SPEED_KMH * 60))
+
+
+class GridIndex:
+    """Uniform lat/lon grid over points; cells are about cell_km on a side.
+
+    Points are sorted by cell key so each cell is one contiguous slice, and
+    neighbourhood lookups for a whole batch of queries are done with
+    searchsorted instead of per-query loops.
+    """
+
+    SPAN = 1 << 21
+
+    def __init__(self, lats, lons, cell_km=GRID_CELL_KM):
+        import numpy as np
+        self.lats = np.asarray(lats, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        mid = float(self.lats.mean()) if len(self.lats) else 0.0
+        self.dlat = cell_km / 111.32
+        self.dlon = cell_km / (111.32 * max(math.cos(math.radians(mid)), 0.01))
+        keys = self._keys(*self._cells(self.lats, self.lons))
+        self.order = np.argsort(keys, kind='stable')
+        self.sorted_keys = keys[self.order]
+
+    def _cells(self, lats, lons):
+        import numpy as np
+        return (np.floor(np.asarray(lats) / self.dlat).astype(np.int64),
+                np.floor(np.asarray(lons) / self.dlon).astype(np.int64))
+
+    def _keys(self, ix, iy):
+        return (ix + self.SPAN) * (2 * self.SPAN) + (iy + self.SPAN)
+
+    def candidate_pairs(self, lats, lons, rings=1):
+        """(query_idx, point_idx) arrays for every point in the (2*rings+1)^2 cells around each query."""
+        import numpy as np
+        ix, iy = self._cells(lats, lons)
+        queries, points = [], []
+        for dx in range(-rings, rings + 1):
+            for dy in range(-rings, rings + 1):
+                keys = self._keys(ix + dx, iy + dy)
+                start = np.searchsorted(self.sorted_keys, keys, side='left')
+                end = np.searchsorted(self.sorted_keys, keys, side='right')
+                counts = end - start
+                if not counts.any():
+                    continue
+                q = np.repeat(np.arange(len(keys)), counts)
+                # position inside each run: global arange minus the run's first offset
+                offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                queries.append(q)
+                points.append(self.order[np.repeat(start, counts) + offsets])
+        if not queries:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(queries), np.concatenate(points)
+
+
+def match_nearest(order_ids, order_lats, order_lons, courier_ids, courier_lats, courier_lons,
+                  max_km=MAX_PICKUP_KM, per_order=8):
+    """Match orders to couriers, nearest pairs first, each side used at most once.
+
+    Works in passes of growing search radius over the still-unmatched orders
+    and couriers.  Each pass gathers candidate pairs for all orders at once
+    from the grid, keeps the per_order nearest couriers of each order and
+    assigns greedily by distance.  Returns {order_id: (courier_id, km)}.
+    """
+    import numpy as np
+    order_lats, order_lons = np.asarray(order_lats, dtype=float), np.asarray(order_lons, dtype=float)
+    courier_lats, courier_lons = np.asarray(courier_lats, dtype=float), np.asarray(courier_lons, dtype=float)
+    open_orders = np.arange(len(order_ids))
+    open_couriers = np.arange(len(courier_ids))
+    matches = {}
+    rings = 1
+    while len(open_orders) and len(open_couriers):
+        grid = GridIndex(courier_lats[open_couriers], courier_lons[open_couriers])
+        q, p = grid.candidate_pairs(order_lats[open_orders], order_lons[open_orders], rings)
+        if len(q):
+            km = haversine_km(order_lats[open_orders][q], order_lons[open_orders][q], grid.lats[p], grid.lons[p])
+            keep = km <= max_km
+            q, p, km = q[keep], p[keep], km[keep]
+            # per_order nearest couriers of every order
+            by_order = np.lexsort((km, q))
+            q, p, km = q[by_order], p[by_order], km[by_order]
+            first = np.searchsorted(q, q, side='left')
+            keep = np.arange(len(q)) - first < per_order
+            q, p, km = q[keep], p[keep], km[keep]
+            by_distance = np.argsort(km, kind='stable')
+            taken_orders, taken_couriers = set(), set()
+            for o, c, d in zip(q[by_distance].tolist(), p[by_distance].tolist(), km[by_distance].tolist()):
+                if o in taken_orders or c in taken_couriers:
+                    continue
+                taken_orders.add(o)
+                taken_couriers.add(c)
+                matches[order_ids[open_orders[o]]] = (courier_ids[open_couriers[c]], d)
+            open_orders = np.delete(open_orders, list(taken_orders))
+            open_couriers = np.delete(open_couriers, list(taken_couriers))
+        if rings * GRID_CELL_KM >= max_km:
+            break
+        rings *= 2
+    return matches
+
+
+def nearest_assignments():
+    """{courier_id: (order_id, km)} for ready orders vs. idle couriers with a known position."""
+    couriers = db.rows(IDLE_COURIERS)
+    ready = db.rows(READY_PICKUPS, (MAX_CANDIDATES * 5,))
+    if not couriers or not ready:
+        return {}
+    matches = match_nearest(
+        [o.id for o in ready], [o.lat for o in ready], [o.lon for o in ready],
+        [c.id for c in couriers], [c.lat for c in couriers], [c.lon for c in couriers]
+    )
+    return {courier_id: (order_id, km) for order_id, (courier_id, km) in matches.items()}
+
+
+def update_location(user_id, lat, lon):
+    db.execute("UPDATE users SET lat=?, lon=? WHERE id=?", (lat, lon, user_id))
+
+
+def claim_order(order_id, courier_id):
+    """Assign order_id to courier_id if it is still ready and unassigned.
+
+    Returns True if this courier got the order, False if someone else did
+    (or it is no longer ready).
+    """
+    won = db.execute(CLAIM, (courier_id, order_id)) == 1
+    queue.release(order_id)
+    return won
+
+
+class DispatchQueue:
+    def __init__(self, offer_size=OFFER_SIZE, ttl=OFFER_TTL):
+        self.offer_size = offer_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._leases = {}  # order_id -> (courier_id, expires_at)
+        self._version = None
+        self._ready = []
+        self._nearest = {}
+
+    def _candidates(self):
+        # oldest ready orders first; re-read only when orders changed.  Called with
+        # the lock held, so one courier rebuilds and the others wait for its result.
+        version = db.table_version('orders', 'users')
+        if version != self._version:
+            self._ready = db.rows(READY_ORDERS, (MAX_CANDIDATES,))
+            self._nearest = nearest_assignments()
+            self._version = version
+        return self._ready, self._nearest
+
+    def offers(self, courier_id):
+        """At most offer_size orders for courier_id: its nearest match and live leases,
+        topped up with unleased orders.
+
+        An order another courier holds on lease is never offered, not even as
+        the nearest match.  When every ready order is leased to someone else
+        the courier is shown the oldest ones anyway, so no order sits idle
+        while couriers wait.
+        """
+        now = time.monotonic()
+        with self._lock:
+            ready, nearest = self._candidates()
+            self._leases = {oid: lease for oid, lease in self._leases.items() if lease[1] > now}
+            nearest_id = nearest.get(courier_id, (None,))[0]
+            holders = {oid: lease[0] for oid, lease in self._leases.items()}
+            mine = [o for o in ready
+                    if holders.get(o.id) == courier_id or (o.id == nearest_id and o.id not in holders)]
+            mine.sort(key=lambda o: (o.id != nearest_id, o.id))
+            del mine[self.offer_size:]
+            offered = {o.id for o in mine}
+            for order in ready:
+                if len(mine) >= self.offer_size:
+                    break
+                if order.id not in holders and order.id not in offered:
+                    mine.append(order)
+                    offered.add(order.id)
+            # leases this courier no longer gets shown go back to the pool
+            for oid, holder in holders.items():
+                if holder == courier_id and oid not in offered:
+                    del self._leases[oid]
+            for order in mine:
+                self._leases[order.id] = (courier_id, now + self.ttl)
+            mine.sort(key=lambda o: (o.id != nearest_id, o.id))
+        if not mine:
+            return ready[:self.offer_size]
+        return mine
+
+    def release(self, order_id):
+        with self._lock:
+            self._leases.pop(order_id, None)
+
+
+queue = DispatchQueue()
@@ -0,0 +1,149 @@
+"""Server-side admin grids: projection, filters, sorting and keyset paging in SQL.
+
+A grid never reads more than one page of rows.  The total shown next to it
+comes from entity_counts when the active filters map onto a rollup, and
+otherwise from a count capped at COUNT_CAP.
+"""
+import collections
+
+import db
+import orders
+import search
+
+PAGE_SIZE = 50
+COUNT_CAP = 1000
+
+# kind: 'choice' (options list, None = any), 'text' (exact), 'prefix', 'search' (FTS5), 'int'
+Filter = collections.namedtuple('Filter', 'label sql kind options', defaults=(None,))
+
+
+class Grid:
+    def __init__(self, table, columns, filters, sorts=('id',), where=None, rollup=None):
+        self.table = table
+        self.columns = columns
+        self.filters = filters
+        self.sorts = sorts
+        self.where = where
+        # rollup(active_filters) -> entity_counts name, or None when no rollup matches
+        self.rollup = rollup
+
+    def _where(self, values):
+        clauses, params = ([self.where] if self.where else []), []
+        for name, value in values.items():
+            if value is None or value == '':
+                continue
+            flt = self.filters[name]
+            if flt.kind == 'prefix':
+                # range on the column's own index instead of LIKE
+                clauses.append(f"{flt.sql} >= ? AND {flt.sql} < ?")
+                params += [value, value + '\uffff']
+                continue
+            if flt.kind == 'search':
+                value = search.match_expression(value)
+                if value is None:
+                    continue
+            clauses.append(flt.sql)
+            params.append(value)
+        return clauses, params
+
+    def _active(self, values):
+        return {name: value for name, value in values.items() if value is not None and value != ''}
+
+    def page(self, values, sort='id', descending=True, after=None, limit=PAGE_SIZE):
+        """One page of rows and whether more follow.
+
+        after is the (sort value, id) of the last row of the previous page.
+        Rows whose sort column is NULL come last in either direction.
+        """
+        found = db.rows(*self.query(values, sort, descending, after, limit))
+        return found[:limit], len(found) > limit
+
+    def query(self, values, sort='id', descending=True, after=None, limit=PAGE_SIZE):
+        """(sql, params) of page(): limit + 1 rows, to tell whether more follow."""
+        if sort not in self.sorts:
+            raise ValueError(sort)
+        clauses, params = self._where(values)
+        op, direction = ('<', 'DESC') if descending else ('>', 'ASC')
+        if after is not None:
+            if sort == 'id':
+                clauses.append(f"id {op} ?")
+                params.append(after[1])
+            elif after[0] is None:
+                clauses.append(f"({sort} IS NULL AND id {op} ?)")
+                params.append(after[1])
+            else:
+                # a row value comparison is NULL for NULL sort values, which all follow anyway
+                clauses.append(f"({sort} IS NULL OR ({sort}, id) {op} (?, ?))")
+                params += list(after)
+        # SQLite sorts NULL first, so only ascending pages need NULLS LAST; either
+        # way the (sort, id) index gives the order without a sort step
+        order = f"id {direction}" if sort == 'id' else \
+            f"{sort} {direction}{'' if descending else ' NULLS LAST'}, id {direction}"
+        return (f"SELECT {', '.join(self.columns)} FROM {self.table} "
+                f"{'WHERE ' + ' AND '.join(clauses) if clauses else ''} ORDER BY {order} LIMIT ?",
+                (*params, limit + 1))
+
+    def count(self, values):
+        """(count, exact): from the rollups when possible, else capped at COUNT_CAP."""
+        name = self.rollup(self._active(values)) if self.rollup else None
+        if name is not None:
+            return db.scalar("SELECT value FROM entity_counts WHERE name=?", (name,), default=0), True
+        clauses, params = self._where(values)
+        found = db.scalar(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM {self.table} "
+            f"{'WHERE ' + ' AND '.join(clauses) if clauses else ''} LIMIT ?)",
+            (*params, COUNT_CAP + 1)
+        )
+        return min(found, COUNT_CAP), found <= COUNT_CAP
+
+
+def _restaurant_rollup(active):
+    if not active:
+        return 'restaurants'
+    if set(active) == {'is_approved'}:
+        return 'restaurants:approved' if active['is_approved'] == 1 else 'restaurants:pending'
+    return None
+
+
+def _order_rollup(active):
+    if not active:
+        return 'orders'
+    if set(active) == {'status'}:
+        return f"orders:{active['status']}"
+    return None
+
+
+GRIDS = {
+    'restaurants': Grid(
+        'restaurants',
+        ('id', 'name', 'city', 'rating', 'is_approved', 'owner_id'),
+        {
+            'name': Filter("🔍 नाम", "id IN (SELECT rowid FROM restaurant_search WHERE restaurant_search MATCH ?)", 'search'),
+            'city': Filter("🏙️ शहर", "city = ?", 'text'),
+            'is_approved': Filter("✅ अप्रूवल", "is_approved = ?", 'choice', [None, 1, 0]),
+        },
+        sorts=('id', 'name', 'rating'),
+        rollup=_restaurant_rollup,
+    ),
+    'delivery': Grid(
+        'users',
+        ('id', 'name', 'phone', 'status', 'lat', 'lon'),
+        {
+            'phone': Filter("📞 फोन", "phone", 'prefix'),
+            'status': Filter("स्टेटस", "status = ?", 'choice', [None, 1, 0]),
+        },
+        where="role = 'delivery'",
+        rollup=lambda active: None if active else 'role:delivery',
+    ),
+    'orders': Grid(
+        'orders',
+        ('id', 'tracking_id', 'restaurant_id', 'customer_id', 'delivery_id', 'status', 'total', 'created_at'),
+        {
+            'status': Filter("स्टेटस", "status = ?", 'choice', [None] + orders.STATUSES),
+            'restaurant_id': Filter("🏪 रेस्टोरेंट ID", "restaurant_id = ?", 'int'),
+            'customer_id': Filter("👤 कस्टमर ID", "customer_id = ?", 'int'),
+            'tracking_id': Filter("🔖 ट्रैकिंग", "tracking_id = ?", 'text'),
+        },
+        rollup=_order_rollup,
+    ),
+}
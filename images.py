@@ -0,0 +1,115 @@
+"""Menu photo storage: content-addressed originals, pre-built thumbnails and an
+in-memory LRU of encoded thumbnail bytes."""
+import collections
+import hashlib
+import io
+import os
+import threading
+
+IMAGE_DIR = 'images'
+THUMB_DIR = os.path.join(IMAGE_DIR, 'thumbs')
+THUMB_SIZE = (300, 300)  # shown at width=150, 2x for dense screens
+CACHE_BYTES = 32 * 1024 * 1024
+
+
+class ByteLRU:
+    """LRU of bytes values bounded by their total size."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+
+_cache = ByteLRU(CACHE_BYTES)
+
+
+def content_key(data):
+    return hashlib.sha256(data).hexdigest()[:24]
+
+
+def thumb_paths(key):
+    return (os.path.join(THUMB_DIR, f'{key}.webp'), os.path.join(THUMB_DIR, f'{key}.jpg'))
+
+
+def make_thumbnails(data, key):
+    from PIL import Image
+    img = Image.open(io.BytesIO(data))
+    img.thumbnail(THUMB_SIZE)
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    os.makedirs(THUMB_DIR, exist_ok=True)
+    webp, jpg = thumb_paths(key)
+    # jpg first: store_image takes an existing webp to mean both are there
+    for path, fmt, options in ((jpg, 'JPEG', {'quality': 82, 'optimize': True}),
+                               (webp, 'WEBP', {'quality': 80, 'method': 4})):
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        img.save(tmp, fmt, **options)
+        os.replace(tmp, path)
+
+
+def store_image(data, ext='jpg'):
+    """Save an upload under its content hash and build its thumbnails.
+
+    Identical uploads map to the same file, so re-uploading is a no-op.
+    Returns the path of the original, which is what menu_items.image_path keeps.
+    """
+    key = content_key(data)
+    os.makedirs(IMAGE_DIR, exist_ok=True)
+    path = os.path.join(IMAGE_DIR, f'{key}.{ext.lower().lstrip(".")}')
+    if not os.path.exists(path):
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    if not os.path.exists(thumb_paths(key)[0]):
+        make_thumbnails(data, key)
+    return path
+
+
+def thumbnail(path):
+    """Encoded thumbnail bytes for an image_path, or None if there is no image.
+
+    Legacy uploads (stored before thumbnails existed) get theirs built on first view.
+    """
+    if not path:
+        return None
+    cached = _cache.get(path)
+    if cached is not None:
+        return cached
+    if not os.path.exists(path):
+        return None
+    stem = os.path.splitext(os.path.basename(path))[0]
+    webp = thumb_paths(stem)[0]
+    if not os.path.exists(webp):
+        with open(path, 'rb') as f:
+            data = f.read()
+        stem = content_key(data)
+        webp = thumb_paths(stem)[0]
+        if not os.path.exists(webp):
+            make_thumbnails(data, stem)
+    with open(webp, 'rb') as f:
+        encoded = f.read()
+    _cache.put(path, encoded)
+    return encoded
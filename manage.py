@@ -0,0 +1,85 @@
+"""Maintenance commands: ``python manage.py <command>``."""
+import argparse
+
+import analytics
+import archive
+import db
+import migrations
+
+
+def cmd_migrate(args):
+    version = db.transaction(migrations.migrate)
+    print(f"schema at version {version}")
+
+
+def cmd_backfill_rollups(args):
+    if archive.max_id():
+        # archived orders still count in the history rollups
+        archive.transaction(migrations.rebuild_rollups)
+    else:
+        db.transaction(migrations.rebuild_rollups)
+    with db.reader() as conn:
+        days = conn.execute("SELECT COUNT(DISTINCT day) FROM daily_order_stats").fetchone()[0]
+    print(f"rollups rebuilt ({days} days)")
+
+
+def cmd_seed_demo(args):
+    db.transaction(migrations.migrate)
+    db.transaction(db.seed_demo)
+    print("demo data seeded")
+
+
+def cmd_backfill_order_items(args):
+    import orders
+    db.transaction(migrations.migrate)
+    total, malformed = orders.backfill_order_items(args.batch, progress=lambda n: print(f"  {n} orders"))
+    print(f"order_items backfilled for {total} orders")
+    if malformed:
+        print(f"{malformed} orders skipped: items_json could not be read")
+
+
+def cmd_archive_orders(args):
+    db.transaction(migrations.migrate)
+    moved = archive.archive_orders(args.days, args.batch, progress=lambda n: print(f"  {n} orders"))
+    print(f"{moved} delivered orders older than {args.days} days moved to {archive.archive_path()}")
+
+
+def cmd_export_analytics(args):
+    db.transaction(migrations.migrate)
+    written = analytics.refresh(progress=lambda n: print(f"  {n} orders"))
+    if written is None:
+        print("another export is running")
+    else:
+        print(f"{written} orders exported to {analytics.snapshot_path()}")
+
+
+def cmd_purge_sessions(args):
+    import auth
+    db.transaction(migrations.migrate)
+    print(f"{auth.purge_sessions()} expired sessions deleted")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('migrate', help="apply pending schema migrations").set_defaults(func=cmd_migrate)
+    sub.add_parser('backfill-rollups', help="recompute dashboard rollups from orders").set_defaults(
+        func=cmd_backfill_rollups)
+    sub.add_parser('seed-demo', help="insert the demo logins, restaurants and orders (idempotent)").set_defaults(
+        func=cmd_seed_demo)
+    backfill = sub.add_parser('backfill-order-items', help="parse legacy items_json into order_items (resumable)")
+    backfill.add_argument('--batch', type=int, default=1000)
+    backfill.set_defaults(func=cmd_backfill_order_items)
+    archiver = sub.add_parser('archive-orders', help="move old delivered orders to the archive file (resumable)")
+    archiver.add_argument('--days', type=int, default=archive.ARCHIVE_AFTER_DAYS)
+    archiver.add_argument('--batch', type=int, default=archive.BATCH)
+    archiver.set_defaults(func=cmd_archive_orders)
+    exporter = sub.add_parser('export-analytics', help="bring the Parquet analytics snapshot up to date (incremental)")
+    exporter.set_defaults(func=cmd_export_analytics)
+    sub.add_parser('purge-sessions', help="delete expired login sessions").set_defaults(func=cmd_purge_sessions)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""One map for many deliveries: a courier's active orders or the whole fleet.
+
+Every pickup and drop goes into a single scattermap trace, the pickup -> drop
+legs into one line trace (None-separated) and courier positions into a
+third, so the payload grows by a few coordinates per order instead of a
+whole figure.  The layout is built and validated once per process with an
+empty template (plotly's default template alone is ~7 KB per chart) and
+only the traces and the view are filled in per render.  The figure goes to
+st.plotly_chart as a plain dict, and the same rows always give the same
+bytes: Streamlit then sends an unchanged map of 10 KB or more as a hash
+reference instead of the figure.  uirevision stays constant, so changed
+markers keep the user's pan and zoom.
+"""
+import functools
+import math
+
+HEIGHT = 420
+PICKUP_COLOR = '#16a34a'
+DROP_COLOR = '#dc2626'
+COURIER_COLOR = '#2563eb'
+LEG_COLOR = 'rgba(15, 23, 42, 0.45)'
+
+
+@functools.lru_cache(maxsize=None)
+def _layout():
+    import plotly.graph_objects as go
+    return go.Layout(
+        template='none', height=HEIGHT, showlegend=False, uirevision='deliveries',
+        margin=dict(l=0, r=0, t=0, b=0), map_style='open-street-map',
+    ).to_plotly_json()
+
+
+def _view(lats, lons):
+    # center on the bounding box, zoomed so all of it fits
+    span = max(max(lats) - min(lats), max(lons) - min(lons), 0.005)
+    return {
+        'style': 'open-street-map',
+        'center': {'lat': round((max(lats) + min(lats)) / 2, 5), 'lon': round((max(lons) + min(lons)) / 2, 5)},
+        'zoom': round(min(15.0, max(3.0, math.log2(360 / span) - 1)), 1),
+    }
+
+
+def located(order):
+    return None not in (order.pickup_lat, order.pickup_lon, order.drop_lat, order.drop_lon)
+
+
+def delivery_map(orders, couriers=()):
+    """Plotly figure dict for orders' pickups and drops plus couriers' positions, or None.
+
+    orders need id, pickup_lat/lon and drop_lat/lon; couriers need name, lat and lon.
+    Orders or couriers without coordinates are left out.
+    """
+    orders = [order for order in orders if located(order)]
+    couriers = [courier for courier in couriers if None not in (courier.lat, courier.lon)]
+    if not orders and not couriers:
+        return None
+    stop_lat, stop_lon, colors, labels, leg_lat, leg_lon = [], [], [], [], [], []
+    for order in orders:
+        stop_lat += [order.pickup_lat, order.drop_lat]
+        stop_lon += [order.pickup_lon, order.drop_lon]
+        colors += [PICKUP_COLOR, DROP_COLOR]
+        labels += [f"#{order.id} रेस्टोरेंट", f"#{order.id} कस्टमर"]
+        leg_lat += [order.pickup_lat, order.drop_lat, None]
+        leg_lon += [order.pickup_lon, order.drop_lon, None]
+    data = [
+        {'type': 'scattermap', 'mode': 'lines', 'lat': leg_lat, 'lon': leg_lon,
+         'line': {'width': 2, 'color': LEG_COLOR}, 'hoverinfo': 'skip'},
+        {'type': 'scattermap', 'mode': 'markers', 'lat': stop_lat, 'lon': stop_lon, 'text': labels,
+         'marker': {'size': 11, 'color': colors}, 'hoverinfo': 'text'},
+    ]
+    if couriers:
+        data.append({
+            'type': 'scattermap', 'mode': 'markers',
+            'lat': [courier.lat for courier in couriers], 'lon': [courier.lon for courier in couriers],
+            'text': [f"🚚 {courier.name}" for courier in couriers],
+            'marker': {'size': 14, 'color': COURIER_COLOR}, 'hoverinfo': 'text',
+        })
+    return {
+        'data': data,
+        'layout': {**_layout(), 'map': _view(stop_lat + [c.lat for c in couriers],
+                                             stop_lon + [c.lon for c in couriers])},
+    }
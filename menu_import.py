@@ -0,0 +1,156 @@
+"""Bulk menu import: a CSV/XLSX of items plus an optional zip of photos.
+
+The whole file is parsed and validated before anything is written.  Photos
+are stored by a worker pool, then every valid row goes in with one
+executemany inside a single transaction.
+"""
+import collections
+import concurrent.futures
+import csv
+import io
+import os
+import zipfile
+
+import db
+import images
+import search
+
+COLUMNS = ('name', 'hindi_name', 'price', 'is_available', 'image')
+MAX_ROWS = 5000
+MAX_ARCHIVE_BYTES = 200 * 1024 * 1024  # uncompressed
+IMAGE_WORKERS = 4
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+TRUE_WORDS = {'1', 'yes', 'y', 'true', 'हाँ', 'हां'}
+FALSE_WORDS = {'0', 'no', 'n', 'false', 'नहीं'}
+# the menu as the restaurant panel lists it, newest item first
+RESTAURANT_MENU = "SELECT * FROM menu_items WHERE restaurant_id=? ORDER BY id DESC"
+
+RowError = collections.namedtuple('RowError', 'row message')
+ImportResult = collections.namedtuple('ImportResult', 'inserted errors')
+
+
+def template_csv():
+    return ('name,hindi_name,price,is_available,image\n'
+            'Chicken Biryani,मुर्गा बिरयानी,250,1,chicken_biryani.jpg\n').encode('utf-8-sig')
+
+
+def read_table(data, filename):
+    """[{column: text}] from CSV or XLSX bytes; header names are case-insensitive."""
+    if filename.lower().endswith(('.xlsx', '.xlsm')):
+        try:
+            import openpyxl
+        except ImportError:
+            raise ValueError("XLSX के लिए openpyxl इंस्टॉल करें, या CSV अपलोड करें")
+        book = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+        table = [['' if cell is None else str(cell) for cell in row]
+                 for row in book.worksheets[0].iter_rows(values_only=True)]
+        book.close()
+    else:
+        table = list(csv.reader(io.StringIO(data.decode('utf-8-sig'))))
+    if not table:
+        return []
+    header = [h.strip().lower() for h in table[0]]
+    missing = {'name', 'price'} - set(header)
+    if missing:
+        raise ValueError(f"कॉलम नहीं मिले: {', '.join(sorted(missing))}")
+    return [dict(zip(header, (value.strip() for value in row))) for row in table[1:] if any(row)]
+
+
+def read_archive(data):
+    """{lower-cased file name: bytes} for the photos in a zip, ignoring folders."""
+    photos = {}
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        entries = [e for e in archive.infolist()
+                   if not e.is_dir() and e.filename.lower().endswith(IMAGE_EXTENSIONS)]
+        if sum(e.file_size for e in entries) > MAX_ARCHIVE_BYTES:
+            raise ValueError("zip बहुत बड़ा है")
+        for entry in entries:
+            photos[os.path.basename(entry.filename).lower()] = archive.read(entry)
+    return photos
+
+
+def validate(rows, photos, existing_names=()):
+    """Check every row up front; returns (items, [RowError]).
+
+    Row numbers count the header as row 1, like a spreadsheet.
+    """
+    items, errors = [], []
+    seen = {name.lower() for name in existing_names}
+    if len(rows) > MAX_ROWS:
+        return [], [RowError(0, f"एक बार में {MAX_ROWS} से ज़्यादा आइटम नहीं")]
+    for number, row in enumerate(rows, start=2):
+        name = row.get('name', '')
+        problems = []
+        if not name:
+            problems.append("नाम ज़रूरी है")
+        elif name.lower() in seen:
+            problems.append(f"'{name}' पहले से मौजूद है")
+        try:
+            price = float(row.get('price', ''))
+            if not 0 < price < 100000:
+                problems.append("कीमत 0 से ज़्यादा होनी चाहिए")
+        except ValueError:
+            problems.append(f"कीमत गलत है: '{row.get('price', '')}'")
+            price = None
+        available = row.get('is_available', '').lower() or '1'
+        if available not in TRUE_WORDS | FALSE_WORDS:
+            problems.append(f"is_available गलत है: '{available}'")
+        image = row.get('image', '').lower()
+        if image and image not in photos:
+            problems.append(f"फोटो zip में नहीं है: '{image}'")
+        if problems:
+            errors.extend(RowError(number, problem) for problem in problems)
+            continue
+        seen.add(name.lower())
+        items.append({
+            'row': number, 'name': name, 'hindi_name': row.get('hindi_name') or None, 'price': price,
+            'is_available': 1 if available in TRUE_WORDS else 0, 'image': image or None,
+        })
+    return items, errors
+
+
+def store_photos(names, photos, workers=IMAGE_WORKERS):
+    """({name: image_path}, {name: error}) with thumbnails built in a thread pool."""
+    paths, failed = {}, {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(images.store_image, photos[name], os.path.splitext(name)[1].lstrip('.') or 'jpg'): name
+            for name in set(names)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            name = futures[future]
+            try:
+                paths[name] = future.result()
+            except Exception as exc:  # PIL raises several unrelated types for bad files
+                failed[name] = str(exc) or exc.__class__.__name__
+    return paths, failed
+
+
+def import_menu(restaurant_id, table_bytes, table_name, archive_bytes=None, skip_invalid=False):
+    """Validate, store photos and insert in one transaction; returns ImportResult.
+
+    With errors and skip_invalid=False nothing is written.
+    """
+    try:
+        rows = read_table(table_bytes, table_name)
+        photos = read_archive(archive_bytes) if archive_bytes else {}
+    except (ValueError, UnicodeDecodeError, zipfile.BadZipFile) as exc:
+        return ImportResult(0, [RowError(0, str(exc))])
+    existing = [r.name for r in db.rows("SELECT name FROM menu_items WHERE restaurant_id=?", (restaurant_id,))]
+    items, errors = validate(rows, photos, existing)
+    if errors and not skip_invalid:
+        return ImportResult(0, errors)
+    paths, failed = store_photos([item['image'] for item in items if item['image']], photos)
+    if failed:
+        errors += [RowError(item['row'], f"फोटो नहीं खुली: {failed[item['image']]}")
+                   for item in items if item['image'] in failed]
+        if not skip_invalid:
+            return ImportResult(0, sorted(errors))
+        items = [item for item in items if item['image'] not in failed]
+    db.transaction(lambda conn: conn.executemany(
+        "INSERT INTO menu_items (restaurant_id, name, hindi_name, price, image_path, is_available, roman_name) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(restaurant_id, item['name'], item['hindi_name'], item['price'], paths.get(item['image']),
+          item['is_available'], search.transliterate(item['hindi_name'])) for item in items]
+    ))
+    return ImportResult(len(items), sorted(errors))
@@ -0,0 +1,598 @@
+"""Versioned schema migrations.
+
+The schema version lives in ``PRAGMA user_version``.  Each migration is a
+(version, description, step) tuple where step is either a callable taking the
+connection or a list of SQL statements.  Migrations only ever get appended.
+"""
+
+
+def base_schema(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        phone TEXT UNIQUE,
+        password TEXT,
+        role TEXT,
+        name TEXT,
+        status INTEGER DEFAULT 1
+    )''')
+
+    conn.execute('''CREATE TABLE IF NOT EXISTS restaurants (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        owner_id INTEGER,
+        name TEXT,
+        banner_image TEXT,
+        rating REAL DEFAULT 4.0,
+        is_approved INTEGER DEFAULT 0,
+        FOREIGN KEY(owner_id) REFERENCES users(id)
+    )''')
+
+    conn.execute('''CREATE TABLE IF NOT EXISTS menu_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        restaurant_id INTEGER,
+        name TEXT,
+        hindi_name TEXT,
+        price REAL,
+        image_path TEXT,
+        is_available INTEGER DEFAULT 1,
+        FOREIGN KEY(restaurant_id) REFERENCES restaurants(id)
+    )''')
+
+    conn.execute('''CREATE TABLE IF NOT EXISTS orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_id INTEGER,
+        restaurant_id INTEGER,
+        delivery_id INTEGER,
+        items_json TEXT,
+        total REAL,
+        status TEXT DEFAULT 'pending',
+        tracking_id TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(customer_id) REFERENCES users(id),
+        FOREIGN KEY(restaurant_id) REFERENCES restaurants(id),
+        FOREIGN KEY(delivery_id) REFERENCES users(id)
+    )''')
+
+
+
+ORDER_INDEXES = [
+    # restaurant orders panel: WHERE restaurant_id=? ORDER BY id DESC
+    "CREATE INDEX IF NOT EXISTS idx_orders_restaurant ON orders(restaurant_id)",
+    # customer history: WHERE customer_id=? ORDER BY id DESC
+    "CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders(customer_id)",
+    # courier available panel: only the handful of unclaimed ready orders
+    "CREATE INDEX IF NOT EXISTS idx_orders_ready_unassigned ON orders(id) "
+    "WHERE delivery_id IS NULL AND status='ready'",
+    # courier active + earnings (covering); unassigned orders stay out of it
+    "CREATE INDEX IF NOT EXISTS idx_orders_delivery ON orders(delivery_id, status, total) "
+    "WHERE delivery_id IS NOT NULL",
+    # dashboard date ranges
+    "CREATE INDEX IF NOT EXISTS idx_orders_created ON orders(created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_restaurants_owner ON restaurants(owner_id, is_approved)",
+    "CREATE INDEX IF NOT EXISTS idx_menu_items_restaurant ON menu_items(restaurant_id)",
+    "CREATE INDEX IF NOT EXISTS idx_users_role ON users(role)",
+]
+
+ROLLUP_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS daily_order_stats (
+        day TEXT NOT NULL,
+        restaurant_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        orders INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, restaurant_id, status)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS monthly_order_stats (
+        month TEXT PRIMARY KEY,
+        orders INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS entity_counts (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""",
+    # orders -> daily_order_stats + entity_counts('orders', 'orders:<status>')
+    """CREATE TRIGGER IF NOT EXISTS trg_orders_rollup_ins AFTER INSERT ON orders BEGIN
+        INSERT INTO daily_order_stats (day, restaurant_id, status, orders, revenue)
+        VALUES (DATE(NEW.created_at), COALESCE(NEW.restaurant_id, 0), COALESCE(NEW.status, ''), 1, COALESCE(NEW.total, 0))
+        ON CONFLICT (day, restaurant_id, status) DO UPDATE
+        SET orders = orders + 1, revenue = revenue + excluded.revenue;
+        INSERT INTO monthly_order_stats (month, orders, revenue)
+        VALUES (strftime('%Y-%m', NEW.created_at), 1, COALESCE(NEW.total, 0))
+        ON CONFLICT (month) DO UPDATE SET orders = orders + 1, revenue = revenue + excluded.revenue;
+        INSERT INTO entity_counts (name, value) VALUES ('orders', 1), ('orders:' || COALESCE(NEW.status, ''), 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_orders_rollup_del AFTER DELETE ON orders BEGIN
+        UPDATE daily_order_stats SET orders = orders - 1, revenue = revenue - COALESCE(OLD.total, 0)
+        WHERE day = DATE(OLD.created_at) AND restaurant_id = COALESCE(OLD.restaurant_id, 0)
+          AND status = COALESCE(OLD.status, '');
+        UPDATE monthly_order_stats SET orders = orders - 1, revenue = revenue - COALESCE(OLD.total, 0)
+        WHERE month = strftime('%Y-%m', OLD.created_at);
+        UPDATE entity_counts SET value = value - 1
+        WHERE name IN ('orders', 'orders:' || COALESCE(OLD.status, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_orders_rollup_upd
+    AFTER UPDATE OF status, total, created_at, restaurant_id ON orders BEGIN
+        UPDATE daily_order_stats SET orders = orders - 1, revenue = revenue - COALESCE(OLD.total, 0)
+        WHERE day = DATE(OLD.created_at) AND restaurant_id = COALESCE(OLD.restaurant_id, 0)
+          AND status = COALESCE(OLD.status, '');
+        INSERT INTO daily_order_stats (day, restaurant_id, status, orders, revenue)
+        VALUES (DATE(NEW.created_at), COALESCE(NEW.restaurant_id, 0), COALESCE(NEW.status, ''), 1, COALESCE(NEW.total, 0))
+        ON CONFLICT (day, restaurant_id, status) DO UPDATE
+        SET orders = orders + 1, revenue = revenue + excluded.revenue;
+        UPDATE monthly_order_stats SET orders = orders - 1, revenue = revenue - COALESCE(OLD.total, 0)
+        WHERE month = strftime('%Y-%m', OLD.created_at);
+        INSERT INTO monthly_order_stats (month, orders, revenue)
+        VALUES (strftime('%Y-%m', NEW.created_at), 1, COALESCE(NEW.total, 0))
+        ON CONFLICT (month) DO UPDATE SET orders = orders + 1, revenue = revenue + excluded.revenue;
+        UPDATE entity_counts SET value = value - 1 WHERE name = 'orders:' || COALESCE(OLD.status, '');
+        INSERT INTO entity_counts (name, value) VALUES ('orders:' || COALESCE(NEW.status, ''), 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+    END""",
+    # users -> entity_counts('users', 'role:<role>')
+    """CREATE TRIGGER IF NOT EXISTS trg_users_count_ins AFTER INSERT ON users BEGIN
+        INSERT INTO entity_counts (name, value) VALUES ('users', 1), ('role:' || COALESCE(NEW.role, ''), 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_users_count_del AFTER DELETE ON users BEGIN
+        UPDATE entity_counts SET value = value - 1
+        WHERE name IN ('users', 'role:' || COALESCE(OLD.role, ''));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_users_count_upd AFTER UPDATE OF role ON users BEGIN
+        UPDATE entity_counts SET value = value - 1 WHERE name = 'role:' || COALESCE(OLD.role, '');
+        INSERT INTO entity_counts (name, value) VALUES ('role:' || COALESCE(NEW.role, ''), 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+    END""",
+    # restaurants -> entity_counts('restaurants', 'restaurants:approved'/'restaurants:pending')
+    """CREATE TRIGGER IF NOT EXISTS trg_restaurants_count_ins AFTER INSERT ON restaurants BEGIN
+        INSERT INTO entity_counts (name, value)
+        VALUES ('restaurants', 1),
+               (CASE WHEN NEW.is_approved = 1 THEN 'restaurants:approved' ELSE 'restaurants:pending' END, 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_restaurants_count_del AFTER DELETE ON restaurants BEGIN
+        UPDATE entity_counts SET value = value - 1
+        WHERE name IN ('restaurants',
+                       CASE WHEN OLD.is_approved = 1 THEN 'restaurants:approved' ELSE 'restaurants:pending' END);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_restaurants_count_upd AFTER UPDATE OF is_approved ON restaurants BEGIN
+        UPDATE entity_counts SET value = value - 1
+        WHERE name = CASE WHEN OLD.is_approved = 1 THEN 'restaurants:approved' ELSE 'restaurants:pending' END;
+        INSERT INTO entity_counts (name, value)
+        VALUES (CASE WHEN NEW.is_approved = 1 THEN 'restaurants:approved' ELSE 'restaurants:pending' END, 1)
+        ON CONFLICT (name) DO UPDATE SET value = value + 1;
+    END""",
+]
+
+
+def rebuild_rollups(conn):
+    """Recompute the order stats tables and entity_counts from the base tables.
+
+    When the order archive is attached (archive.transaction) archived orders
+    count in the daily/monthly stats and under 'archived:<status>'.
+    """
+    archived = any(row[1] == 'archive' for row in conn.execute("PRAGMA database_list"))
+    # an interrupted archive run can leave a batch in both files; the live copy wins
+    cold = "archive.orders WHERE id NOT IN (SELECT id FROM main.orders)"
+    history = ("(SELECT created_at, restaurant_id, status, total FROM main.orders UNION ALL "
+               f"SELECT created_at, restaurant_id, status, total FROM {cold})") if archived else "orders"
+    conn.execute("DELETE FROM daily_order_stats")
+    conn.execute(f"""
+        INSERT INTO daily_order_stats (day, restaurant_id, status, orders, revenue)
+        SELECT DATE(created_at), COALESCE(restaurant_id, 0), COALESCE(status, ''), COUNT(*), COALESCE(SUM(total), 0)
+        FROM {history}
+        GROUP BY 1, 2, 3
+    """)
+    conn.execute("DELETE FROM monthly_order_stats")
+    conn.execute(f"""
+        INSERT INTO monthly_order_stats (month, orders, revenue)
+        SELECT strftime('%Y-%m', created_at), COUNT(*), COALESCE(SUM(total), 0)
+        FROM {history}
+        GROUP BY 1
+    """)
+    conn.execute("DELETE FROM entity_counts")
+    conn.execute(f"""
+        INSERT INTO entity_counts (name, value)
+        SELECT 'orders', COUNT(*) FROM orders
+        UNION ALL SELECT 'orders:' || COALESCE(status, ''), COUNT(*) FROM orders GROUP BY 1
+        UNION ALL SELECT 'users', COUNT(*) FROM users
+        UNION ALL SELECT 'role:' || COALESCE(role, ''), COUNT(*) FROM users GROUP BY 1
+        UNION ALL SELECT 'restaurants', COUNT(*) FROM restaurants
+        UNION ALL SELECT CASE WHEN is_approved = 1 THEN 'restaurants:approved' ELSE 'restaurants:pending' END,
+                         COUNT(*) FROM restaurants GROUP BY 1
+        {f"UNION ALL SELECT 'archived:' || COALESCE(status, ''), COUNT(*) FROM {cold} GROUP BY 1"
+         if archived else ""}
+    """)
+
+
+def rollup_tables(conn):
+    for sql in ROLLUP_SCHEMA:
+        conn.execute(sql)
+    rebuild_rollups(conn)
+
+
+def change_counters(conn):
+    """table_versions: a counter per table, bumped by triggers on every write.
+
+    Live panels compare it with the version they last rendered and skip their
+    queries when nothing changed.
+    """
+    conn.execute("""CREATE TABLE IF NOT EXISTS table_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""")
+    for table in ('orders', 'menu_items', 'restaurants', 'users'):
+        conn.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES (?, 0)", (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+                END""")
+
+
+LOCATIONS = [
+    # restaurants: pickup point; users: customer address / courier's last position
+    "ALTER TABLE restaurants ADD COLUMN lat REAL",
+    "ALTER TABLE restaurants ADD COLUMN lon REAL",
+    "ALTER TABLE users ADD COLUMN lat REAL",
+    "ALTER TABLE users ADD COLUMN lon REAL",
+    # drop point snapshot taken at checkout
+    "ALTER TABLE orders ADD COLUMN drop_lat REAL",
+    "ALTER TABLE orders ADD COLUMN drop_lon REAL",
+]
+
+ORDER_ITEMS = [
+    """CREATE TABLE IF NOT EXISTS order_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id INTEGER NOT NULL,
+        restaurant_id INTEGER,
+        menu_item_id INTEGER,
+        name TEXT,
+        qty INTEGER NOT NULL,
+        price REAL NOT NULL,
+        FOREIGN KEY(order_id) REFERENCES orders(id),
+        FOREIGN KEY(menu_item_id) REFERENCES menu_items(id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items(order_id)",
+    # bestsellers / revenue per dish for one restaurant, answered from the index alone
+    "CREATE INDEX IF NOT EXISTS idx_order_items_restaurant ON order_items(restaurant_id, menu_item_id, qty, price)",
+    # progress markers for resumable batch jobs (items_json backfill, archiving, ...)
+    """CREATE TABLE IF NOT EXISTS job_state (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID""",
+]
+
+CITIES = [
+    "ALTER TABLE restaurants ADD COLUMN city TEXT",
+]
+
+def menu_search(conn):
+    """FTS5 indexes over dishes (English, Devanagari, romanized) and restaurant names.
+
+    rowid is the menu_items / restaurants id.  Triggers keep both in sync, so
+    only the initial fill happens here.
+    """
+    import search
+    if 'roman_name' not in {row[1] for row in conn.execute("PRAGMA table_info(menu_items)")}:
+        conn.execute("ALTER TABLE menu_items ADD COLUMN roman_name TEXT")
+    conn.execute(f"""CREATE VIRTUAL TABLE IF NOT EXISTS menu_search USING fts5(
+        name, hindi_name, roman_name, restaurant,
+        tokenize="{search.TOKENIZER}", prefix='2 3'
+    )""")
+    conn.execute(f"""CREATE VIRTUAL TABLE IF NOT EXISTS restaurant_search USING fts5(
+        name, city,
+        tokenize="{search.TOKENIZER}", prefix='2 3'
+    )""")
+    index_item = """
+        INSERT INTO menu_search (rowid, name, hindi_name, roman_name, restaurant)
+        SELECT NEW.id, NEW.name, NEW.hindi_name, NEW.roman_name, (SELECT name FROM restaurants WHERE id = NEW.restaurant_id);"""
+    index_restaurant = """
+        INSERT INTO restaurant_search (rowid, name, city) VALUES (NEW.id, NEW.name, NEW.city);"""
+    # one statement per execute: executescript would commit migrate's transaction halfway
+    for sql in [
+        f"""CREATE TRIGGER IF NOT EXISTS trg_menu_items_search_insert AFTER INSERT ON menu_items BEGIN
+            {index_item}
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_menu_items_search_delete AFTER DELETE ON menu_items BEGIN
+            DELETE FROM menu_search WHERE rowid = OLD.id;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_menu_items_search_update
+        AFTER UPDATE OF name, hindi_name, roman_name, restaurant_id ON menu_items BEGIN
+            DELETE FROM menu_search WHERE rowid = OLD.id;
+            {index_item}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_restaurants_search_insert AFTER INSERT ON restaurants BEGIN
+            {index_restaurant}
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_restaurants_search_delete AFTER DELETE ON restaurants BEGIN
+            DELETE FROM restaurant_search WHERE rowid = OLD.id;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_restaurants_search_update AFTER UPDATE OF name, city ON restaurants BEGIN
+            DELETE FROM restaurant_search WHERE rowid = OLD.id;
+            {index_restaurant}
+            DELETE FROM menu_search WHERE rowid IN (SELECT id FROM menu_items WHERE restaurant_id = NEW.id);
+            INSERT INTO menu_search (rowid, name, hindi_name, roman_name, restaurant)
+            SELECT id, name, hindi_name, roman_name, NEW.name FROM menu_items WHERE restaurant_id = NEW.id;
+        END""",
+    ]:
+        conn.execute(sql)
+    conn.executemany(
+        "UPDATE menu_items SET roman_name=? WHERE id=?",
+        [(search.transliterate(hindi), item_id)
+         for item_id, hindi in conn.execute("SELECT id, hindi_name FROM menu_items WHERE hindi_name IS NOT NULL")]
+    )
+    conn.execute("DELETE FROM menu_search")
+    conn.execute("""
+        INSERT INTO menu_search (rowid, name, hindi_name, roman_name, restaurant)
+        SELECT m.id, m.name, m.hindi_name, m.roman_name, r.name
+        FROM menu_items m LEFT JOIN restaurants r ON r.id = m.restaurant_id
+    """)
+    conn.execute("DELETE FROM restaurant_search")
+    conn.execute("INSERT INTO restaurant_search (rowid, name, city) SELECT id, name, city FROM restaurants")
+
+
+# keyset pages of one restaurant's / customer's orders, newest first, filtered by status
+ORDER_PAGES = [
+    "CREATE INDEX IF NOT EXISTS idx_orders_restaurant_status ON orders(restaurant_id, status)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_restaurant_open ON orders(restaurant_id) "
+    "WHERE status IN ('pending', 'preparing', 'ready')",
+    "CREATE INDEX IF NOT EXISTS idx_orders_customer_open ON orders(customer_id) "
+    "WHERE status IN ('pending', 'preparing', 'ready')",
+]
+
+# admin grids: status / tracking filters on orders, delivery users by status
+ADMIN_GRIDS = [
+    "CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_tracking ON orders(tracking_id)",
+    "CREATE INDEX IF NOT EXISTS idx_users_role_status ON users(role, status)",
+]
+
+SALES_BUCKETS = [
+    # per-restaurant sales at two resolutions, ordered for range scans of one restaurant
+    """CREATE TABLE IF NOT EXISTS sales_hourly (
+        restaurant_id INTEGER NOT NULL,
+        hour TEXT NOT NULL,
+        orders INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (restaurant_id, hour)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS sales_daily (
+        restaurant_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        orders INTEGER NOT NULL DEFAULT 0,
+        revenue REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (restaurant_id, day)
+    ) WITHOUT ROWID""",
+    """CREATE TRIGGER IF NOT EXISTS trg_orders_sales_ins AFTER INSERT ON orders BEGIN
+        INSERT INTO sales_hourly (restaurant_id, hour, orders, revenue)
+        VALUES (COALESCE(NEW.restaurant_id, 0), strftime('%Y-%m-%d %H:00', NEW.created_at), 1, COALESCE(NEW.total, 0))
+        ON CONFLICT (restaurant_id, hour) DO UPDATE SET orders = orders + 1, revenue = revenue + excluded.revenue;
+        INSERT INTO sales_daily (restaurant_id, day, orders, revenue)
+        VALUES (COALESCE(NEW.restaurant_id, 0), DATE(NEW.created_at), 1, COALESCE(NEW.total, 0))
+        ON CONFLICT (restaurant_id, day) DO UPDATE SET orders = orders + 1, revenue = revenue + excluded.revenue;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_orders_sales_del AFTER DELETE ON orders BEGIN
+        UPDATE sales_hourly SET orders = orders - 1, revenue = revenue - COALESCE(OLD.total, 0)
+        WHERE restaurant_id = COALESCE(OLD.restaurant_id, 0) AND hour = strftime('%Y-%m-%d %H:00', OLD.created_at);
+        UPDATE sales_daily SET orders = orders - 1, revenue = revenue - COALESCE(OLD.total, 0)
+        WHERE restaurant_id = COALESCE(OLD.restaurant_id, 0) AND day = DATE(OLD.created_at);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_orders_sales_upd AFTER UPDATE OF total, created_at, restaurant_id ON orders BEGIN
+        UPDATE sales_hourly SET orders = orders - 1, revenue = revenue - COALESCE(OLD.total, 0)
+        WHERE restaurant_id = COALESCE(OLD.restaurant_id, 0) AND hour = strftime('%Y-%m-%d %H:00', OLD.created_at);
+        UPDATE sales_daily SET orders = orders - 1, revenue = revenue - COALESCE(OLD.total, 0)
+        WHERE restaurant_id = COALESCE(OLD.restaurant_id, 0) AND day = DATE(OLD.created_at);
+        INSERT INTO sales_hourly (restaurant_id, hour, orders, revenue)
+        VALUES (COALESCE(NEW.restaurant_id, 0), strftime('%Y-%m-%d %H:00', NEW.created_at), 1, COALESCE(NEW.total, 0))
+        ON CONFLICT (restaurant_id, hour) DO UPDATE SET orders = orders + 1, revenue = revenue + excluded.revenue;
+        INSERT INTO sales_daily (restaurant_id, day, orders, revenue)
+        VALUES (COALESCE(NEW.restaurant_id, 0), DATE(NEW.created_at), 1, COALESCE(NEW.total, 0))
+        ON CONFLICT (restaurant_id, day) DO UPDATE SET orders = orders + 1, revenue = revenue + excluded.revenue;
+    END""",
+    """INSERT OR REPLACE INTO sales_hourly (restaurant_id, hour, orders, revenue)
+    SELECT COALESCE(restaurant_id, 0), strftime('%Y-%m-%d %H:00', created_at), COUNT(*), COALESCE(SUM(total), 0)
+    FROM orders GROUP BY 1, 2""",
+    """INSERT OR REPLACE INTO sales_daily (restaurant_id, day, orders, revenue)
+    SELECT COALESCE(restaurant_id, 0), DATE(created_at), COUNT(*), COALESCE(SUM(total), 0)
+    FROM orders GROUP BY 1, 2""",
+]
+
+STATUS_MACHINE = [
+    # allowed order status moves; keyed by target so "which statuses may move to X" is a prefix lookup
+    """CREATE TABLE IF NOT EXISTS status_transitions (
+        to_status TEXT NOT NULL,
+        from_status TEXT NOT NULL,
+        PRIMARY KEY (to_status, from_status)
+    ) WITHOUT ROWID""",
+    """INSERT OR IGNORE INTO status_transitions (to_status, from_status)
+    VALUES ('preparing', 'pending'), ('ready', 'preparing'), ('delivered', 'ready')""",
+    """CREATE TABLE IF NOT EXISTS order_status_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id INTEGER NOT NULL,
+        from_status TEXT,
+        to_status TEXT,
+        changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_order_status_history_order ON order_status_history(order_id)",
+    # every status change, from any code path, gets its timestamp
+    """CREATE TRIGGER IF NOT EXISTS trg_orders_status_history AFTER UPDATE OF status ON orders
+    WHEN OLD.status IS NOT NEW.status BEGIN
+        INSERT INTO order_status_history (order_id, from_status, to_status) VALUES (NEW.id, OLD.status, NEW.status);
+    END""",
+]
+
+ARCHIVE = [
+    # set for the length of an archive batch (archive.py): the live delete must not
+    # take archived orders out of the history rollups
+    """CREATE TABLE IF NOT EXISTS maintenance_flags (
+        name TEXT PRIMARY KEY
+    ) WITHOUT ROWID""",
+    # lifetime courier earnings without reading the archive
+    """CREATE TABLE IF NOT EXISTS courier_archived (
+        delivery_id INTEGER PRIMARY KEY,
+        deliveries INTEGER NOT NULL DEFAULT 0,
+        total REAL NOT NULL DEFAULT 0
+    )""",
+    "DROP TRIGGER IF EXISTS trg_orders_rollup_del",
+    """CREATE TRIGGER trg_orders_rollup_del AFTER DELETE ON orders BEGIN
+        UPDATE daily_order_stats SET orders = orders - 1, revenue = revenue - COALESCE(OLD.total, 0)
+        WHERE day = DATE(OLD.created_at) AND restaurant_id = COALESCE(OLD.restaurant_id, 0)
+          AND status = COALESCE(OLD.status, '')
+          AND NOT EXISTS (SELECT 1 FROM maintenance_flags WHERE name = 'archiving');
+        UPDATE monthly_order_stats SET orders = orders - 1, revenue = revenue - COALESCE(OLD.total, 0)
+        WHERE month = strftime('%Y-%m', OLD.created_at)
+          AND NOT EXISTS (SELECT 1 FROM maintenance_flags WHERE name = 'archiving');
+        UPDATE entity_counts SET value = value - 1
+        WHERE name IN ('orders', 'orders:' || COALESCE(OLD.status, ''));
+    END""",
+    "DROP TRIGGER IF EXISTS trg_orders_sales_del",
+    """CREATE TRIGGER trg_orders_sales_del AFTER DELETE ON orders
+    WHEN NOT EXISTS (SELECT 1 FROM maintenance_flags WHERE name = 'archiving') BEGIN
+        UPDATE sales_hourly SET orders = orders - 1, revenue = revenue - COALESCE(OLD.total, 0)
+        WHERE restaurant_id = COALESCE(OLD.restaurant_id, 0) AND hour = strftime('%Y-%m-%d %H:00', OLD.created_at);
+        UPDATE sales_daily SET orders = orders - 1, revenue = revenue - COALESCE(OLD.total, 0)
+        WHERE restaurant_id = COALESCE(OLD.restaurant_id, 0) AND day = DATE(OLD.created_at);
+    END""",
+]
+
+SESSIONS = [
+    # login sessions: the browser holds the token, only its hash is stored (see auth.py)
+    """CREATE TABLE IF NOT EXISTS sessions (
+        token_hash TEXT PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        expires INTEGER NOT NULL
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires)",
+]
+
+RESTAURANT_SORTS = [
+    # the restaurants grid's sorts, in the grid's (sort value, id) keyset order
+    "CREATE INDEX IF NOT EXISTS idx_restaurants_name ON restaurants(name, id)",
+    "CREATE INDEX IF NOT EXISTS idx_restaurants_rating ON restaurants(rating, id)",
+]
+
+MIGRATIONS = [
+    (1, "base schema", base_schema),
+    (2, "order hot-path indexes", ORDER_INDEXES),
+    (3, "dashboard rollup tables", rollup_tables),
+    (4, "per-table change counters", change_counters),
+    (5, "restaurant, user and drop locations", LOCATIONS),
+    (6, "normalized order_items", ORDER_ITEMS),
+    (7, "restaurant city", CITIES),
+    (8, "menu full-text search", menu_search),
+    (9, "order list paging indexes", ORDER_PAGES),
+    (10, "admin grid indexes", ADMIN_GRIDS),
+    (11, "per-restaurant sales buckets", SALES_BUCKETS),
+    (12, "order status machine and history", STATUS_MACHINE),
+    (13, "order archive bookkeeping", ARCHIVE),
+    (14, "login sessions", SESSIONS),
+    (15, "restaurant grid sort indexes", RESTAURANT_SORTS),
+]
+
+LATEST = MIGRATIONS[-1][0]
+
+def hot_queries():
+    """{name: (sql, params)} of the hot queries, taken from the modules that run
+    them, with sample parameters.  bench.py plans fails if any of them falls
+    back to a full scan or a temp b-tree.
+    """
+    # not at the top: these modules import db, which imports this one
+    import auth
+    import dispatch
+    import grids
+    import menu_import
+    import orders
+    import reports
+    import sales
+    import search
+    queries = {
+        'login': (auth.USER_BY_PHONE, ('',)),
+        'session_user': (auth.SESSION_USER, ('', 0)),
+        'restaurant_lookup': (auth.OWNER_RESTAURANT, (1,)),
+        'restaurant_menu': (menu_import.RESTAURANT_MENU, (1,)),
+        'restaurant_orders_page': orders.page_query('restaurant_id', 1, None),
+        'restaurant_status_page': orders.page_query('restaurant_id', 1, 'ready', before=100),
+        'restaurant_open_page': orders.page_query('restaurant_id', 1, before=100),
+        'customer_orders_page': orders.page_query('customer_id', 1, None),
+        'customer_open_page': orders.page_query('customer_id', 1, before=100),
+        'order_lines': (orders.ITEMS.format(schema='', marks='?,?'), (1, 2)),
+        'status_history': (orders.HISTORY.format(schema='', marks='?,?'), (1, 2)),
+        'status_transition': orders.transition_query([1, 2], 'ready', restaurant_id=1),
+        'courier_delivered': orders.transition_query([1], 'delivered', delivery_id=1),
+        'courier_earnings': (orders.EARNINGS, (1,)),
+        'courier_available': (dispatch.READY_ORDERS, (dispatch.MAX_CANDIDATES,)),
+        'dispatch_couriers': (dispatch.IDLE_COURIERS, ()),
+        'dispatch_orders': (dispatch.READY_PICKUPS, (dispatch.MAX_CANDIDATES * 5,)),
+        'courier_claim': (dispatch.CLAIM, (1, 1)),
+        'courier_active': (dispatch.COURIER_ACTIVE, (1,)),
+        'fleet_orders': (dispatch.FLEET_ORDERS, ()),
+        'fleet_couriers': (dispatch.FLEET_COURIERS, ()),
+        # BESTSELLERS then sorts the one row per dish that SOLD returns
+        'bestsellers': (reports.SOLD.format(table='order_items', cap=''), (1,)),
+        'dashboard_totals': (reports.DASHBOARD_TOTALS, ()),
+        'dashboard_counts': (reports.DASHBOARD_COUNTS, ()),
+        'sales_hourly': (sales.HOURLY, (1, '2024')),
+        'sales_daily': (sales.DAILY, (1, '2024')),
+        # search_menu then ranks this bounded window
+        'menu_search': (search.MENU_WINDOW, ('"bir"*', search.RANK_WINDOW)),
+        'restaurant_search': (search.RESTAURANT_MATCH, ('"bir"*', 5)),
+    }
+    # every admin grid as it first opens, then the filters that have an index of their own
+    for name, grid in grids.GRIDS.items():
+        queries[f'admin_{name}'] = grid.query({})
+    admin = grids.GRIDS
+    queries.update({
+        'admin_orders_status': admin['orders'].query({'status': 'ready'}, after=(100, 100)),
+        'admin_orders_tracking': admin['orders'].query({'tracking_id': 'T'}),
+        'admin_delivery_status': admin['delivery'].query({'status': 1}, descending=False, after=(0, 0)),
+        'admin_delivery_phone': admin['delivery'].query({'phone': '98'}),
+    })
+    for sort in admin['restaurants'].sorts[1:]:
+        queries[f'admin_restaurants_{sort}'] = admin['restaurants'].query({}, sort)
+        queries[f'admin_restaurants_{sort}_asc'] = admin['restaurants'].query({}, sort, descending=False)
+    return queries
+
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target=LATEST):
+    """Apply every pending migration up to target; returns the new version."""
+    version = current_version(conn)
+    for number, _, step in MIGRATIONS:
+        if number <= version or number > target:
+            continue
+        if callable(step):
+            step(conn)
+        else:
+            for sql in step:
+                conn.execute(sql)
+        conn.execute(f"PRAGMA user_version={number}")
+        version = number
+    return version
+
+
+def plan_problems(conn, queries=None):
+    """Return {name: [plan rows]} for hot queries that scan or sort in a temp b-tree.
+
+    Scanning a partial index is fine: it only holds the rows the query wants,
+    and so is a virtual table scan driven by its own index (FTS5 MATCH), a scan
+    of a subquery's own result, and a query without WHERE walking the table in
+    its ORDER BY, which stops at the LIMIT.
+    """
+    partial = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='index' AND sql LIKE '% WHERE %'")}
+    problems = {}
+    for name, (sql, params) in (queries or hot_queries()).items():
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        sorts = [step for step in plan if 'TEMP B-TREE' in step]
+        paged = not sorts and ' WHERE ' not in sql and sql.rstrip().endswith('LIMIT ?')
+        derived = {'CONSTANT'} | {step.split()[-1] for step in plan if step.startswith(('CO-ROUTINE', 'MATERIALIZE'))}
+        bad = sorts + [step for step in plan
+                       if step.startswith('SCAN') and not paged and step.split()[1] not in derived
+                       and step.split()[-1] not in partial and 'VIRTUAL TABLE INDEX' not in step]
+        if bad:
+            problems[name] = plan
+    return problems
@@ -0,0 +1,246 @@
+"""Order write paths and order line items."""
+import ast
+import json
+import random
+
+import analytics
+import archive
+import db
+import trending
+
+BACKFILL_JOB = 'order_items_backfill'
+STATUSES = ['pending', 'preparing', 'ready', 'delivered']
+# what each side may do; the status_transitions table has the final word
+RESTAURANT_MOVES = ('preparing', 'ready')
+NEXT_STATUS = {'pending': 'preparing', 'preparing': 'ready', 'ready': 'delivered'}
+PAGE_SIZE = 20
+# must read exactly like the WHERE of the partial idx_*_open indexes
+OPEN_FILTER = "status IN ('pending', 'preparing', 'ready')"
+
+EARNINGS = """
+    SELECT l.deliveries + COALESCE(a.deliveries, 0) as deliveries,
+           (l.total + COALESCE(a.total, 0)) * 0.2 as earnings
+    FROM (
+        SELECT COUNT(*) as deliveries, COALESCE(SUM(total), 0) as total
+        FROM orders WHERE delivery_id=?1 AND status='delivered'
+    ) l
+    LEFT JOIN courier_archived a ON a.delivery_id = ?1
+"""
+# {schema} is '' or 'archive.', {marks} one ? per order id (see _by_order)
+HISTORY = ("SELECT order_id, from_status, to_status, changed_at FROM {schema}order_status_history "
+           "WHERE order_id IN ({marks}) ORDER BY order_id, id")
+ITEMS = ("SELECT order_id, name, qty, price FROM {schema}order_items "
+         "WHERE order_id IN ({marks}) ORDER BY order_id, id")
+
+
+def place_order(customer_id, restaurant_id, cart):
+    """Insert the order and its order_items rows atomically; returns the tracking id.
+
+    Goes through the group-commit writer, so concurrent checkouts share commits.
+
+    Cart entries are dicts with name, price, qty and, for items picked from
+    the menu, the menu_items id under 'id'.
+    """
+    tracking = f'TRACK{random.randint(1000, 9999)}'
+    total = sum(item['price'] * item['qty'] for item in cart)
+
+    def write(conn):
+        # VALUES, not INSERT ... SELECT FROM users: a missing user must not skip the
+        # insert and leave lastrowid pointing at somebody else's order
+        order_id = conn.execute(
+            "INSERT INTO orders (customer_id, restaurant_id, items_json, total, tracking_id, drop_lat, drop_lon) "
+            "VALUES (?1, ?2, ?3, ?4, ?5, (SELECT lat FROM users WHERE id=?1), (SELECT lon FROM users WHERE id=?1))",
+            (customer_id, restaurant_id, json.dumps(cart, ensure_ascii=False), total, tracking)
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO order_items (order_id, restaurant_id, menu_item_id, name, qty, price) VALUES (?, ?, ?, ?, ?, ?)",
+            [(order_id, restaurant_id, item.get('id'), item['name'], item['qty'], item['price']) for item in cart]
+        )
+        return order_id
+
+    db.write(write)
+    trending.trending.record_order(restaurant_id, [(item.get('id'), item['qty']) for item in cart])
+    return tracking
+
+
+def page(owner_column, owner_id, status='open', before=None, limit=PAGE_SIZE):
+    """One keyset page of a restaurant's or customer's orders, newest first.
+
+    status is 'open', None for every order, or a single status.  before is the
+    id of the last order on the previous page.  Returns (rows, has_more).
+    """
+    found = db.rows(*page_query(owner_column, owner_id, status, before, limit))
+    # archived (old, delivered) orders matter only once the page reaches below the newest of them
+    if status in (None, 'delivered'):
+        newest_archived = archive.max_id()
+        if newest_archived and (len(found) <= limit or found[limit].id < newest_archived):
+            older = archive.page(owner_column, owner_id, status, before, limit + 1)
+            found = sorted(found + older, key=lambda o: o.id, reverse=True)[:limit + 1]
+    return found[:limit], len(found) > limit
+
+
+def page_query(owner_column, owner_id, status='open', before=None, limit=PAGE_SIZE):
+    """(sql, params) of page(): limit + 1 live orders, to tell whether more follow."""
+    if owner_column not in ('restaurant_id', 'customer_id'):
+        raise ValueError(owner_column)
+    where, params = [f"{owner_column}=?"], [owner_id]
+    if status == 'open':
+        where.append(OPEN_FILTER)
+    elif status:
+        where.append("status=?")
+        params.append(status)
+    if before is not None:
+        where.append("id < ?")
+        params.append(before)
+    return f"SELECT * FROM orders WHERE {' AND '.join(where)} ORDER BY id DESC LIMIT ?", (*params, limit + 1)
+
+
+def transition(order_ids, to_status, restaurant_id=None, delivery_id=None):
+    """Move many orders to to_status atomically; returns the ids that moved.
+
+    Only orders whose current status may move to to_status (status_transitions)
+    and that belong to the given restaurant / courier are touched; the rest
+    are left as they are.  The history trigger stamps every move.
+    """
+    order_ids = list(order_ids)
+    if not order_ids:
+        return []
+    sql, params = transition_query(order_ids, to_status, restaurant_id, delivery_id)
+    return db.write(lambda conn: [row[0] for row in conn.execute(sql, params).fetchall()])
+
+
+def transition_query(order_ids, to_status, restaurant_id=None, delivery_id=None):
+    """(sql, params) of the UPDATE ... RETURNING id that transition() runs."""
+    marks = ','.join('?' * len(order_ids))
+    where = [f"id IN ({marks})", "status IN (SELECT from_status FROM status_transitions WHERE to_status=?)"]
+    params = [*order_ids, to_status]
+    if restaurant_id is not None:
+        where.append("restaurant_id=?")
+        params.append(restaurant_id)
+    if delivery_id is not None:
+        where.append("delivery_id=?")
+        params.append(delivery_id)
+    return f"UPDATE orders SET status=? WHERE {' AND '.join(where)} RETURNING id", (to_status, *params)
+
+
+def courier_earnings(delivery_id):
+    """Row(deliveries, earnings) over the courier's whole history, archived deliveries included."""
+    if analytics.active():
+        return analytics.courier_earnings(delivery_id)
+    return db.one(EARNINGS, (delivery_id,))
+
+
+def history_for(order_ids):
+    """{order_id: [Row(from_status, to_status, changed_at)]} oldest first."""
+    return _by_order(HISTORY, order_ids)
+
+
+def items_for(order_ids):
+    """{order_id: [Row(name, qty, price)]} for a page of orders, in one query."""
+    return _by_order(ITEMS, order_ids)
+
+
+def _by_order(sql, order_ids):
+    # live tables first; ids they do not know may have been archived
+    if not order_ids:
+        return {}
+    grouped = {}
+    for row in db.rows(sql.format(schema='', marks=','.join('?' * len(order_ids))), tuple(order_ids)):
+        grouped.setdefault(row.order_id, []).append(row)
+    missing = [order_id for order_id in order_ids if order_id not in grouped]
+    if missing:
+        newest_archived = archive.max_id()
+        missing = [order_id for order_id in missing if order_id <= newest_archived]
+    if missing:
+        with archive.attached():
+            for row in db.rows(sql.format(schema='archive.', marks=','.join('?' * len(missing))), tuple(missing)):
+                grouped.setdefault(row.order_id, []).append(row)
+    return grouped
+
+
+def parse_items_json(text):
+    """Legacy items_json is either JSON or a Python repr of the cart list.
+
+    Raises ValueError when it is neither, or holds something other than a
+    list (or a single dict) of items.
+    """
+    if not text:
+        return []
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        try:
+            parsed = ast.literal_eval(text)
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            raise ValueError("items_json is neither JSON nor a Python literal") from None
+    if isinstance(parsed, dict):
+        parsed = [parsed]
+    if not isinstance(parsed, list):
+        raise ValueError(f"items_json holds a {type(parsed).__name__}, not a list")
+    return [item for item in parsed if isinstance(item, dict) and item.get('name')]
+
+
+def _backfill_lines(order_id, restaurant_id, items_json, total, menu):
+    # order_items rows for one legacy order; ValueError / TypeError / AttributeError when malformed
+    items = parse_items_json(items_json)
+    quantities = [int(item.get('qty') or 1) for item in items]
+    lines = []
+    for item, qty in zip(items, quantities):
+        name = str(item['name'])
+        match = menu.get((restaurant_id, name.lower())) or menu.get((None, name.lower()))
+        price = item.get('price')
+        if price is None:
+            price = match.price if match else (total or 0) / max(sum(quantities), 1)
+        lines.append((order_id, restaurant_id, match.id if match else None, name, qty, float(price)))
+    return lines
+
+
+def backfill_order_items(batch_size=1000, progress=None):
+    """One-time streaming migration of orders.items_json into order_items.
+
+    Walks orders by id in batches, one transaction per batch, and stores the
+    last processed id in job_state so an interrupted run resumes where it
+    stopped.  Orders that already have lines are skipped, and so are orders
+    whose items_json cannot be read.  Returns (converted, malformed).
+    """
+    menu = {}
+    for item in db.rows("SELECT id, restaurant_id, name, price FROM menu_items"):
+        if not item.name:
+            continue  # nothing to match a cart line against
+        menu.setdefault((item.restaurant_id, item.name.lower()), item)
+        menu.setdefault((None, item.name.lower()), item)
+    converted = malformed = 0
+
+    def batch(conn):
+        nonlocal malformed
+        last = conn.execute("SELECT value FROM job_state WHERE name=?", (BACKFILL_JOB,)).fetchone()
+        last = last[0] if last else 0
+        found = conn.execute(
+            "SELECT id, restaurant_id, items_json, total FROM orders o WHERE id > ? "
+            "AND NOT EXISTS (SELECT 1 FROM order_items i WHERE i.order_id=o.id) ORDER BY id LIMIT ?",
+            (last, batch_size)
+        ).fetchall()
+        lines = []
+        for order_id, restaurant_id, items_json, total in found:
+            try:
+                lines += _backfill_lines(order_id, restaurant_id, items_json, total, menu)
+            except (ValueError, TypeError, AttributeError):
+                malformed += 1  # left without lines; the job moves past it
+        conn.executemany(
+            "INSERT INTO order_items (order_id, restaurant_id, menu_item_id, name, qty, price) VALUES (?, ?, ?, ?, ?, ?)",
+            lines
+        )
+        if found:
+            conn.execute(
+                "INSERT INTO job_state (name, value) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET value=excluded.value",
+                (BACKFILL_JOB, found[-1][0])
+            )
+        return len(found)
+
+    while True:
+        done = db.transaction(batch)
+        if not done:
+            return converted - malformed, malformed
+        converted += done
+        if progress:
+            progress(converted)
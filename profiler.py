@@ -0,0 +1,144 @@
+"""Query and panel profiler for the superadmin performance panel.
+
+db.py reports every call here while ``enabled`` is set: SQL text, the shape
+of its parameters, duration, row count and the panel that was rendering.
+Calls slower than SLOW_MS also carry their EXPLAIN QUERY PLAN.  Records go
+into fixed-size ring buffers; per-statement totals are kept alongside so
+the top list covers everything since the last reset, not just the ring.
+
+Switched off, the cost is one module attribute check per DB call.  It is
+off unless FOODTIGER_PROFILE=1 or a superadmin turns it on; the setting is
+process-wide, like the data it collects.
+"""
+import collections
+import contextlib
+import functools
+import os
+import re
+import threading
+import time
+
+RING_SIZE = 5000
+SLOW_SIZE = 200
+PANEL_RING_SIZE = 5000
+SLOW_MS = 50.0
+MAX_STATEMENTS = 1000
+# upper bounds of the latency histogram buckets, in ms
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, float('inf'))
+
+Query = collections.namedtuple('Query', 'at sql shape ms rows panel plan')
+PanelRun = collections.namedtuple('PanelRun', 'at panel ms')
+
+enabled = os.environ.get('FOODTIGER_PROFILE') == '1'
+queries = collections.deque(maxlen=RING_SIZE)
+slow = collections.deque(maxlen=SLOW_SIZE)
+panels = collections.deque(maxlen=PANEL_RING_SIZE)
+_totals = {}  # normalized sql -> [calls, total ms, max ms, rows]
+_lock = threading.Lock()
+_local = threading.local()
+_SPACE = re.compile(r'\s+')
+
+
+def current_panel():
+    return getattr(_local, 'panel', None)
+
+
+def params_shape(params):
+    """'int, str' style summary of a parameter tuple; values are never kept."""
+    if isinstance(params, dict):
+        return ', '.join(f':{name}' for name in params)
+    names = [type(p).__name__ for p in params]
+    if len(names) > 6:
+        return f"{len(names)} x {'/'.join(sorted(set(names)))}"
+    return ', '.join(names)
+
+
+def record(sql, params, seconds, rows, plan=None):
+    ms = seconds * 1000
+    text = _SPACE.sub(' ', sql).strip()
+    query = Query(time.time(), text, params_shape(params), ms, rows, current_panel(), plan)
+    queries.append(query)
+    if plan is not None:
+        slow.append(query)
+    with _lock:
+        totals = _totals.get(text)
+        if totals is None:
+            if len(_totals) >= MAX_STATEMENTS:
+                return
+            totals = _totals[text] = [0, 0.0, 0.0, 0]
+        totals[0] += 1
+        totals[1] += ms
+        totals[2] = max(totals[2], ms)
+        totals[3] += rows or 0
+
+
+def is_slow(seconds):
+    return seconds * 1000 >= SLOW_MS
+
+
+@contextlib.contextmanager
+def panel(name):
+    """Time a panel's render and tag the queries it runs.  Nested uses keep the outer panel."""
+    if not enabled or current_panel() is not None:
+        yield
+        return
+    _local.panel = name
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.panel = None
+        panels.append(PanelRun(time.time(), name, (time.perf_counter() - start) * 1000))
+
+
+def keep_panel(fn):
+    """For fragments: a fragment-only rerun is profiled under the panel that defined it."""
+    name = current_panel()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        if name is None:
+            return fn(*args, **kwargs)
+        with panel(name):
+            return fn(*args, **kwargs)
+    return run
+
+
+def top_queries(n=20, by='total_ms'):
+    """[dict(sql, calls, total_ms, avg_ms, max_ms, rows)] sorted by `by`, largest first."""
+    with _lock:
+        found = [
+            {'sql': sql, 'calls': calls, 'total_ms': round(total, 2), 'avg_ms': round(total / calls, 3),
+             'max_ms': round(worst, 2), 'rows': rows}
+            for sql, (calls, total, worst, rows) in _totals.items()
+        ]
+    return sorted(found, key=lambda q: q[by], reverse=True)[:n]
+
+
+def panel_stats():
+    """{panel: dict(runs, p50_ms, p95_ms, max_ms, buckets)} over the panel ring."""
+    by_panel = {}
+    for run in list(panels):
+        by_panel.setdefault(run.panel, []).append(run.ms)
+    stats = {}
+    for name, times in sorted(by_panel.items()):
+        times.sort()
+        buckets = [0] * len(BUCKETS_MS)
+        for ms in times:
+            buckets[next(i for i, upper in enumerate(BUCKETS_MS) if ms <= upper)] += 1
+        stats[name] = {
+            'runs': len(times),
+            'p50_ms': round(times[len(times) // 2], 1),
+            'p95_ms': round(times[min(len(times) - 1, int(len(times) * 0.95))], 1),
+            'max_ms': round(times[-1], 1),
+            'buckets': buckets,
+        }
+    return stats
+
+
+def reset():
+    queries.clear()
+    slow.clear()
+    panels.clear()
+    with _lock:
+        _totals.clear()
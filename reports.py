@@ -0,0 +1,77 @@
+"""Read side of the dashboards, served from the rollup tables (see migrations.py),
+or from the Parquet snapshot in analytics mode (see analytics.py)."""
+import analytics
+import archive
+import db
+
+
+def dashboard_summary():
+    if analytics.active():
+        return analytics.dashboard_summary()
+    today, month = db.one(DASHBOARD_TOTALS)
+    counts = dict(db.rows(DASHBOARD_COUNTS))
+    return {
+        'today_orders': today,
+        'month_orders': month,
+        'approved_restaurants': counts.get('restaurants:approved', 0),
+        'customers': counts.get('role:customer', 0),
+    }
+
+
+def status_breakdown():
+    if analytics.active():
+        return analytics.status_breakdown()
+    # archived orders are counted apart from the live table (see archive.py)
+    return db.read_df(
+        "SELECT status, count FROM ("
+        "  SELECT substr(e.name, 8) as status, e.value + COALESCE(a.value, 0) as count"
+        "  FROM entity_counts e LEFT JOIN entity_counts a ON a.name = 'archived:' || substr(e.name, 8)"
+        "  WHERE e.name > 'orders:' AND e.name < 'orders;'"
+        ") WHERE count > 0"
+    )
+
+
+def revenue_trend():
+    if analytics.active():
+        return analytics.revenue_trend()
+    return db.read_df(
+        "SELECT month, revenue FROM monthly_order_stats WHERE orders > 0 ORDER BY month"
+    )
+
+
+def bestsellers(restaurant_id, limit=10):
+    """Dishes by quantity sold, with revenue, from the order_items index (and the archive's, once there is one)."""
+    if analytics.active():
+        return analytics.bestsellers(restaurant_id, limit)
+    sold = SOLD.format(table='order_items', cap='')
+    newest_archived = archive.max_id()
+    if not newest_archived:
+        return db.read_df(BESTSELLERS.format(sold=sold), (restaurant_id, limit))
+    # each file is summed on its own covering index; only the per-dish totals are merged
+    sold = (f"SELECT menu_item_id, MAX(name) as name, SUM(qty) as qty, SUM(revenue) as revenue FROM ("
+            f"{sold} UNION ALL {SOLD.format(table='archive.order_items', cap=' AND order_id <= ?3')}"
+            f") GROUP BY menu_item_id")
+    with archive.attached():
+        return db.read_df(BESTSELLERS.format(sold=sold), (restaurant_id, limit, newest_archived))
+
+
+DASHBOARD_TOTALS = """
+    SELECT (SELECT COALESCE(SUM(orders), 0) FROM daily_order_stats WHERE day = DATE('now')),
+           (SELECT COALESCE(SUM(orders), 0) FROM monthly_order_stats WHERE month = strftime('%Y-%m', 'now'))
+"""
+
+DASHBOARD_COUNTS = "SELECT name, value FROM entity_counts WHERE name IN ('restaurants:approved', 'role:customer')"
+
+SOLD = """
+    SELECT menu_item_id, MAX(name) as name, SUM(qty) as qty, SUM(qty * price) as revenue
+    FROM {table} WHERE restaurant_id=?1{cap}
+    GROUP BY menu_item_id
+"""
+
+BESTSELLERS = """
+    SELECT COALESCE(m.name, s.name) as dish, s.qty, s.revenue
+    FROM ({sold}) s
+    LEFT JOIN menu_items m ON m.id = s.menu_item_id
+    ORDER BY s.qty DESC
+    LIMIT ?2
+"""
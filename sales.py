@@ -0,0 +1,121 @@
+"""Per-restaurant sales series for the sales panel.
+
+Reads the trigger-maintained sales_hourly / sales_daily buckets (see
+migrations.py), never the orders table, and caps every series at
+MAX_POINTS so the chart payload stays the same size for any history.
+In analytics mode the same buckets come from the Parquet snapshot.
+"""
+import collections
+import datetime
+import math
+
+import analytics
+import db
+
+MAX_POINTS = 120
+# range key -> days back from now; None is the whole history
+RANGES = {'24h': 1, '7d': 7, '30d': 30, '90d': 90, '1y': 365, 'all': None}
+GRANULARITIES = ('hour', 'day', 'week', 'month')
+
+HOURLY = ("SELECT hour as bucket, orders, revenue FROM sales_hourly "
+          "WHERE restaurant_id=? AND hour >= ? ORDER BY hour")
+DAILY = ("SELECT day as bucket, orders, revenue FROM sales_daily "
+         "WHERE restaurant_id=? AND day >= ? ORDER BY day")
+
+Point = collections.namedtuple('Point', 'bucket orders revenue')
+
+
+def granularities(range_key):
+    """Granularities worth offering for a range: hours only up to a month, months only past two."""
+    days = RANGES[range_key]
+    allowed = []
+    if days is not None and days <= 30:
+        allowed.append('hour')
+    if days is None or days >= 2:
+        allowed.append('day')
+    if days is None or days >= 14:
+        allowed.append('week')
+    if days is None or days >= 60:
+        allowed.append('month')
+    return allowed
+
+
+def _bucket_key(granularity):
+    if granularity == 'week':
+        # weeks start on Monday
+        def week(day):
+            date = datetime.date.fromisoformat(day)
+            return (date - datetime.timedelta(days=date.weekday())).isoformat()
+        return week
+    if granularity == 'month':
+        return lambda day: day[:7]
+    return lambda bucket: bucket
+
+
+def _units(granularity):
+    # (bucket -> bucket number, bucket number -> bucket), consecutive buckets one apart
+    if granularity == 'hour':
+        epoch = datetime.datetime(2000, 1, 1)
+        return (lambda bucket: int((datetime.datetime.fromisoformat(bucket) - epoch).total_seconds()) // 3600,
+                lambda n: (epoch + datetime.timedelta(hours=n)).strftime('%Y-%m-%d %H:00'))
+    if granularity == 'month':
+        return lambda bucket: int(bucket[:4]) * 12 + int(bucket[5:7]) - 1, lambda n: f'{n // 12:04d}-{n % 12 + 1:02d}'
+    if granularity == 'week':
+        # ordinal 1 is a Monday
+        return (lambda bucket: (datetime.date.fromisoformat(bucket).toordinal() - 1) // 7,
+                lambda n: datetime.date.fromordinal(n * 7 + 1).isoformat())
+    return lambda bucket: datetime.date.fromisoformat(bucket).toordinal(), lambda n: datetime.date.fromordinal(n).isoformat()
+
+
+def downsample(points, granularity, first, last, max_points=MAX_POINTS):
+    """Sum the buckets into at most max_points equal windows of first..last; totals are kept exact.
+
+    Every window spans the same number of buckets and is labelled with its
+    first one, so a stretch without sales stays as wide on the chart as it was.
+    """
+    to_unit, to_bucket = _units(granularity)
+    start = to_unit(first)
+    width = math.ceil((to_unit(last) - start + 1) / max_points)
+    if width <= 1:
+        return points
+    windows = {}
+    for point in points:
+        window = start + (to_unit(point.bucket) - start) // width * width
+        orders, revenue = windows.get(window, (0, 0))
+        windows[window] = (orders + point.orders, revenue + point.revenue)
+    return [Point(to_bucket(window), orders, revenue) for window, (orders, revenue) in sorted(windows.items())]
+
+
+def series(restaurant_id, range_key='30d', granularity='day', max_points=MAX_POINTS, now=None):
+    """[Point(bucket, orders, revenue)] oldest first, at most max_points long."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(granularity)
+    days = RANGES[range_key]
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    if granularity == 'hour':
+        since = (now - datetime.timedelta(days=days or 36500)).strftime('%Y-%m-%d %H:00')
+    else:
+        since = (now - datetime.timedelta(days=days)).strftime('%Y-%m-%d') if days else ''
+    if analytics.active():
+        found = analytics.sales_buckets(restaurant_id, granularity == 'hour', since)
+    elif granularity == 'hour':
+        found = db.rows(HOURLY, (restaurant_id, since))
+    else:
+        found = db.rows(DAILY, (restaurant_id, since))
+    key = _bucket_key(granularity)
+    points = []
+    for row in found:
+        if not row.orders:
+            continue
+        bucket = key(row.bucket)
+        if points and points[-1].bucket == bucket:
+            last = points[-1]
+            points[-1] = Point(bucket, last.orders + row.orders, last.revenue + row.revenue)
+        else:
+            points.append(Point(bucket, row.orders, row.revenue))
+    if not points:
+        return points
+    # the whole range, not just the buckets with sales, sets the window width
+    first = key(since) if days else points[0].bucket
+    last = key(now.strftime('%Y-%m-%d %H:00' if granularity == 'hour' else '%Y-%m-%d'))
+    return downsample(points, granularity, min(first, points[0].bucket), max(last, points[-1].bucket), max_points)
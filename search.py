@@ -0,0 +1,135 @@
+"""Menu search over dish names (English, Devanagari and romanized Hindi) and
+restaurant names, backed by the FTS5 tables created in migrations.py.
+
+Triggers keep the index in step with menu_items and restaurants, so every
+insert, edit or delete from the restaurant panels is searchable at once.
+"""
+import re
+import unicodedata
+
+import db
+
+RESULT_LIMIT = 20
+MIN_PREFIX = 2
+# bm25 costs a few microseconds per hit, and a two-letter prefix can hit a
+# third of the menu; only the newest RANK_WINDOW hits are ranked.
+RANK_WINDOW = 300
+
+MENU_WINDOW = "SELECT rowid, rank FROM menu_search WHERE menu_search MATCH ? ORDER BY rowid DESC LIMIT ?"
+MENU_MATCH = f"""
+    SELECT m.id, m.restaurant_id, m.name, m.hindi_name, m.price, m.image_path, r.name as restaurant
+    FROM ({MENU_WINDOW}) s
+    JOIN menu_items m ON m.id = s.rowid
+    JOIN restaurants r ON r.id = m.restaurant_id
+    WHERE m.is_available=1 AND r.is_approved=1
+    ORDER BY s.rank
+    LIMIT ?
+"""
+RESTAURANT_MATCH = """
+    SELECT r.id, r.name, r.rating, r.city
+    FROM restaurant_search s JOIN restaurants r ON r.id = s.rowid
+    WHERE restaurant_search MATCH ? AND r.is_approved=1
+    ORDER BY s.rank
+    LIMIT ?
+"""
+
+# Devanagari vowel signs, virama, anusvara etc. are combining marks, which
+# unicode61 would otherwise treat as separators and split every word apart.
+DEVANAGARI_MARKS = ''.join(
+    chr(c) for c in range(0x0900, 0x0980) if unicodedata.category(chr(c)).startswith('M')
+)
+TOKENIZER = f"unicode61 remove_diacritics 2 tokenchars '{DEVANAGARI_MARKS}'"
+_TOKEN = re.compile(r'[\wऀ-ॿ]+')
+
+# casual romanization, the way people type Hindi on a phone keyboard
+_VOWELS = {
+    'अ': 'a', 'आ': 'a', 'इ': 'i', 'ई': 'i', 'उ': 'u', 'ऊ': 'u', 'ऋ': 'ri',
+    'ए': 'e', 'ऐ': 'ai', 'ओ': 'o', 'औ': 'au', 'ऑ': 'o',
+}
+_SIGNS = {
+    'ा': 'a', 'ि': 'i', 'ी': 'i', 'ु': 'u', 'ू': 'u', 'ृ': 'ri',
+    'े': 'e', 'ै': 'ai', 'ो': 'o', 'ौ': 'au', 'ॉ': 'o',
+}
+_CONSONANTS = {
+    'क': 'k', 'ख': 'kh', 'ग': 'g', 'घ': 'gh', 'ङ': 'n',
+    'च': 'ch', 'छ': 'chh', 'ज': 'j', 'झ': 'jh', 'ञ': 'n',
+    'ट': 't', 'ठ': 'th', 'ड': 'd', 'ढ': 'dh', 'ण': 'n',
+    'त': 't', 'थ': 'th', 'द': 'd', 'ध': 'dh', 'न': 'n',
+    'प': 'p', 'फ': 'ph', 'ब': 'b', 'भ': 'bh', 'म': 'm',
+    'य': 'y', 'र': 'r', 'ल': 'l', 'व': 'v', 'श': 'sh', 'ष': 'sh', 'स': 's', 'ह': 'h',
+    'क़': 'q', 'ख़': 'kh', 'ग़': 'g', 'ज़': 'z', 'ड़': 'd', 'ढ़': 'rh', 'फ़': 'f',
+}
+_NASALS = {'ं': 'n', 'ँ': 'n', 'ः': 'h'}
+_VIRAMA = '्'
+_NUKTA = '़'
+
+
+def _romanize_word(word):
+    # [sound, is_consonant, has_explicit_vowel, vowel] per letter
+    parts = []
+    i = 0
+    while i < len(word):
+        ch = word[i]
+        if i + 1 < len(word) and word[i + 1] == _NUKTA:
+            ch += _NUKTA
+            i += 1
+        i += 1
+        if ch in _CONSONANTS:
+            parts.append([_CONSONANTS[ch], True, False, 'a'])
+        elif ch in _SIGNS and parts and parts[-1][1]:
+            parts[-1][3] = _SIGNS[ch]
+            parts[-1][2] = True
+        elif ch == _VIRAMA and parts and parts[-1][1]:
+            parts[-1][3] = ''
+            parts[-1][2] = True
+        elif ch in _VOWELS:
+            parts.append([_VOWELS[ch], False, True, ''])
+        elif ch in _NASALS:
+            parts.append([_NASALS[ch], False, True, ''])
+        else:
+            parts.append([ch, False, True, ''])
+    # schwa deletion: drop the inherent 'a' at the end of a word and between a
+    # vowel and a consonant that carries its own vowel (बिरयानी -> biryani)
+    for n, part in enumerate(parts):
+        if not part[1] or part[2]:
+            continue
+        last = n == len(parts) - 1
+        before_vowel = n > 0 and (not parts[n - 1][1] or parts[n - 1][3])
+        after = parts[n + 1] if not last else None
+        if (last and n > 0) or (before_vowel and after and after[1] and after[2] and after[3]):
+            part[3] = ''
+    return ''.join(sound + vowel for sound, _, _, vowel in parts)
+
+
+def transliterate(text):
+    """Romanized form of a Devanagari name, e.g. 'मुर्गा बिरयानी' -> 'murga biryani'."""
+    if not text:
+        return None
+    return ' '.join(_romanize_word(word) for word in text.split())
+
+
+def match_expression(text):
+    """FTS5 query for search-as-you-type: every word must match, the last one as a prefix."""
+    tokens = _TOKEN.findall(text.lower())
+    if not tokens or len(''.join(tokens)) < MIN_PREFIX:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_menu(text, limit=RESULT_LIMIT):
+    """Available dishes of approved restaurants matching text, best match first.
+
+    Exact when the text has at most RANK_WINDOW hits; broader prefixes are
+    ranked among their newest RANK_WINDOW hits.
+    """
+    query = match_expression(text)
+    if query is None:
+        return []
+    return db.rows(MENU_MATCH, (query, RANK_WINDOW, limit))
+
+
+def search_restaurants(text, limit=5):
+    query = match_expression(text)
+    if query is None:
+        return []
+    return db.rows(RESTAURANT_MATCH, (query, limit))
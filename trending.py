@@ -0,0 +1,170 @@
+"""In-memory trending restaurants and dishes.
+
+Popularity is an exponentially decayed order count, kept with forward decay:
+an event at time t adds ``w * exp(lambda * (t - t0))`` to its key.  Scores of
+keys that are not hit never change relative to each other, so each counter
+can keep its top-K list current on every update instead of re-ranking on
+every read.  Counters are bounded Space-Saving style: past capacity the
+weakest keys are dropped.
+
+One counter exists per (city, window, kind); the home panel reads them
+without touching the orders tables.
+"""
+import math
+import threading
+import time
+
+import db
+
+WINDOWS = {
+    '1h': 3600,          # half-life in seconds
+    '24h': 24 * 3600,
+    '7d': 7 * 24 * 3600,
+}
+ALL_CITIES = '*'
+TOP_K = 10
+CAPACITY = 5000
+WARMUP_DAYS = 7
+
+
+class DecayedTopK:
+    def __init__(self, half_life, k=TOP_K, capacity=CAPACITY):
+        self.rate = math.log(2) / half_life
+        self.k = k
+        self.capacity = capacity
+        self.t0 = time.time()
+        self.scores = {}
+        self.top = []  # keys, best first
+
+    def add(self, key, weight=1.0, at=None):
+        exponent = self.rate * ((at or time.time()) - self.t0)
+        if exponent > 500:
+            self._rebase(at or time.time())
+            exponent = self.rate * ((at or time.time()) - self.t0)
+        score = self.scores.get(key, 0.0) + weight * math.exp(exponent)
+        self.scores[key] = score
+        if key in self.top:
+            self.top.sort(key=self.scores.__getitem__, reverse=True)
+        elif len(self.top) < self.k or score > self.scores[self.top[-1]]:
+            self.top.append(key)
+            self.top.sort(key=self.scores.__getitem__, reverse=True)
+            del self.top[self.k:]
+        if len(self.scores) > self.capacity:
+            self._evict()
+
+    def _rebase(self, now):
+        factor = math.exp(-self.rate * (now - self.t0))
+        self.scores = {key: score * factor for key, score in self.scores.items()}
+        self.t0 = now
+
+    def _evict(self):
+        keep = sorted(self.scores, key=self.scores.__getitem__, reverse=True)[:int(self.capacity * 0.9)]
+        self.scores = {key: self.scores[key] for key in keep}
+
+    def items(self, n=None):
+        """[(key, decayed score as of now)] best first."""
+        now_factor = math.exp(-self.rate * (time.time() - self.t0))
+        return [(key, self.scores[key] * now_factor) for key in self.top[:n or self.k]]
+
+
+class Trending:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._meta_version = None
+        self.restaurants = {}
+        self.dishes = {}
+        self.warm = False
+
+    def _counter(self, city, window, kind):
+        key = (city, window, kind)
+        if key not in self._counters:
+            self._counters[key] = DecayedTopK(WINDOWS[window])
+        return self._counters[key]
+
+    def _load_meta(self):
+        version = db.table_version('restaurants', 'menu_items')
+        if version == self._meta_version:
+            return
+        self.restaurants = {r.id: r for r in db.rows(
+            "SELECT id, name, rating, COALESCE(city, '') as city FROM restaurants WHERE is_approved=1")}
+        self.dishes = {d.id: d for d in db.rows(
+            "SELECT id, restaurant_id, name, hindi_name, price FROM menu_items WHERE is_available=1")}
+        self._meta_version = version
+
+    def _record(self, city, restaurant_id, lines, at):
+        for c in {city, ALL_CITIES}:
+            for window in WINDOWS:
+                self._counter(c, window, 'restaurant').add(restaurant_id, 1.0, at)
+                for menu_item_id, qty in lines:
+                    if menu_item_id is not None:
+                        self._counter(c, window, 'dish').add(menu_item_id, float(qty), at)
+
+    def record_order(self, restaurant_id, lines, at=None):
+        """Feed one placed order; lines are (menu_item_id, qty) pairs.
+
+        Before warm-up nothing is recorded: the warm-up replays the order from the database.
+        """
+        with self._lock:
+            if not self.warm:
+                return
+            self._load_meta()
+            rest = self.restaurants.get(restaurant_id)
+            self._record(rest.city if rest else '', restaurant_id, lines, at)
+
+    def warm_up(self):
+        """Replay the last WARMUP_DAYS of order lines, bucketed by hour, into the counters."""
+        with self._lock:
+            if self.warm:
+                return
+            self._load_meta()
+            for line in db.rows(
+                """
+                SELECT o.restaurant_id, i.menu_item_id, SUM(i.qty) as qty, COUNT(DISTINCT o.id) as orders,
+                       CAST(strftime('%s', strftime('%Y-%m-%d %H:00:00', o.created_at)) AS INTEGER) as hour
+                FROM orders o JOIN order_items i ON i.order_id = o.id
+                WHERE o.created_at >= DATETIME('now', ?)
+                GROUP BY o.restaurant_id, i.menu_item_id, hour
+                ORDER BY hour
+                """,
+                (f'-{WARMUP_DAYS} days',)
+            ):
+                rest = self.restaurants.get(line.restaurant_id)
+                city = rest.city if rest else ''
+                for c in {city, ALL_CITIES}:
+                    for window in WINDOWS:
+                        self._counter(c, window, 'restaurant').add(line.restaurant_id, line.orders, line.hour)
+                        if line.menu_item_id is not None:
+                            self._counter(c, window, 'dish').add(line.menu_item_id, line.qty, line.hour)
+            self.warm = True
+
+    def cities(self):
+        return sorted({r.city for r in self.restaurants.values() if r.city})
+
+    def top(self, kind, window='24h', city=ALL_CITIES, n=5):
+        """Trending rows for the home panel: restaurant or menu_items rows, best first.
+
+        Keys whose row is gone (unapproved restaurant, unavailable dish) are skipped.
+        """
+        self.warm_up()
+        with self._lock:
+            self._load_meta()
+            rows = self.restaurants if kind == 'restaurant' else self.dishes
+            counter = self._counters.get((city, window, kind))
+            picked = [rows[key] for key, _ in (counter.items() if counter else []) if key in rows][:n]
+            if len(picked) < n:
+                # cold start: fill with the best-rated restaurants / their dishes
+                if kind == 'restaurant':
+                    pool = sorted(rows.values(), key=lambda r: -(r.rating or 0))
+                else:
+                    pool = list(rows.values())
+                pool = [r for r in pool if city == ALL_CITIES or self._city_of(kind, r) == city]
+                picked += [r for r in pool if r not in picked][:n - len(picked)]
+            return picked
+
+    def _city_of(self, kind, row):
+        rest = self.restaurants.get(row.id if kind == 'restaurant' else row.restaurant_id)
+        return rest.city if rest else ''
+
+
+trending = Trending()